@@ -409,7 +409,7 @@ class SupervisorBuilder:
                     "Assistant supervisors cannot manage other assistant supervisors"
                 )
 
-    def build(self, id_) -> Supervisor:
+    def build(self, id_, history_backend: str | None = None) -> Supervisor:
         """Build supervisor if validation passes"""
         if not self.validate():
             raise ValidationError(
@@ -422,6 +422,7 @@ class SupervisorBuilder:
             llm_config=self.llm_config,
             is_assistant=self.definition.is_assistant,
             workflow_id=id_,
+            history_backend=history_backend if not self.definition.is_assistant else None,
         )
 
 
@@ -432,6 +433,7 @@ class WorkflowBuilder:
         workflow_definition: WorkflowDefinition,
         llm_config: dict[str, str],
         workflow_id: str = "000",
+        history_backend: str | None = None,
     ):
         self.definition = workflow_definition
         self.llm_config = llm_config
@@ -439,6 +441,7 @@ class WorkflowBuilder:
         if agents_system_messages:
             self._update_system_messages(agents_system_messages)
         self.workflow_id = workflow_id
+        self.history_backend = history_backend
 
     def _update_system_messages(self, agent_messages: dict[str, str]):
         """Update system messages in the workflow definition"""
@@ -465,7 +468,7 @@ class WorkflowBuilder:
             self.definition.main_supervisor, self.llm_config
         )
         if main_sup_builder.validate():
-            main_supervisor = main_sup_builder.build(self.workflow_id)
+            main_supervisor = main_sup_builder.build(self.workflow_id, self.history_backend)
             self.components["main_supervisor"] = main_supervisor
 
         # 2. Build and validate assistant supervisors
@@ -1,4 +1,5 @@
 from primisai.nexus.core import AI
+from primisai.nexus.history import release_history_manager
 from typing import Dict
 import logging
 import json
@@ -12,7 +13,6 @@ from threading import Lock
 import threading
 import time
 import uuid
-import os
 
 logger = logging.getLogger(__name__)
 
@@ -135,17 +135,12 @@ class Evaluator:
 
                 # Get response from supervisor
                 response = supervisor.chat(test_query)
-                path = os.path.join(
-                    "nexus_workflows",
-                    f"{workflow_id}_{unique_suffix}",
-                    "history.jsonl"
-                )
-                messages = []
-                with open(path, encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line:
-                            messages.append(json.loads(line))
+                # Read through the history manager, so any storage backend works
+                # (e.g. "memory" for evaluation runs that need no files).
+                messages = supervisor.history_manager.get_all_messages()
+                if is_factory:
+                    # Throwaway run; close its history and free its records.
+                    release_history_manager(supervisor.history_manager.workflow_id)
 
                 chat = """"""
 
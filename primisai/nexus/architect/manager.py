@@ -92,7 +92,9 @@ class Architect:
     def _create_supervisor_instance(self, workflow_id: str, unique_suffix: int):
         """Factory function to create a supervisor instance for evaluation."""
         run_id = f"{workflow_id}_{unique_suffix}"
-        builder = WorkflowBuilder(self.system_messages, self.structured_workflow, self.llm_config, run_id)
+        # Evaluation runs are throwaway: keep their histories in memory.
+        builder = WorkflowBuilder(self.system_messages, self.structured_workflow, self.llm_config, run_id,
+                                  history_backend="memory")
         return builder.build_component_and_validate()
 
     def _save_workflow_to_file(self, accuracy: float, iteration: int) -> str:
@@ -67,7 +67,13 @@ class AgentFactory:
             llm_config=supervisor_config['llm_config'],
             system_message=supervisor_config['system_message'],
             workflow_id=workflow_id if is_root else None,
-            is_assistant=supervisor_config.get('is_assistant', False)
+            is_assistant=supervisor_config.get('is_assistant', False),
+            context_window=supervisor_config.get('context_window'),
+            compaction=supervisor_config.get('compaction'),
+            parallel_delegation=supervisor_config.get('parallel_delegation', False),
+            history_durability=supervisor_config.get('history_durability') if is_root else None,
+            history_backend=supervisor_config.get('history_backend') if is_root else None,
+            history_root=supervisor_config.get('history_root') if is_root else None
         )
 
         for child_config in supervisor_config.get('children', []):
@@ -105,6 +111,12 @@ class AgentFactory:
             'keep_history': agent_config.get('keep_history', True),
             'output_schema': agent_config.get('output_schema'),
             'strict': agent_config.get('strict', False),
+            'context_window': agent_config.get('context_window'),
+            'compaction': agent_config.get('compaction'),
+            'parallel_tools': agent_config.get('parallel_tools', False),
+            'tool_timeout': agent_config.get('tool_timeout'),
+            'mcp_discovery': agent_config.get('mcp_discovery', 'eager'),
+            'mcp_catalog_cache': agent_config.get('mcp_catalog_cache', False),
             'mcp_servers': agent_config.get('mcp_servers', [])
         }
         
@@ -136,7 +148,15 @@ class AgentFactory:
                     }
                 }
             }
-            tools.append({"tool": tool_function, "metadata": metadata})
+            tool = {"tool": tool_function, "metadata": metadata}
+            if tool_config.get('serial'):
+                tool['serial'] = True
+            if tool_config.get('cache'):
+                tool['cache'] = tool_config['cache']
+            for setting in ('timeout', 'max_concurrency'):
+                if tool_config.get(setting) is not None:
+                    tool[setting] = tool_config[setting]
+            tools.append(tool)
         return tools
 
     @staticmethod
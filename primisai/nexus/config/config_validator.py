@@ -8,6 +8,9 @@ Supervisors and Agents.
 
 from typing import Dict, Any, List
 
+from primisai.nexus.history.history_writer import DURABILITY_POLICIES
+from primisai.nexus.history.storage import BACKENDS
+
 class ConfigValidationError(Exception):
     """
     Custom exception for configuration validation errors.
@@ -67,6 +70,15 @@ class ConfigValidator:
         if is_root and supervisor.get('is_assistant', False):
             raise ConfigValidationError("Root supervisor cannot be an assistant supervisor")
 
+        ConfigValidator._validate_context_window(supervisor)
+        ConfigValidator._validate_compaction(supervisor)
+        ConfigValidator._validate_concurrency(supervisor, 'parallel_delegation')
+        if 'history_durability' in supervisor and supervisor['history_durability'] not in DURABILITY_POLICIES:
+            raise ConfigValidationError(f"history_durability must be one of {', '.join(DURABILITY_POLICIES)}")
+        if 'history_backend' in supervisor and supervisor['history_backend'] not in BACKENDS:
+            raise ConfigValidationError(f"history_backend must be one of {', '.join(BACKENDS)}")
+        if 'history_root' in supervisor and not isinstance(supervisor['history_root'], str):
+            raise ConfigValidationError("'history_root' must be a string")
         ConfigValidator._validate_llm_config(supervisor['llm_config'])
 
         for child in supervisor.get('children', []):
@@ -118,10 +130,100 @@ class ConfigValidator:
                     raise ConfigValidationError("SSE MCP server must have 'url' field")
                 if server['type'] == 'stdio' and 'script_path' not in server:
                     raise ConfigValidationError("stdio MCP server must have 'script_path' field")
+                if 'cache' in server and not isinstance(server['cache'], (bool, dict)):
+                    raise ConfigValidationError("MCP server 'cache' must be a boolean or a dictionary")
+                ConfigValidator._validate_tool_limits(server, "MCP server")
+        if 'mcp_discovery' in agent and agent['mcp_discovery'] not in ('eager', 'lazy'):
+            raise ConfigValidationError("mcp_discovery must be 'eager' or 'lazy'")
+        if 'mcp_catalog_cache' in agent and not isinstance(agent['mcp_catalog_cache'], (bool, str)):
+            raise ConfigValidationError("mcp_catalog_cache must be a boolean or a file path")
         
+        ConfigValidator._validate_context_window(agent)
+        ConfigValidator._validate_compaction(agent)
+        ConfigValidator._validate_concurrency(agent, 'parallel_tools')
+        if 'tool_timeout' in agent and not ConfigValidator._is_positive_number(agent['tool_timeout']):
+            raise ConfigValidationError("tool_timeout must be a positive number of seconds")
         ConfigValidator._validate_llm_config(agent['llm_config'])
         ConfigValidator._validate_tools(agent.get('tools', []))
 
+    @staticmethod
+    def _validate_context_window(entity: dict[str, Any]) -> None:
+        """
+        Validate the optional context_window setting of an agent or supervisor.
+
+        Args:
+            entity (Dict[str, Any]): The agent or supervisor configuration.
+
+        Raises:
+            ConfigValidationError: If the context window setting is invalid.
+        """
+        if 'context_window' not in entity:
+            return
+        context_window = entity['context_window']
+        if isinstance(context_window, bool) or not isinstance(context_window, (int, dict)):
+            raise ConfigValidationError("context_window must be a token budget or a dictionary")
+        if isinstance(context_window, dict) and 'max_tokens' not in context_window:
+            raise ConfigValidationError("context_window must have 'max_tokens' field")
+
+    @staticmethod
+    def _validate_concurrency(entity: dict[str, Any], key: str) -> None:
+        """
+        Validate an optional concurrency setting (``parallel_tools`` or ``parallel_delegation``).
+
+        Args:
+            entity (Dict[str, Any]): The agent or supervisor configuration.
+            key (str): Name of the setting.
+
+        Raises:
+            ConfigValidationError: If the setting is not a boolean or a non-negative integer.
+        """
+        if key not in entity:
+            return
+        value = entity[key]
+        if not isinstance(value, (bool, int)) or value < 0:
+            raise ConfigValidationError(f"{key} must be a boolean or a non-negative integer")
+
+    @staticmethod
+    def _is_positive_number(value: Any) -> bool:
+        """Return True for an int or float greater than zero (booleans excluded)."""
+        return not isinstance(value, bool) and isinstance(value, (int, float)) and value > 0
+
+    @staticmethod
+    def _validate_tool_limits(entity: dict[str, Any], owner: str) -> None:
+        """
+        Validate the optional ``timeout`` and ``max_concurrency`` settings of a tool or MCP server.
+
+        Args:
+            entity (Dict[str, Any]): The tool or MCP server configuration.
+            owner (str): "Tool" or "MCP server", for error messages.
+
+        Raises:
+            ConfigValidationError: If a setting is not positive.
+        """
+        if 'timeout' in entity and not ConfigValidator._is_positive_number(entity['timeout']):
+            raise ConfigValidationError(f"{owner} 'timeout' must be a positive number of seconds")
+        limit = entity.get('max_concurrency')
+        if 'max_concurrency' in entity and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 1):
+            raise ConfigValidationError(f"{owner} 'max_concurrency' must be a positive integer")
+
+    @staticmethod
+    def _validate_compaction(entity: dict[str, Any]) -> None:
+        """
+        Validate the optional compaction setting of an agent or supervisor.
+
+        Args:
+            entity (Dict[str, Any]): The agent or supervisor configuration.
+
+        Raises:
+            ConfigValidationError: If the compaction setting is invalid.
+        """
+        if 'compaction' not in entity:
+            return
+        if not isinstance(entity['compaction'], dict):
+            raise ConfigValidationError("compaction must be a dictionary")
+        if 'trigger_tokens' not in entity['compaction']:
+            raise ConfigValidationError("compaction must have 'trigger_tokens' field")
+
     @staticmethod
     def _validate_llm_config(llm_config: dict[str, Any]) -> None:
         """
@@ -138,6 +240,27 @@ class ConfigValidator:
             if field not in llm_config:
                 raise ConfigValidationError(f"Missing required field '{field}' in llm_config")
 
+        if 'client' in llm_config and not isinstance(llm_config['client'], dict):
+            raise ConfigValidationError("llm_config 'client' must be a dictionary")
+
+        if 'cache' in llm_config and not isinstance(llm_config['cache'], (bool, dict)):
+            raise ConfigValidationError("llm_config 'cache' must be a boolean or a dictionary")
+
+        if 'rate_limit' in llm_config and not isinstance(llm_config['rate_limit'], dict):
+            raise ConfigValidationError("llm_config 'rate_limit' must be a dictionary")
+
+        if 'retry' in llm_config and not isinstance(llm_config['retry'], dict):
+            raise ConfigValidationError("llm_config 'retry' must be a dictionary")
+
+        if 'hedge' in llm_config and not isinstance(llm_config['hedge'], (bool, dict)):
+            raise ConfigValidationError("llm_config 'hedge' must be a boolean or a dictionary")
+
+        if 'coalesce' in llm_config and not isinstance(llm_config['coalesce'], bool):
+            raise ConfigValidationError("llm_config 'coalesce' must be a boolean")
+
+        if 'prompt_cache' in llm_config and not isinstance(llm_config['prompt_cache'], (bool, dict)):
+            raise ConfigValidationError("llm_config 'prompt_cache' must be a boolean or a dictionary")
+
     @staticmethod
     def _validate_tools(tools: list[dict[str, Any]]) -> None:
         """
@@ -156,4 +279,12 @@ class ConfigValidator:
                     raise ConfigValidationError(f"Missing required field '{field}' in tool configuration")
 
             if tool['type'] != 'function':
-                raise ConfigValidationError(f"Invalid tool type: {tool['type']}")
\ No newline at end of file
+                raise ConfigValidationError(f"Invalid tool type: {tool['type']}")
+
+            if 'serial' in tool and not isinstance(tool['serial'], bool):
+                raise ConfigValidationError("Tool 'serial' must be a boolean value")
+
+            if 'cache' in tool and not isinstance(tool['cache'], (bool, dict)):
+                raise ConfigValidationError("Tool 'cache' must be a boolean or a dictionary")
+
+            ConfigValidator._validate_tool_limits(tool, "Tool")
\ No newline at end of file
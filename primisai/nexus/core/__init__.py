@@ -1,5 +1,13 @@
-from .ai import AI
+from .client_pool import ClientPool, client_pool
+from .response_cache import ResponseCache
+from .rate_limiter import RateLimiter
+from .coalescing import SingleFlight, single_flight
+from .ai import AI, AsyncAI
+from .streaming import StreamAccumulator
+from .context import ContextWindow
+from .compaction import Compactor
 from .agents import Agent
 from .supervisor import Supervisor
 
-__all__ = ['AI', 'Agent', 'Supervisor']
\ No newline at end of file
+__all__ = ['AI', 'AsyncAI', 'Agent', 'Supervisor', 'ClientPool', 'client_pool', 'StreamAccumulator', 'ResponseCache', 'RateLimiter',
+           'SingleFlight', 'single_flight', 'ContextWindow', 'Compactor']
\ No newline at end of file
@@ -6,17 +6,27 @@ with additional features like tool usage and chat history management.
 """
 
 import json, asyncio
+import concurrent.futures
 import logging
-import threading
-from typing import List, Dict, Optional, Any
-from concurrent.futures import ThreadPoolExecutor
+import time
+import weakref
+from typing import List, Dict, Optional, Any, Iterator, AsyncIterator, Awaitable, Callable
 from openai.types.chat import ChatCompletionMessage
 from primisai.nexus.core.ai import AI
-from primisai.nexus.history import HistoryManager, EntityType
+from primisai.nexus.core.streaming import StreamAccumulator
+from primisai.nexus.core.context import ContextWindow, build_context_window
+from primisai.nexus.core.compaction import Compactor, build_compactor
+from primisai.nexus.core.mcp_catalog import catalog_hash, get_mcp_catalog
+from primisai.nexus.core.mcp_sessions import (McpConnection, get_mcp_manager, record_request_ids, release_leases,
+                                              server_key)
+from primisai.nexus.core.prompt_cache import canonical_dumps
+from primisai.nexus.core.tool_binding import InvalidToolArguments
+from primisai.nexus.core.tool_execution import (
+    CachedResult, ToolError, ToolTimeout, arun_tool, concurrency_limit, gather_tool_calls, prepare_tool, run_tool
+)
+from primisai.nexus.history import EntityType, get_history_manager
 from primisai.nexus.utils import Debugger
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.sse import sse_client
-from mcp.client.stdio import stdio_client
+from mcp import ClientSession, types as mcp_types
 logger = logging.getLogger(__name__)
 
 # and any future v2 migration checklist can compare against them.
@@ -63,7 +73,13 @@ class Agent(AI):
                  keep_history: bool = True,
                  mcp_servers: list[dict[str, Any]] | None = None,
                  output_schema: dict[str, Any] | None = None,
-                 strict: bool = False):
+                 strict: bool = False,
+                 context_window: int | dict[str, Any] | ContextWindow | None = None,
+                 compaction: dict[str, Any] | Compactor | None = None,
+                 parallel_tools: bool | int = False,
+                 tool_timeout: float | None = None,
+                 mcp_discovery: str = 'eager',
+                 mcp_catalog_cache: bool | str = False):
         """
         Initialize the Agent instance.
 
@@ -79,22 +95,51 @@ class Agent(AI):
                 List of dicts, where each defines an MCP server/proxy:
                 - For remote/SSE: {'type': 'sse', 'url': ..., 'auth_token': ...}
                 - For local/stdio: {'type': 'stdio', 'script_path': 'server.py'}
-                All discovered tools are available as functions to the agent.
+                All discovered tools are available as functions to the agent. Optional
+                'timeout', 'max_concurrency' and 'cache' entries apply to each of them
+                (see `tool_execution`).
             output_schema (Optional[Dict[str, Any]]): Schema for agent's output format.
             strict (bool): If True, always enforce output schema.
+            context_window (Optional[Union[int, Dict[str, Any], ContextWindow]]): Token budget
+                for the chat history sent with each request: a token count, a dict of
+                `ContextWindow` settings, or a ContextWindow. None keeps the full history.
+            compaction (Optional[Union[Dict[str, Any], Compactor]]): Rolling-summary settings
+                (see `Compactor`) folding old turns into a summary once the history grows
+                past a token threshold. None disables compaction.
+            parallel_tools (Union[bool, int]): Run the tool calls of one LLM response
+                concurrently: True for up to 8 at once, or the maximum number of
+                concurrent tools. Tools marked ``"serial": True`` never overlap others.
+            tool_timeout (Optional[float]): Seconds after which a tool call without its
+                own ``timeout`` is cancelled and reported to the model as timed out.
+                None lets tools run indefinitely.
+            mcp_discovery (str): 'eager' to connect to the MCP servers (concurrently)
+                before the constructor returns, or 'lazy' to discover their tools in the
+                background and wait for them on the first chat.
+            mcp_catalog_cache (Union[bool, str]): Cache the MCP servers' converted tool
+                lists on disk (True for ``nexus_workflows/mcp_catalog.json``, or a path) and
+                start from the cache while the servers are checked for changes in the
+                background (see `mcp_catalog`).
 
         Raises:
-            ValueError: If the name is empty.
+            ValueError: If the name is empty or the context window, compaction,
+                parallel_tools, tool_timeout or mcp_discovery settings are invalid.
         """
+        started = time.perf_counter()
         super().__init__(llm_config=llm_config)
 
         if not name:
             raise ValueError("Agent name cannot be empty")
+        if tool_timeout is not None and (isinstance(tool_timeout, bool) or not isinstance(tool_timeout, (int, float))
+                                         or tool_timeout <= 0):
+            raise ValueError("tool_timeout must be a positive number of seconds")
+        if mcp_discovery not in ('eager', 'lazy'):
+            raise ValueError("mcp_discovery must be 'eager' or 'lazy'")
 
         self.name = name
         self.workflow_id = workflow_id
         self.use_tools = use_tools
         self.tools = tools or []
+        self._rebuild_tool_index()
         self.system_message = system_message
         self.keep_history = keep_history
         self.history_manager = None
@@ -105,29 +150,32 @@ class Agent(AI):
         self._mcp_tool_names = set()
         self.output_schema = output_schema
         self.strict = strict
-        self._mcp_sessions: Dict[str, Dict[str, Any]] = {}
-        self._mcp_loop: asyncio.AbstractEventLoop | None = None
-        self._mcp_loop_thread: threading.Thread | None = None
-        self._mcp_loop_ready = threading.Event()
-
-        
+        self.context_window = build_context_window(context_window)
+        self.compactor = build_compactor(compaction)
+        self.max_tool_concurrency = concurrency_limit(parallel_tools)
+        self.tool_timeout = tool_timeout
+        self._mcp_sessions: Dict[str, McpConnection] = {}
+        # Server identities of the shared sessions leased by this agent; returned on close.
+        self._mcp_leases: list[str] = []
+        self._mcp_finalizer = weakref.finalize(self, release_leases, self._mcp_leases)
+        self._mcp_finalizer.atexit = False
+        self.mcp_discovery = mcp_discovery
+        self._mcp_discovery: concurrent.futures.Future | None = None
+        self._mcp_discovery_seconds: float | None = None
+        self._mcp_server_stats: dict[str, dict[str, Any]] = {}
+        self._mcp_catalog = get_mcp_catalog(mcp_catalog_cache)
+        # Background connections of servers registered from the catalog cache.
+        self._mcp_pending: dict[str, asyncio.Future] = {}
 
         if system_message:
             self.set_system_message(system_message)
-            #asyncio.run(self._load_mcp_tools()) #Updated
-        # Safe async initialization
-        try:
-            loop = asyncio.get_running_loop()
-            if loop.is_running():
-                # Event loop already running (Jupyter/notebook/async app).
-                # Block until tools are loaded by running asyncio.run in a
-                # worker thread so we don't interfere with the existing loop.
-                with ThreadPoolExecutor(max_workers=1) as pool:
-                    pool.submit(asyncio.run, self._load_mcp_tools()).result()
-            else:
-                loop.run_until_complete(self._load_mcp_tools())
-        except RuntimeError:
-            asyncio.run(self._load_mcp_tools())
+        if self.mcp_servers:
+            # Discovery runs on the persistent MCP loop, which owns the sessions, so it
+            # works the same whether or not the caller is inside a running event loop.
+            self._mcp_discovery = asyncio.run_coroutine_threadsafe(self._load_mcp_tools(), self._ensure_mcp_loop())
+            if mcp_discovery == 'eager':
+                self._wait_for_mcp_tools()
+        self.construction_seconds = time.perf_counter() - started
 
     def set_workflow_id(self, workflow_id: str) -> None:
         """
@@ -139,7 +187,7 @@ class Agent(AI):
         """
         self.workflow_id = workflow_id
         self.debugger.update_workflow_id(workflow_id)
-        self.history_manager = HistoryManager(workflow_id)
+        self.history_manager = get_history_manager(workflow_id)
         
         if self.system_message and not self.history_manager.has_system_message(self.name):
             self.history_manager.append_message(
@@ -158,7 +206,7 @@ class Agent(AI):
         if self.output_schema:
             schema_instruction = (
                 "\n\nYOU MUST ALWAYS RESPOND IN THE FOLLOWING FORMAT:\n"
-                f"{json.dumps(self.output_schema, indent=2)}\n"
+                f"{self._schema_text()}\n"
                 "Your entire response must be valid JSON matching this schema.\n"
             )
             message = message + schema_instruction
@@ -166,6 +214,12 @@ class Agent(AI):
         self.system_message = message
         self._reset_chat_history()
 
+    def _schema_text(self) -> str:
+        """Render the output schema for prompts, deterministically in prompt-cache mode."""
+        if self.prompt_cache.enabled:
+            return canonical_dumps(self.output_schema, indent=2)
+        return json.dumps(self.output_schema, indent=2)
+
     def _validate_and_format_response(self, response: str) -> str:
         """
         Validate response against schema and reformat if needed.
@@ -176,47 +230,272 @@ class Agent(AI):
         Returns:
             str: Validated/formatted response
         """
+        if not self._needs_schema_reformat(response):
+            return self._normalize_schema_response(response)
+
+        formatted = self.generate_response(
+            messages=self._schema_reformat_messages(response)
+        ).choices[0].message.content
+        return self._finalize_schema_reformat(formatted, response)
+
+    async def _avalidate_and_format_response(self, response: str) -> str:
+        """
+        Async counterpart of `_validate_and_format_response`.
+
+        Args:
+            response (str): Raw response from LLM
+
+        Returns:
+            str: Validated/formatted response
+        """
+        if not self._needs_schema_reformat(response):
+            return self._normalize_schema_response(response)
+
+        formatted = (await self.agenerate_response(
+            messages=self._schema_reformat_messages(response)
+        )).choices[0].message.content
+        return self._finalize_schema_reformat(formatted, response)
+
+    def _needs_schema_reformat(self, response: str) -> bool:
+        """Return True if a strict schema requires an extra LLM reformatting pass."""
+        if not self.output_schema or not self.strict:
+            return False
+        try:
+            json.loads(response)
+            return False
+        except json.JSONDecodeError:
+            return True
+
+    def _normalize_schema_response(self, response: str) -> str:
+        """Re-serialize JSON responses when an output schema is configured."""
         if not self.output_schema:
             return response
+        try:
+            return json.dumps(json.loads(response))
+        except json.JSONDecodeError:
+            return response
+
+    def _schema_reformat_messages(self, response: str) -> list[dict[str, str]]:
+        """Build the request asking the LLM to reformat a response to the output schema."""
+        format_prompt = (
+            f"Given this response:\n'''\n{response}\n'''\n"
+            f"Reformat it to match this schema:\n{self._schema_text()}\n"
+            "Return ONLY the formatted JSON, nothing else."
+        )
+        return [{"role": "user", "content": format_prompt}]
 
+    def _finalize_schema_reformat(self, formatted: str, response: str) -> str:
+        """Return the reformatted JSON, or the original response if it is still invalid."""
         try:
-            parsed = json.loads(response)
-            return json.dumps(parsed)
+            return json.dumps(json.loads(formatted))
         except json.JSONDecodeError:
-            if not self.strict:
-                return response
-            
-            format_prompt = (
-                f"Given this response:\n'''\n{response}\n'''\n"
-                f"Reformat it to match this schema:\n{json.dumps(self.output_schema, indent=2)}\n"
-                "Return ONLY the formatted JSON, nothing else."
-            )
-            
-            formatted = self.generate_response(
-                messages=[{"role": "user", "content": format_prompt}]
-            ).choices[0].message.content
+            self.debugger.log("Schema enforcement failed", level="error")
+            return response
+
+    def chat(self,
+             query: str,
+             sender_name: str | None = None,
+             stream: bool = False) -> str | Iterator[str]:
+        """
+        Process a chat interaction with the agent.
 
+        Args:
+            query (str): The query to process.
+            sender_name (Optional[str]): Name of the entity sending the query.
+                                       Could be a supervisor name or None for direct interactions.
+            stream (bool): If True, return a generator yielding content deltas as
+                they arrive instead of the final response.
+
+        Returns:
+            Union[str, Iterator[str]]: The agent's response to the query, or a
+                generator of content deltas when streaming.
+
+        Raises:
+            RuntimeError: If there's an error processing the query or using tools.
+        """
+        if stream:
+            return self._chat_stream(query, sender_name)
+
+        query_msg_id = self._start_turn(query, sender_name)
+
+        while True:
             try:
-                return json.dumps(json.loads(formatted))
-            except json.JSONDecodeError:
-                self.debugger.log("Schema enforcement failed", level="error")
-                return response
+                response = self.generate_response(
+                    self._fit_context(),
+                    **self._tool_request_kwargs()
+                ).choices[0]
 
-    def chat(self, query: str, sender_name: str | None = None) -> str:
+                if not response.finish_reason == "tool_calls":
+                    user_query_answer = self._validate_and_format_response(response.message.content)
+                    return self._finish_turn(user_query_answer, query_msg_id)
+
+                self._run_tool_calls(response.message.tool_calls, query_msg_id)
+
+            except Exception as e:
+                error_msg = f"Error in chat processing: {str(e)}"
+                self.debugger.log(error_msg)
+                raise RuntimeError(error_msg)
+
+    def achat(self,
+              query: str,
+              sender_name: str | None = None,
+              stream: bool = False) -> Awaitable[str] | AsyncIterator[str]:
         """
-        Process a chat interaction with the agent.
+        Process a chat interaction with the agent on the running event loop.
+
+        LLM completions, MCP tool calls and awaitable tools are awaited, so many
+        conversations can be in flight on a single thread. Behaviour and history
+        recording are identical to `chat`.
+
+        Example:
+            >>> answer = await agent.achat("Hello")
+            >>> async for delta in agent.achat("Hello", stream=True):
+            ...     print(delta, end="")
 
         Args:
             query (str): The query to process.
             sender_name (Optional[str]): Name of the entity sending the query.
                                        Could be a supervisor name or None for direct interactions.
+            stream (bool): If True, return an async generator yielding content
+                deltas instead of a coroutine resolving to the final response.
 
         Returns:
-            str: The agent's response to the query.
+            Union[Awaitable[str], AsyncIterator[str]]: A coroutine resolving to the
+                agent's response, or an async generator of content deltas when streaming.
+
+        Raises:
+            RuntimeError: If there's an error processing the query or using tools.
+        """
+        if stream:
+            return self._achat_stream(query, sender_name)
+        return self._achat(query, sender_name)
+
+    async def _achat(self, query: str, sender_name: str | None = None) -> str:
+        """Coroutine implementing the non-streaming `achat`."""
+        await self._await_mcp_tools()
+        query_msg_id = self._start_turn(query, sender_name)
+
+        while True:
+            try:
+                response = (await self.agenerate_response(
+                    await self._afit_context(),
+                    **self._tool_request_kwargs()
+                )).choices[0]
+
+                if not response.finish_reason == "tool_calls":
+                    user_query_answer = await self._avalidate_and_format_response(response.message.content)
+                    return self._finish_turn(user_query_answer, query_msg_id)
+
+                await self._arun_tool_calls(response.message.tool_calls, query_msg_id)
+
+            except Exception as e:
+                error_msg = f"Error in chat processing: {str(e)}"
+                self.debugger.log(error_msg)
+                raise RuntimeError(error_msg)
+
+    def _chat_stream(self, query: str, sender_name: str | None = None) -> Iterator[str]:
+        """
+        Generator implementing `chat(stream=True)`.
+
+        Tool-call deltas are accumulated until the stream ends, the tools are
+        executed, and the loop continues with the next streamed completion.
+        The final answer is persisted exactly as in the non-streaming path.
+        With a strict output schema the answer may be reformatted after the
+        stream ends, so it is not streamed: the validated JSON is yielded as a
+        single delta once the turn is finished.
+
+        Args:
+            query (str): The query to process.
+            sender_name (Optional[str]): Name of the entity sending the query.
+
+        Yields:
+            str: Content deltas of the agent's responses.
+
+        Raises:
+            RuntimeError: If there's an error processing the query or using tools.
+        """
+        query_msg_id = self._start_turn(query, sender_name)
+        buffered = bool(self.output_schema and self.strict)
+
+        while True:
+            try:
+                accumulator = StreamAccumulator()
+                for chunk in self.stream_response(self._fit_context(), **self._tool_request_kwargs()):
+                    delta = accumulator.add(chunk)
+                    if delta and not buffered:
+                        yield delta
+                response = accumulator.to_completion().choices[0]
+
+                if not response.finish_reason == "tool_calls":
+                    user_query_answer = self._validate_and_format_response(response.message.content)
+                    self._finish_turn(user_query_answer, query_msg_id)
+                    if buffered:
+                        yield user_query_answer
+                    return
+
+                self._run_tool_calls(response.message.tool_calls, query_msg_id)
+
+            except Exception as e:
+                error_msg = f"Error in chat processing: {str(e)}"
+                self.debugger.log(error_msg)
+                raise RuntimeError(error_msg)
+
+    async def _achat_stream(self, query: str, sender_name: str | None = None) -> AsyncIterator[str]:
+        """
+        Async generator implementing `achat(stream=True)`; strict output
+        schemas are handled as in `_chat_stream`.
+
+        Args:
+            query (str): The query to process.
+            sender_name (Optional[str]): Name of the entity sending the query.
+
+        Yields:
+            str: Content deltas of the agent's responses.
 
         Raises:
             RuntimeError: If there's an error processing the query or using tools.
         """
+        await self._await_mcp_tools()
+        query_msg_id = self._start_turn(query, sender_name)
+        buffered = bool(self.output_schema and self.strict)
+
+        while True:
+            try:
+                accumulator = StreamAccumulator()
+                async for chunk in self.astream_response(await self._afit_context(), **self._tool_request_kwargs()):
+                    delta = accumulator.add(chunk)
+                    if delta and not buffered:
+                        yield delta
+                response = accumulator.to_completion().choices[0]
+
+                if not response.finish_reason == "tool_calls":
+                    user_query_answer = await self._avalidate_and_format_response(response.message.content)
+                    self._finish_turn(user_query_answer, query_msg_id)
+                    if buffered:
+                        yield user_query_answer
+                    return
+
+                await self._arun_tool_calls(response.message.tool_calls, query_msg_id)
+
+            except Exception as e:
+                error_msg = f"Error in chat processing: {str(e)}"
+                self.debugger.log(error_msg)
+                raise RuntimeError(error_msg)
+
+    def _start_turn(self, query: str, sender_name: str | None) -> str | None:
+        """
+        Record the incoming query in chat history and the history manager.
+
+        Waits for lazy MCP discovery first; the async paths await it beforehand.
+
+        Args:
+            query (str): The query to process.
+            sender_name (Optional[str]): Name of the entity sending the query.
+
+        Returns:
+            Optional[str]: ID of the persisted query message, if history is enabled.
+        """
+        self._wait_for_mcp_tools()
         self.debugger.log(f"Query received from {sender_name or 'direct'}: {query}")
         
         if not self.keep_history:
@@ -234,75 +513,209 @@ class Agent(AI):
                 sender_type=sender_type,
                 sender_name=sender_name or "user"
             )
+        return query_msg_id
 
-        while True:
-            try:
-                # Check if we actually have tools before enabling use_tools
-                has_tools = bool(self.tools)
-                
-                response = self.generate_response(
-                    self.chat_history,
-                    tools=[tool['metadata'] for tool in self.tools] if has_tools else None,
-                    use_tools=self.use_tools and has_tools
-                ).choices[0]
+    def _fit_context(self) -> list[dict[str, Any]]:
+        """Compact and prune the chat history as configured and return it for the next request."""
+        if self.compactor is not None:
+            self.chat_history = self.compactor.compact(self.chat_history, self._summarize, self._persist_summary)
+        if self.context_window is not None:
+            self.chat_history = self.context_window.fit(self.chat_history)
+        return self.chat_history
 
-                if not response.finish_reason == "tool_calls":
-                    user_query_answer = response.message.content
-                    user_query_answer = self._validate_and_format_response(user_query_answer)
-                    self.debugger.log(f"{self.name} response: {user_query_answer}")
-                                        
-                    response_msg = {"role": "assistant", "content": user_query_answer}
-                    self.chat_history.append(response_msg)
-                    
-                    if self.history_manager:
-                        self.history_manager.append_message(
-                            message=response_msg,
-                            sender_type=EntityType.AGENT,
-                            sender_name=self.name,
-                            parent_id=query_msg_id
-                        )
-                    return user_query_answer
-                
-                all_tool_calls = response.message.tool_calls
-                tool_msg = {
-                    "role": "assistant",
-                    "content": None,
-                    "tool_calls": [
-                        {
-                            'id': tc.id,
-                            'type': 'function',
-                            'function': {
-                                'name': tc.function.name,
-                                'arguments': tc.function.arguments
-                            }
-                        }
-                        for tc in all_tool_calls
-                    ]
+    async def _afit_context(self) -> list[dict[str, Any]]:
+        """Async variant of `_fit_context`; a non-deferred summary does not block the event loop."""
+        if self.compactor is not None:
+            self.chat_history = await self.compactor.acompact(
+                self.chat_history, self._summarize, self._asummarize, self._persist_summary)
+        if self.context_window is not None:
+            self.chat_history = self.context_window.fit(self.chat_history)
+        return self.chat_history
+
+    def _summarize(self, messages: list[dict[str, Any]]) -> str:
+        """Run a summarizer request for conversation compaction."""
+        return self.generate_response(messages).choices[0].message.content
+
+    async def _asummarize(self, messages: list[dict[str, Any]]) -> str:
+        """Async variant of `_summarize`."""
+        return (await self.agenerate_response(messages)).choices[0].message.content
+
+    def _persist_summary(self, summary_msg: dict[str, Any], tail_turns: int) -> None:
+        """Record a compaction summary so `load_chat_history` can resume from it."""
+        if self.history_manager:
+            self.history_manager.append_message(
+                message=summary_msg,
+                sender_type=EntityType.AGENT,
+                sender_name=self.name,
+                metadata={'summary': True, 'tail_turns': tail_turns}
+            )
+
+    def _tool_request_kwargs(self) -> dict[str, Any]:
+        """Return the `tools`/`use_tools` arguments for the next completion request."""
+        # Check if we actually have tools before enabling use_tools
+        has_tools = bool(self.tools)
+        return {
+            "tools": self._tool_indexes()[1] if has_tools else None,
+            "use_tools": self.use_tools and has_tools
+        }
+
+    def _finish_turn(self, user_query_answer: str, query_msg_id: str | None) -> str:
+        """
+        Record the final answer of a turn.
+
+        Args:
+            user_query_answer (str): The validated final answer.
+            query_msg_id (Optional[str]): ID of the query message this answers.
+
+        Returns:
+            str: The final answer.
+        """
+        self.debugger.log(f"{self.name} response: {user_query_answer}")
+                            
+        response_msg = {"role": "assistant", "content": user_query_answer}
+        self.chat_history.append(response_msg)
+        
+        if self.history_manager:
+            self.history_manager.append_message(
+                message=response_msg,
+                sender_type=EntityType.AGENT,
+                sender_name=self.name,
+                parent_id=query_msg_id
+            )
+            self.history_manager.end_turn()
+        return user_query_answer
+
+    def _record_tool_calls(self, all_tool_calls, query_msg_id: str | None) -> Iterator[tuple[Any, str | None]]:
+        """
+        Append the assistant tool-call message to chat history and persist it per call.
+
+        Each call is persisted only when it is yielded, so history records stay
+        interleaved with the tool responses written by the caller.
+
+        Args:
+            all_tool_calls: Tool call objects from the LLM response.
+            query_msg_id (Optional[str]): ID of the query message of this turn.
+
+        Yields:
+            Tuple[Any, Optional[str]]: Each tool call paired with the ID of its
+                persisted tool-call message.
+        """
+        tool_msg = {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    'id': tc.id,
+                    'type': 'function',
+                    'function': {
+                        'name': tc.function.name,
+                        'arguments': tc.function.arguments
+                    }
                 }
-                self.chat_history.append(tool_msg)
+                for tc in all_tool_calls
+            ]
+        }
+        self.chat_history.append(tool_msg)
 
-                for tool_call in all_tool_calls:
-                    tool_msg_id = None
-                    if self.history_manager:
-                        tool_msg_id = self.history_manager.append_message(
-                            message=tool_msg,
-                            sender_type=EntityType.AGENT,
-                            sender_name=self.name,
-                            parent_id=query_msg_id,
-                            tool_call_id=tool_call.id
-                        )
+        for tool_call in all_tool_calls:
+            tool_msg_id = None
+            if self.history_manager:
+                tool_msg_id = self.history_manager.append_message(
+                    message=tool_msg,
+                    sender_type=EntityType.AGENT,
+                    sender_name=self.name,
+                    parent_id=query_msg_id,
+                    tool_call_id=tool_call.id
+                )
+            yield tool_call, tool_msg_id
 
-                    self._process_tool_call(tool_call, tool_msg_id)
+    def _run_tool_calls(self, tool_calls, query_msg_id: str | None) -> None:
+        """
+        Execute the tool calls of one LLM response and record their outputs.
 
-            except Exception as e:
-                error_msg = f"Error in chat processing: {str(e)}"
-                self.debugger.log(error_msg)
-                raise RuntimeError(error_msg)
+        With parallel tools enabled the calls run concurrently on the MCP event
+        loop; otherwise they run one after another. Either way, outputs are
+        recorded in tool-call order.
+
+        Args:
+            tool_calls: Tool call objects from the LLM response.
+            query_msg_id (Optional[str]): ID of the query message of this turn.
+
+        Raises:
+            ValueError: If a tool is not found or its arguments are invalid.
+            RuntimeError: If a tool fails.
+        """
+        if self.max_tool_concurrency <= 1 or len(tool_calls) < 2:
+            for tool_call, tool_msg_id in self._record_tool_calls(tool_calls, query_msg_id):
+                self._process_tool_call(tool_call, tool_msg_id)
+            return
+
+        jobs = [self._resolve_tool_call(tool_call) for tool_call in tool_calls]
+        outcomes = self._run_in_mcp_loop(gather_tool_calls(jobs, self.max_tool_concurrency, self.tool_timeout))
+        self._record_tool_outcomes(tool_calls, outcomes, query_msg_id)
+
+    async def _arun_tool_calls(self, tool_calls, query_msg_id: str | None) -> None:
+        """Async variant of `_run_tool_calls`; parallel calls are gathered on the running loop."""
+        if self.max_tool_concurrency <= 1 or len(tool_calls) < 2:
+            for tool_call, tool_msg_id in self._record_tool_calls(tool_calls, query_msg_id):
+                await self._aprocess_tool_call(tool_call, tool_msg_id)
+            return
+
+        jobs = [self._resolve_tool_call(tool_call) for tool_call in tool_calls]
+        outcomes = await gather_tool_calls(jobs, self.max_tool_concurrency, self.tool_timeout)
+        self._record_tool_outcomes(tool_calls, outcomes, query_msg_id)
+
+    def _record_tool_outcomes(self, tool_calls, outcomes: list[tuple[bool, Any]], query_msg_id: str | None) -> None:
+        """
+        Record the outputs of concurrently executed tool calls in tool-call order.
+
+        Args:
+            tool_calls: Tool call objects from the LLM response.
+            outcomes (List[Tuple[bool, Any]]): Success flag and output or exception per call.
+            query_msg_id (Optional[str]): ID of the query message of this turn.
+
+        Raises:
+            RuntimeError: At the first failed call, after recording the outputs before it.
+        """
+        for (tool_call, tool_msg_id), (ok, result) in zip(self._record_tool_calls(tool_calls, query_msg_id), outcomes):
+            if not ok:
+                error_msg = f"Tool execution failed: {str(result)}"
+                self.debugger.log(error_msg, level="error")
+                raise RuntimeError(error_msg) from result
+            self._record_tool_response(tool_call, result, tool_msg_id)
 
     def _process_tool_call(self, tool_call, parent_msg_id: str | None = None) -> None:
         """
         Process a single tool call from the chat response.
 
+        Native async tools are run on the agent's background event loop.
+
+        Args:
+            tool_call: A single tool call object (from ChatCompletionMessage.tool_calls).
+            parent_msg_id (Optional[str]): ID of the parent message in history.
+
+        Raises:
+            ValueError: If the specified tool is not found or if there's an error in processing arguments.
+        """
+        target_tool, tool_arguments = self._resolve_tool_call(tool_call)
+        
+        try:
+            tool_feedback = run_tool(target_tool, tool_arguments, self._run_in_mcp_loop, self.tool_timeout)
+            self._record_tool_response(tool_call, tool_feedback, parent_msg_id)
+            
+        except Exception as e:
+            error_msg = f"Tool execution failed: {str(e)}"
+            self.debugger.log(error_msg, level="error")
+            raise RuntimeError(error_msg) from e
+
+    async def _aprocess_tool_call(self, tool_call, parent_msg_id: str | None = None) -> None:
+        """
+        Process a single tool call on the running event loop.
+
+        Tools that provide an awaitable variant under ``async_tool`` (such as
+        MCP proxies and ``async def`` tools) are awaited; plain callables are
+        invoked directly.
+
         Args:
             tool_call: A single tool call object (from ChatCompletionMessage.tool_calls).
             parent_msg_id (Optional[str]): ID of the parent message in history.
@@ -310,6 +723,33 @@ class Agent(AI):
         Raises:
             ValueError: If the specified tool is not found or if there's an error in processing arguments.
         """
+        target_tool, tool_arguments = self._resolve_tool_call(tool_call)
+
+        try:
+            tool_feedback = await arun_tool(target_tool, tool_arguments, default_timeout=self.tool_timeout)
+
+            self._record_tool_response(tool_call, tool_feedback, parent_msg_id)
+
+        except Exception as e:
+            error_msg = f"Tool execution failed: {str(e)}"
+            self.debugger.log(error_msg, level="error")
+            raise RuntimeError(error_msg) from e
+
+    def _resolve_tool_call(self, tool_call) -> tuple[dict[str, Any], dict[str, Any]]:
+        """
+        Look up the tool targeted by a tool call and decode its arguments.
+
+        Args:
+            tool_call: A single tool call object (from ChatCompletionMessage.tool_calls).
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, Any]]: The registered tool dict and the
+                decoded keyword arguments.
+
+        Raises:
+            ValueError: If the tool call is None, its arguments are not valid JSON,
+                or the tool is not registered.
+        """
         if tool_call is None:
             raise ValueError("Tool call is None")
 
@@ -326,228 +766,306 @@ class Agent(AI):
             self.debugger.log(error_msg, level="error")
             raise ValueError(error_msg)
 
-        target_tool = next((tool for tool in self.tools 
-                           if tool['metadata']['function']['name'] == target_tool_name), None)
+        target_tool = self._tool_indexes()[0].get(target_tool_name)
 
         if not target_tool:
             error_msg = f"Tool '{target_tool_name}' not found"
             self.debugger.log(error_msg, level="error")
             raise ValueError(error_msg)
 
-        tool_function = target_tool['tool']
-        
-        try:
-            try:
-                tool_feedback = tool_function(**tool_arguments)
-            except TypeError:
-                tool_feedback = tool_function(tool_arguments)
-                
+        return target_tool, tool_arguments
+
+    def _record_tool_response(self, tool_call, tool_feedback: Any, parent_msg_id: str | None) -> None:
+        """
+        Append a tool's output to chat history and the history manager.
+
+        Outputs served from a tool's result cache are flagged with ``cache_hit``
+        in the history record, timed-out calls with ``timeout``, rejected
+        calls with ``invalid_arguments`` and failed calls with ``tool_error``, so
+        a replay shows whether the tool actually ran.
+
+        Args:
+            tool_call: The tool call that produced the output.
+            tool_feedback (Any): The value returned by the tool.
+            parent_msg_id (Optional[str]): ID of the parent tool-call message in history.
+        """
+        metadata = None
+        if isinstance(tool_feedback, CachedResult):
+            metadata = {'cache_hit': True}
+            self.debugger.log("Tool result served from cache")
+        elif isinstance(tool_feedback, ToolTimeout):
+            metadata = {'timeout': True}
+            self.debugger.log("Tool execution timed out", level="warning")
+        elif isinstance(tool_feedback, InvalidToolArguments):
+            metadata = {'invalid_arguments': True}
+            self.debugger.log(f"Tool arguments rejected: {tool_feedback}", level="warning")
+        elif isinstance(tool_feedback, ToolError):
+            metadata = {'tool_error': True}
+            self.debugger.log(f"Tool call failed: {tool_feedback}", level="warning")
+        else:
             self.debugger.log(f"Tool execution successful")
-            self.debugger.log(f"Tool response: {str(tool_feedback)}")
-            
-            tool_response_msg = {
-                "role": "tool",
-                "content": str(tool_feedback),
-                "tool_call_id": function_call.id
-            }
-            self.chat_history.append(tool_response_msg)
-            
-            if self.history_manager:
-                self.history_manager.append_message(
-                    message=tool_response_msg,
-                    sender_type=EntityType.TOOL,
-                    sender_name=target_tool_name,
-                    parent_id=parent_msg_id,
-                    tool_call_id=function_call.id
-                )
-            
-        except Exception as e:
-            error_msg = f"Tool execution failed: {str(e)}"
-            self.debugger.log(error_msg, level="error")
-            raise RuntimeError(error_msg) from e
+        self.debugger.log(f"Tool response: {str(tool_feedback)}")
+        
+        tool_response_msg = {
+            "role": "tool",
+            "content": str(tool_feedback),
+            "tool_call_id": tool_call.id
+        }
+        self.chat_history.append(tool_response_msg)
+        
+        if self.history_manager:
+            self.history_manager.append_message(
+                message=tool_response_msg,
+                sender_type=EntityType.TOOL,
+                sender_name=tool_call.function.name,
+                parent_id=parent_msg_id,
+                tool_call_id=tool_call.id,
+                metadata=metadata
+            )
 
     def _ensure_mcp_loop(self) -> asyncio.AbstractEventLoop:
-        if self._mcp_loop is not None:
-            return self._mcp_loop
-
-        def _thread_main():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            self._mcp_loop = loop
-            self._mcp_loop_ready.set()
-            try:
-                loop.run_forever()
-            finally:
-                loop.close()
+        """Return the event loop of the shared MCP session manager, which also runs async tools for `chat`."""
+        return get_mcp_manager().loop
 
-        self._mcp_loop_thread = threading.Thread(target=_thread_main, daemon=True)
-        self._mcp_loop_thread.start()
-        self._mcp_loop_ready.wait()
-        return self._mcp_loop
+    def _wait_for_mcp_tools(self) -> None:
+        """
+        Block until MCP tool discovery, if started, has finished.
+
+        Raises:
+            Exception: Any error that aborted the discovery.
+        """
+        if self._mcp_discovery is not None:
+            self._mcp_discovery.result()
+
+    async def _await_mcp_tools(self) -> None:
+        """Await MCP tool discovery, if started, without blocking the running event loop."""
+        if self._mcp_discovery is not None and not self._mcp_discovery.done():
+            await asyncio.wrap_future(self._mcp_discovery)
+        self._wait_for_mcp_tools()
+
+    def mcp_discovery_stats(self) -> dict[str, Any]:
+        """
+        Get the construction time of the agent and the latency of its MCP tool discovery.
+
+        Returns:
+            Dict[str, Any]: The discovery mode, construction_seconds, whether discovery
+                is still pending, discovery_seconds (wall time of the last discovery, None
+                until it finished) and, per server, its latency, tool count, error and
+                source (`"server"` or `"cache"`, see `mcp_catalog_cache`).
+        """
+        pending = self._mcp_discovery is not None and not self._mcp_discovery.done()
+        return {
+            'mode': self.mcp_discovery,
+            'construction_seconds': self.construction_seconds,
+            'pending': pending,
+            'discovery_seconds': None if pending else self._mcp_discovery_seconds,
+            'servers': {label: dict(stats) for label, stats in self._mcp_server_stats.items()},
+        }
 
     def _run_in_mcp_loop(self, coro, timeout=None):
         loop = self._ensure_mcp_loop()
         future = asyncio.run_coroutine_threadsafe(coro, loop)
         return future.result(timeout=timeout)
 
-    async def _a_close_all_mcp_sessions(self):
-        for key, entry in list(self._mcp_sessions.items()):
-            session = entry.get("session")
-            streams = entry.get("streams")
-            ttype = entry.get("type")
-            try:
-                if session is not None:
-                    try:
-                        await session.__aexit__(None, None, None)
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-            try:
-                if streams is not None:
-                    if ttype == "stdio":
-                        try:
-                            await stdio_client.__aexit__(streams, None, None, None)
-                        except Exception:
-                            try:
-                                stdio, write = streams
-                                try:
-                                    stdio.close()
-                                except Exception:
-                                    pass
-                                try:
-                                    write.close()
-                                except Exception:
-                                    pass
-                            except Exception:
-                                pass
-                    else:
-                        try:
-                            await sse_client.__aexit__(streams, None, None, None)
-                        except Exception:
-                            try:
-                                reader, writer = streams
-                                try:
-                                    writer.close()
-                                    await writer.wait_closed()
-                                except Exception:
-                                    pass
-                                try:
-                                    reader.close()
-                                except Exception:
-                                    pass
-                            except Exception:
-                                pass
-            except Exception:
-                pass
+    async def _arun_in_mcp_loop(self, coro):
+        """Await a coroutine scheduled on the MCP loop without blocking the caller's loop."""
+        loop = self._ensure_mcp_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def close(self) -> None:
+        """
+        Release the agent's MCP sessions and remove its MCP tools.
+
+        Sessions are shared by every agent configured with the same server and
+        closed when the last of them releases it. Agents that are garbage
+        collected release their sessions as well.
+        """
+        if self._mcp_discovery is not None:
+            concurrent.futures.wait([self._mcp_discovery])
+        for task in list(self._mcp_pending.values()):
+            task.get_loop().call_soon_threadsafe(task.cancel)
         self._mcp_sessions.clear()
+        release_leases(self._mcp_leases)
+        self._remove_all_mcp_tools()
 
-    async def _load_mcp_tools(self):
+    async def _load_mcp_tools(self, refresh: bool = False):
         """
         Discover and register tools from all MCP servers configured in self.mcp_servers.
 
-        This method connects to each specified MCP server using the configured transport
-        (either "sse" or "stdio"), retrieves the available tools, converts their schemas
-        to OpenAI-compatible format, and registers proxy functions for each tool. It
+        This method connects to the specified MCP servers concurrently using the configured
+        transport (either "sse" or "stdio"), retrieves the available tools, converts their
+        schemas to OpenAI-compatible format, and registers proxy functions for each tool. It
         removes any previously loaded MCP tools before loading new ones. Sessions are
-        kept open in a persistent cache so subsequent tool calls don't reconnect.
+        leased from the shared `McpSessionManager`, so agents using the same server share
+        one connection and subsequent tool calls don't reconnect. Runs on the manager's
+        event loop, which owns the sessions.
 
-        Raises:
-            ValueError: If an unknown transport type is encountered in the MCP server config.
-            Exception: For any network, process, or protocol-level error during tool discovery.
+        Args:
+            refresh (bool): List the tools of already open sessions again.
+
+        Servers that cannot be reached are logged and skipped; the discovery latency of
+        each server is recorded (see `mcp_discovery_stats`).
         """
-        await self._a_close_all_mcp_sessions()
+        started = time.perf_counter()
+        # New leases are taken before the old ones are returned, so sessions stay open.
+        previous = list(self._mcp_leases)
+        self._mcp_leases.clear()
+        self._mcp_sessions.clear()
         self._remove_all_mcp_tools()
-        self._mcp_tool_names = set()
-        for server in self.mcp_servers:
-            ttype = server.get("type", "sse")  # default to sse
-            try:
-                if ttype == "sse":
-                    url = server["url"]
-                    auth_token = server.get("auth_token")
-                    endpoint = url  # Use the user-supplied URL exactly as written
-                    headers = {"Authorization": f"Bearer {auth_token}"} if auth_token else {}
-                    streams = await sse_client(endpoint, headers=headers).__aenter__()
-                    session = ClientSession(*streams)
-                    await session.__aenter__()
-                    try:
-                        await session.initialize()
-                        key = f"{ttype}:{url}::{auth_token or ''}"
-                        self._mcp_sessions[key] = {"session": session, "streams": streams, "type": ttype}
-                        ntools_resp = await session.list_tools()
-                        ntools = ntools_resp.tools
-                        for tool in ntools:
-                            openai_tool_meta = self._convert_mcp_tool_to_openai(tool)
-                            tname = openai_tool_meta["function"]["name"]
-                            proxy = self._build_mcp_tool_proxy(
-                                transport_type="sse",
-                                conf={"url": url, "auth_token": auth_token, "_session_key": key},
-                                tool_name=tname
-                            )
-                            tool_dict = {
-                                "tool": proxy,
-                                "metadata": openai_tool_meta,
-                                "_mcp_tool": True
-                            }
-                            self.tools.append(tool_dict)
-                            self._mcp_tool_names.add(tname)
-                    except Exception:
-                        try:
-                            await session.__aexit__(None, None, None)
-                        except Exception:
-                            pass
-                        try:
-                            await sse_client.__aexit__(streams, None, None, None)
-                        except Exception:
-                            pass
-                        raise
-                elif ttype == "stdio":
-                    script_path = server["script_path"]
-                    server_params = StdioServerParameters(
-                        command="python",
-                        args=[script_path],
-                        env=None
-                    )
-                    streams = await stdio_client(server_params).__aenter__()
-                    stdio, write = streams
-                    session = ClientSession(stdio, write)
-                    await session.__aenter__()
-                    try:
-                        await session.initialize()
-                        key = f"{ttype}:{script_path}"
-                        self._mcp_sessions[key] = {"session": session, "streams": streams, "type": ttype}
-                        ntools_resp = await session.list_tools()
-                        ntools = ntools_resp.tools
-                        for tool in ntools:
-                            openai_tool_meta = self._convert_mcp_tool_to_openai(tool)
-                            tname = openai_tool_meta["function"]["name"]
-                            proxy = self._build_mcp_tool_proxy(
-                                transport_type="stdio",
-                                conf={"script_path": script_path, "_session_key": key},
-                                tool_name=tname
-                            )
-                            tool_dict = {
-                                "tool": proxy,
-                                "metadata": openai_tool_meta,
-                                "_mcp_tool": True
-                            }
-                            self.tools.append(tool_dict)
-                            self._mcp_tool_names.add(tname)
-                    except Exception:
-                        try:
-                            await session.__aexit__(None, None, None)
-                        except Exception:
-                            pass
-                        try:
-                            await stdio_client.__aexit__((stdio, write), None, None, None)
-                        except Exception:
-                            pass
-                        raise
-                else:
-                    raise ValueError(f"[MCP] Unknown transport type: {ttype}")
-            except Exception as e:
-                logger.warning(f"[MCP] Error loading tools from {server}: {e}")
-        self.tools_metadata = [tool['metadata'] for tool in self.tools]
+        self._mcp_server_stats = {}
+        discovered = await asyncio.gather(*(self._discover_mcp_server(server, refresh)
+                                            for server in self.mcp_servers))
+        release_leases(previous)
+        mcp_tools = [tool for server_tools in discovered for tool in server_tools]
+        # Swap the tool list in one step, so concurrent readers never see a partial set.
+        self.tools = self.tools + mcp_tools
+        self._mcp_tool_names = {tool["metadata"]["function"]["name"] for tool in mcp_tools}
+        self._rebuild_tool_index()
+        self._mcp_discovery_seconds = time.perf_counter() - started
+
+    async def _discover_mcp_server(self, server: dict[str, Any], refresh: bool = False) -> list[dict[str, Any]]:
+        """
+        Lease the shared session of one MCP server and build its tool dicts.
+
+        With a tool catalog cache, cached tools are returned without waiting for the
+        server; the session is leased and the catalog revalidated in the background.
+
+        Args:
+            server (Dict[str, Any]): The MCP server configuration.
+            refresh (bool): List the tools of an already open session again, bypassing
+                the catalog cache.
+
+        Returns:
+            List[Dict[str, Any]]: The server's tools; empty if it could not be reached.
+        """
+        ttype = server.get("type", "sse")  # default to sse
+        label = f"{ttype}:{server.get('url') or server.get('script_path')}"
+        started = time.perf_counter()
+        tools: list[dict[str, Any]] = []
+        error = None
+        source = "server"
+        try:
+            key = server_key(server)
+            cached = self._mcp_catalog.get(key) if self._mcp_catalog is not None and not refresh else None
+            if cached is not None:
+                source = "cache"
+                task = asyncio.ensure_future(self._revalidate_mcp_catalog(server, key, label, cached))
+                # Connection errors are logged by the task and raised to waiting tool calls.
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self._mcp_pending[key] = task
+                metadata = cached
+            else:
+                connection = await self._lease_mcp_session(server, refresh)
+                metadata = [self._convert_mcp_tool_to_openai(tool) for tool in connection.tools]
+                if self._mcp_catalog is not None:
+                    self._mcp_catalog.put(key, label, metadata)
+            tools = [self._mcp_tool_from_metadata(server, key, meta) for meta in metadata]
+        except Exception as e:
+            error = str(e)
+            tools = []
+            logger.warning(f"[MCP] Error loading tools from {server}: {e}")
+        seconds = time.perf_counter() - started
+        self._mcp_server_stats[label] = {"seconds": seconds, "tools": len(tools), "error": error, "source": source}
+        logger.debug(f"[MCP] Discovered {len(tools)} tools from {label} ({source}) in {seconds:.3f}s")
+        return tools
+
+    async def _lease_mcp_session(self, server: dict[str, Any], refresh: bool = False) -> McpConnection:
+        """Lease the shared session of a server and make it available to the agent's proxies."""
+        connection = await get_mcp_manager().acquire(server, refresh=refresh)
+        self._mcp_leases.append(connection.key)
+        self._mcp_sessions[connection.key] = connection
+        return connection
+
+    async def _revalidate_mcp_catalog(self,
+                                      server: dict[str, Any],
+                                      key: str,
+                                      label: str,
+                                      cached: list[dict[str, Any]]) -> McpConnection:
+        """
+        Connect to a server registered from the catalog cache and apply tool changes.
+
+        Tool calls made before the connection is ready wait for this task.
+
+        Args:
+            server (Dict[str, Any]): The MCP server configuration.
+            key (str): The server identity.
+            label (str): Server description for the catalog and logs.
+            cached (List[Dict[str, Any]]): The tools registered from the cache.
+
+        Returns:
+            McpConnection: The leased session.
+        """
+        try:
+            connection = await self._lease_mcp_session(server)
+        except Exception as e:
+            logger.warning(f"[MCP] Error connecting to {label}: {e}")
+            raise
+        finally:
+            self._mcp_pending.pop(key, None)
+        metadata = [self._convert_mcp_tool_to_openai(tool) for tool in connection.tools]
+        if catalog_hash(metadata) != catalog_hash(cached):
+            logger.info(f"[MCP] Tools of {label} changed; updating the catalog")
+            self._mcp_catalog.put(key, label, metadata)
+            tools = [self._mcp_tool_from_metadata(server, key, meta) for meta in metadata]
+            self.tools = [t for t in self.tools if not (t.get('_mcp_tool') and t.get('_namespace') == key)] + tools
+            self._mcp_tool_names = {t["metadata"]["function"]["name"] for t in self.tools if t.get('_mcp_tool')}
+            self._rebuild_tool_index()
+        return connection
+
+    def _mcp_tool_from_metadata(self, server: dict[str, Any], key: str, metadata: dict[str, Any]) -> dict[str, Any]:
+        """Build the tool dict of one MCP tool from its OpenAI schema."""
+        if server.get("type", "sse") == "sse":
+            conf = {"url": server["url"], "auth_token": server.get("auth_token")}
+        else:
+            conf = {"script_path": server["script_path"]}
+        proxy = self._build_mcp_tool_proxy(
+            transport_type=server.get("type", "sse"),
+            conf={**conf, "_session_key": key},
+            tool_name=metadata["function"]["name"]
+        )
+        return self._mcp_tool_dict(server, key, proxy, metadata)
+
+    @staticmethod
+    def _mcp_tool_dict(server: dict[str, Any], session_key: str, proxy: Callable,
+                       metadata: dict[str, Any]) -> dict[str, Any]:
+        """
+        Build the tool dict registering an MCP tool proxy.
+
+        A server's ``timeout`` and ``max_concurrency`` settings apply to each of
+        its tools. Its ``cache`` setting (as for Python tools) enables the tool
+        result cache for its tools, or only for those listed under its ``tools``
+        key. Cache entries and limiters are namespaced by server, so equal tool
+        names do not collide.
+
+        Args:
+            server (Dict[str, Any]): The MCP server configuration.
+            session_key (str): Key of the server's persistent session.
+            proxy (Callable): The proxy built by `_build_mcp_tool_proxy`.
+            metadata (Dict[str, Any]): The tool schema in OpenAI format.
+
+        Returns:
+            Dict[str, Any]: The tool dict.
+        """
+        tool_dict = {
+            "tool": proxy,
+            "async_tool": proxy.async_proxy,
+            "metadata": metadata,
+            "_mcp_tool": True,
+            "_namespace": session_key
+        }
+        for setting in ("timeout", "max_concurrency"):
+            if server.get(setting) is not None:
+                tool_dict[setting] = server[setting]
+        cache = server.get("cache")
+        if isinstance(cache, dict) and "tools" in cache:
+            if metadata["function"]["name"] not in cache["tools"]:
+                return tool_dict
+            cache = {k: v for k, v in cache.items() if k != "tools"} or True
+        if cache:
+            tool_dict["cache"] = cache
+        return tool_dict
 
     def _convert_mcp_tool_to_openai(self, tool) -> dict[str, Any]:
         """
@@ -592,8 +1110,8 @@ class Agent(AI):
         """
         Create a synchronous Python proxy function for invoking an MCP tool.
 
-        Uses a persistent session (kept alive in a background asyncio event loop
-        on a dedicated thread) so repeated tool calls reuse the same transport
+        Uses the shared persistent session (kept alive on the event loop of the
+        `McpSessionManager`) so repeated tool calls reuse the same transport
         and ClientSession rather than reconnecting + re-initializing each call.
 
         Args:
@@ -604,35 +1122,102 @@ class Agent(AI):
 
         Returns:
             Callable: A Python function that accepts keyword arguments and
-                returns the tool's result. Uses the persistent session stored
-                under the `_session_key` in `self._mcp_sessions`.
+                returns the tool's result, or a `ToolError` (which is not cached)
+                if the call failed. Uses the persistent session stored
+                under the `_session_key` in `self._mcp_sessions`. An awaitable
+                variant for the async chat path is attached as `async_proxy`.
         """
         session_key = conf.get("_session_key")
 
+        async def _call_with_session(kwargs):
+            connection = self._mcp_sessions.get(session_key)
+            if connection is None and session_key in self._mcp_pending:
+                # Registered from the catalog cache; wait for the connection.
+                connection = await asyncio.shield(self._mcp_pending[session_key])
+            session = connection.session if connection is not None else None
+            if session is None:
+                raise RuntimeError(
+                    f"[MCP] Persistent session for key {session_key!r} not available"
+                )
+            with record_request_ids() as request_ids:
+                try:
+                    result = await session.call_tool(tool_name, arguments=kwargs)
+                except asyncio.CancelledError:
+                    await self._notify_mcp_cancelled(session, request_ids[-1] if request_ids else None, tool_name)
+                    raise
+            if hasattr(result, "content") and result.content:
+                output = result.content[0].text
+            else:
+                output = str(result)
+            # Errors reported by the server are returned to the model, but never cached.
+            return ToolError(output) if getattr(result, "isError", False) else output
+
         def proxy(**kwargs):
-            async def _call_with_session():
-                entry = self._mcp_sessions.get(session_key)
-                if entry is None:
-                    raise RuntimeError(
-                        f"[MCP] Persistent session for key {session_key!r} not available"
-                    )
-                session = entry["session"]
-                result = await session.call_tool(tool_name, arguments=kwargs)
-                if hasattr(result, "content") and result.content:
-                    return result.content[0].text
-                return str(result)
             try:
-                return self._run_in_mcp_loop(_call_with_session())
+                return self._run_in_mcp_loop(_call_with_session(kwargs))
+            except Exception as e:
+                return ToolError(f"[MCP] Tool '{tool_name}' call failed: {e}")
+
+        async def async_proxy(**kwargs):
+            try:
+                return await self._arun_in_mcp_loop(_call_with_session(kwargs))
             except Exception as e:
-                return f"[MCP] Tool '{tool_name}' call failed: {e}"
+                return ToolError(f"[MCP] Tool '{tool_name}' call failed: {e}")
+
+        proxy.async_proxy = async_proxy
         return proxy
 
+    @staticmethod
+    async def _notify_mcp_cancelled(session: ClientSession, request_id: Any, tool_name: str) -> None:
+        """
+        Tell an MCP server that a tool call was cancelled (e.g. on timeout), so it can stop working on it.
+
+        Args:
+            session (ClientSession): The session the call was sent on.
+            request_id (Any): JSON-RPC id of the cancelled request.
+            tool_name (str): Name of the tool, for the cancellation reason.
+        """
+        if request_id is None:
+            return
+        try:
+            await session.send_notification(mcp_types.ClientNotification(mcp_types.CancelledNotification(
+                params=mcp_types.CancelledNotificationParams(
+                    requestId=request_id, reason=f"Call to tool '{tool_name}' was cancelled by the client")
+            )))
+        except Exception as e:
+            logger.debug(f"[MCP] Could not send cancellation for {tool_name}: {e}")
+
     def _remove_all_mcp_tools(self):
         """
         Removes all tools loaded from MCP servers from self.tools.
         """
         self.tools = [t for t in self.tools if not t.get('_mcp_tool', False)]
         self._mcp_tool_names = set()
+        self._rebuild_tool_index()
+
+    def _rebuild_tool_index(self) -> None:
+        """
+        Rebuild the name-to-tool index and the tools metadata list sent with requests.
+
+        Called whenever the tool set changes (construction and MCP tool loading or
+        removal), so tool dispatch and request building do not scan `self.tools`.
+        New tools are checked for native async functions here (see `prepare_tool`).
+        """
+        index: dict[str, dict[str, Any]] = {}
+        for tool in self.tools:
+            prepare_tool(tool)
+            # The first tool registered under a name wins, as with a linear scan.
+            index.setdefault(tool['metadata']['function']['name'], tool)
+        self._tool_index = index
+        self.tools_metadata = [tool['metadata'] for tool in self.tools]
+        self._indexed_tools = (self.tools, len(self.tools))
+
+    def _tool_indexes(self) -> tuple[dict[str, dict[str, Any]], list[dict[str, Any]]]:
+        """Return the tool index and metadata list, rebuilding them if `self.tools` was replaced or resized."""
+        indexed, size = self._indexed_tools
+        if indexed is not self.tools or size != len(self.tools):
+            self._rebuild_tool_index()
+        return self._tool_index, self.tools_metadata
         
     def get_chat_history(self) -> list[dict[str, str]]:
         """
@@ -649,16 +1234,19 @@ class Agent(AI):
 
         This method removes all previously registered MCP tools, re-connects to all configured
         MCP servers, and loads the updated tool lists into the agent. Call this method if you
-        add, remove, or update tools on any MCP server during runtime. Runs on the persistent
-        background MCP loop so sessions stay bound to the owning event loop.
+        add, remove, or update tools on any MCP server during runtime. Open sessions are
+        reused and asked for their tools again. Runs on the shared MCP loop so sessions
+        stay bound to the owning event loop, after any discovery still running in the
+        background.
 
         Raises:
             Exception: For any underlying error in the discovery or registration process.
         """
-        if self._mcp_loop is not None:
-            self._run_in_mcp_loop(self._load_mcp_tools())
-        else:
-            asyncio.run(self._load_mcp_tools())
+        if self._mcp_discovery is not None:
+            concurrent.futures.wait([self._mcp_discovery])
+        self._mcp_discovery = asyncio.run_coroutine_threadsafe(self._load_mcp_tools(refresh=True),
+                                                               self._ensure_mcp_loop())
+        self._wait_for_mcp_tools()
         
     def _reset_chat_history(self) -> None:
         """Reset chat history to initial state (system message only)."""
@@ -1,12 +1,22 @@
 """
 AI module for handling interactions with OpenAI's API.
 
-This module provides a base AI class for generating responses using OpenAI's chat completions.
+This module provides a base AI class for generating responses using OpenAI's chat completions,
+along with an AsyncAI variant for asyncio applications.
 """
 
+import asyncio
+import time
 import openai 
-from typing import Any
-from openai.types.chat import ChatCompletion 
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Iterator, AsyncIterator
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from primisai.nexus.core.client_pool import client_pool, DEFAULT_BASE_URL
+from primisai.nexus.core.response_cache import get_response_cache, request_fingerprint
+from primisai.nexus.core.coalescing import single_flight
+from primisai.nexus.core.prompt_cache import PromptCachePolicy, PromptCacheStats
+from primisai.nexus.core.rate_limiter import estimate_tokens, get_rate_limiter, retry_after_seconds
+from primisai.nexus.core.retry import HedgePolicy, RetryPolicy, get_latency_tracker, hedge_executor
 
 # OpenAI SDK v2 detection helper (used ONLY if the upper bound pin is lifted).
 # guard so the moment someone tries `openai>=2` they get a helpful ImportError
@@ -29,6 +39,28 @@ try:
 except Exception:
     pass
 
+# llm_config keys that configure Nexus itself rather than the completion request.
+_NON_REQUEST_KEYS = ('api_key', 'base_url', 'client', 'cache', 'rate_limit', 'retry', 'hedge', 'coalesce',
+                     'prompt_cache')
+
+# Status codes retried without shrinking the concurrency limit (as the openai SDK does).
+_RETRYABLE_STATUS_CODES = (408, 409)
+
+
+def _classify_error(error: openai.OpenAIError) -> tuple[str, bool]:
+    """Return the rate-limiter outcome for a failed request and whether it may be retried."""
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code == 429 or error.status_code >= 500:
+            return 'throttled', True
+        return 'error', error.status_code in _RETRYABLE_STATUS_CODES
+    return 'error', isinstance(error, openai.APIConnectionError)
+
+
+def _usage_tokens(response: Any) -> int | None:
+    """Return the total tokens reported by a completion, if any."""
+    usage = getattr(response, 'usage', None)
+    return getattr(usage, 'total_tokens', None)
+
 
 class AI:
     """
@@ -44,7 +76,13 @@ class AI:
 
         Args:
             llm_config (Dict[str, str]): Configuration for the language model.
-                Must contain 'api_key' and 'model'. May optionally include 'base_url' and 'temperature'.
+                Must contain 'api_key' and 'model'. May optionally include 'base_url', 'temperature'
+                a 'client' section with connection pool settings (see `client_pool`), a
+                'cache' section enabling the response cache (see `response_cache`), a
+                'rate_limit' section for the shared per-model limiter (see `rate_limiter`) and
+                'retry' and 'hedge' sections for retries and hedged requests (see `retry`).
+                Identical concurrent requests are coalesced if 'coalesce' is True. A
+                'prompt_cache' section keeps request prefixes stable (see `prompt_cache`).
 
         Raises:
             ValueError: If required configuration keys are missing or if tools are enabled but not provided.
@@ -53,10 +91,253 @@ class AI:
             raise ValueError("llm_config must contain 'api_key' and 'model'")
 
         self.llm_config = llm_config
-        self.client = openai.OpenAI(
-            base_url=llm_config.get('base_url', 'https://api.openai.com/v1'),
-            api_key=llm_config['api_key']
-        )
+        self.client = client_pool.get_client(llm_config)
+        self.response_cache = get_response_cache(llm_config.get('cache'))
+        base_url = llm_config.get('base_url') or DEFAULT_BASE_URL
+        self.rate_limiter = get_rate_limiter(base_url, llm_config['model'], llm_config.get('rate_limit'))
+        self.retry_policy = RetryPolicy(llm_config.get('retry'))
+        self.hedge_policy = HedgePolicy(llm_config.get('hedge'))
+        self.latency_tracker = get_latency_tracker(base_url, llm_config['model'])
+        # Opt-in: with sampling, concurrent callers would otherwise share one answer.
+        self.coalesce = bool(llm_config.get('coalesce', False))
+        self.prompt_cache = PromptCachePolicy(llm_config.get('prompt_cache'), base_url)
+        self.prompt_cache_stats = PromptCacheStats()
+
+    @property
+    def async_client(self) -> openai.AsyncOpenAI:
+        """
+        The asyncio OpenAI client bound to the currently running event loop.
+
+        Clients come from the shared client pool, which keeps one client per
+        endpoint and event loop since httpx connection pools cannot be shared
+        between loops (e.g. across separate ``asyncio.run`` calls).
+
+        Returns:
+            openai.AsyncOpenAI: Client usable from the running event loop.
+        """
+        return client_pool.get_async_client(self.llm_config)
+
+    def _build_request_params(self,
+                              messages: list[dict[str, str]],
+                              tools: list[dict[str, Any]] | None = None,
+                              use_tools: bool = False) -> dict[str, Any]:
+        """
+        Build the keyword arguments for a chat completion request.
+
+        Args:
+            messages (List[Dict[str, str]]): List of conversation messages.
+            tools (Optional[List[Dict[str, Any]]]): List of tools for function calling.
+            use_tools (bool): Whether to use function calling with tools.
+
+        Returns:
+            Dict[str, Any]: Parameters for ``chat.completions.create``.
+
+        Raises:
+            ValueError: If tools are requested but not provided.
+        """
+        if use_tools and not tools:
+            raise ValueError("Tools must be provided when use_tools is True")
+
+        params = self.llm_config.copy()
+
+        for key in _NON_REQUEST_KEYS:
+            params.pop(key, None)
+
+        params['messages'] = messages
+
+        if use_tools:
+            params['tools'] = self.prompt_cache.freeze_tools(tools) if self.prompt_cache.enabled else tools
+            params['tool_choice'] = 'auto'
+
+        extra_body = dict(params.get('extra_body') or {})
+        if self.prompt_cache.send_key and 'prompt_cache_key' not in params and 'prompt_cache_key' not in extra_body:
+            # Sent in the body rather than as a keyword, which older openai releases reject.
+            extra_body['prompt_cache_key'] = self.prompt_cache.cache_key(params['model'], messages, params.get('tools'))
+            params['extra_body'] = extra_body
+
+        return params
+
+    def _fingerprint(self, params: dict[str, Any]) -> str | None:
+        """Return the cache/coalescing key of a request, or None if neither is enabled."""
+        if self.response_cache is None and not self.coalesce:
+            return None
+        return request_fingerprint(params, namespace=self.llm_config.get('base_url') or DEFAULT_BASE_URL)
+
+    def _cache_lookup(self, cache_key: str | None) -> ChatCompletion | None:
+        """Return a cached completion for `cache_key`, if any."""
+        if cache_key is None or self.response_cache is None:
+            return None
+        payload = self.response_cache.get(cache_key)
+        if payload is None:
+            return None
+        return ChatCompletion.model_validate_json(payload)
+
+    def _cache_store(self, cache_key: str | None, response: ChatCompletion) -> None:
+        """Store a completion in the response cache if caching is enabled."""
+        if cache_key is not None and self.response_cache is not None:
+            self.response_cache.set(cache_key, response.model_dump_json())
+
+    def _attempt(self, create: Any, params: dict[str, Any], estimated: int) -> Any:
+        """Send a single request holding a rate-limiter slot; the slot is released on failure."""
+        self.rate_limiter.acquire(estimated)
+        try:
+            return create(**params)
+        except BaseException as e:
+            outcome = _classify_error(e)[0] if isinstance(e, openai.OpenAIError) else 'error'
+            self.rate_limiter.release(outcome, retry_after_seconds(e), estimated)
+            raise
+
+    async def _aattempt(self, create: Any, params: dict[str, Any], estimated: int) -> Any:
+        """Async variant of `_attempt`; also releases the slot when cancelled."""
+        await self.rate_limiter.aacquire(estimated)
+        try:
+            return await create(**params)
+        except BaseException as e:
+            outcome = _classify_error(e)[0] if isinstance(e, openai.OpenAIError) else 'error'
+            self.rate_limiter.release(outcome, retry_after_seconds(e), estimated)
+            raise
+
+    def _release_abandoned(self, estimated: int) -> Callable[[Future], None]:
+        """Build a done-callback releasing the slot of a hedged request whose answer was not used."""
+
+        def release(future: Future) -> None:
+            if not future.cancelled() and future.exception() is None:
+                self.rate_limiter.release(estimated_tokens=estimated)
+
+        return release
+
+    def _hedged_attempt(self, create: Any, params: dict[str, Any], estimated: int, delay: float) -> Any:
+        """
+        Send a request and fire a duplicate if no answer arrives within `delay` seconds.
+
+        The first successful response wins. A sync HTTP request cannot be
+        interrupted from another thread, so the losing request is abandoned and
+        its limiter slot released once it completes (right away if it already
+        has, e.g. when both requests finish together).
+        """
+        executor = hedge_executor()
+        primary = executor.submit(self._attempt, create, params, estimated)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        self.latency_tracker.count('hedged')
+        hedge = executor.submit(self._attempt, create, params, estimated)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in {primary, hedge} - {future}:
+                        if not loser.cancel():
+                            # Runs at once if the loser has already completed.
+                            loser.add_done_callback(self._release_abandoned(estimated))
+                    if future is hedge:
+                        self.latency_tracker.count('hedge_wins')
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _ahedged_attempt(self, create: Any, params: dict[str, Any], estimated: int, delay: float) -> Any:
+        """
+        Async variant of `_hedged_attempt`; the losing request is cancelled, or its
+        slot released if it completed together with the winner.
+        """
+        primary = asyncio.ensure_future(self._aattempt(create, params, estimated))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        self.latency_tracker.count('hedged')
+        hedge = asyncio.ensure_future(self._aattempt(create, params, estimated))
+        pending = {primary, hedge}
+        winner = error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is hedge:
+                            self.latency_tracker.count('hedge_wins')
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for task in {primary, hedge} - {winner}:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    self.rate_limiter.release(estimated_tokens=estimated)
+        raise error
+
+    def _create(self, create: Any, params: dict[str, Any], stream: bool = False) -> tuple[Any, int]:
+        """
+        Send a request through the rate limiter, with retries and optional hedging.
+
+        Transient failures (429, 5xx, 408/409 and connection errors) are retried
+        according to the retry policy. Non-streaming requests record their
+        latency and are hedged when the hedge policy is enabled. The limiter slot
+        is still held on return; callers release it once the response (or
+        stream) has been consumed.
+
+        Args:
+            create (Callable): The ``chat.completions.create`` method to call.
+            params (Dict[str, Any]): Request parameters.
+            stream (bool): Whether this is a streaming request.
+
+        Returns:
+            Tuple[Any, int]: The API response and the tokens reserved for it.
+
+        Raises:
+            openai.OpenAIError: If the request fails and retries are exhausted.
+        """
+        estimated = estimate_tokens(params) if self.rate_limiter.tracks_tokens else 0
+        attempt = 0
+        while True:
+            hedge_delay = None if stream else self.hedge_policy.delay(self.latency_tracker)
+            started = time.monotonic()
+            try:
+                if hedge_delay is None:
+                    response = self._attempt(create, params, estimated)
+                else:
+                    response = self._hedged_attempt(create, params, estimated, hedge_delay)
+            except openai.OpenAIError as e:
+                if not _classify_error(e)[1] or attempt >= self.retry_policy.max_retries:
+                    raise
+                attempt += 1
+                self.latency_tracker.count('retries')
+                # With a Retry-After header the rate limiter already pauses the next attempt.
+                if retry_after_seconds(e) is None:
+                    time.sleep(self.retry_policy.delay(attempt))
+                continue
+            if not stream:
+                self.latency_tracker.record(time.monotonic() - started)
+            return response, estimated
+
+    async def _acreate(self, create: Any, params: dict[str, Any], stream: bool = False) -> tuple[Any, int]:
+        """Async variant of `_create`; `create` is the async client's method."""
+        estimated = estimate_tokens(params) if self.rate_limiter.tracks_tokens else 0
+        attempt = 0
+        while True:
+            hedge_delay = None if stream else self.hedge_policy.delay(self.latency_tracker)
+            started = time.monotonic()
+            try:
+                if hedge_delay is None:
+                    response = await self._aattempt(create, params, estimated)
+                else:
+                    response = await self._ahedged_attempt(create, params, estimated, hedge_delay)
+            except openai.OpenAIError as e:
+                if not _classify_error(e)[1] or attempt >= self.retry_policy.max_retries:
+                    raise
+                attempt += 1
+                self.latency_tracker.count('retries')
+                if retry_after_seconds(e) is None:
+                    await asyncio.sleep(self.retry_policy.delay(attempt))
+                continue
+            if not stream:
+                self.latency_tracker.record(time.monotonic() - started)
+            return response, estimated
 
     def generate_response(self,
                           messages: list[dict[str, str]],
@@ -77,26 +358,156 @@ class AI:
             openai.OpenAIError: If there's an error in the API call.
             ValueError: If tools are requested but not provided.
         """
-        if use_tools and not tools:
-            raise ValueError("Tools must be provided when use_tools is True")
+        params = self._build_request_params(messages, tools, use_tools)
+        fingerprint = self._fingerprint(params)
+        cached = self._cache_lookup(fingerprint)
+        if cached is not None:
+            return cached
+
+        def complete() -> ChatCompletion:
+            response, estimated = self._create(self.client.chat.completions.create, params)
+            self.rate_limiter.release(estimated_tokens=estimated, actual_tokens=_usage_tokens(response))
+            self.prompt_cache_stats.record(getattr(response, 'usage', None))
+            self._cache_store(fingerprint, response)
+            return response
 
         try:
-            params = self.llm_config.copy()
+            if not self.coalesce:
+                return complete()
+            response, shared = single_flight.do(fingerprint, complete)
 
-            params.pop('api_key', None)
-            params.pop('base_url', None)
+        except openai.OpenAIError as e:
+            raise openai.OpenAIError(f"Chat completion failed: {str(e)}")
 
-            params['messages'] = messages
+        return response.model_copy(deep=True) if shared else response
 
-            if use_tools:
-                params['tools'] = tools
-                params['tool_choice'] = 'auto'
+    async def agenerate_response(self,
+                                 messages: list[dict[str, str]],
+                                 tools: list[dict[str, Any]] | None = None,
+                                 use_tools: bool = False) -> ChatCompletion:
+        """
+        Execute a chat completion without blocking the running event loop.
 
-            return self.client.chat.completions.create(**params)
+        Args:
+            messages (List[Dict[str, str]]): List of conversation messages.
+            tools (Optional[List[Dict[str, Any]]]): List of tools for function calling.
+            use_tools (bool): Whether to use function calling with tools.
+
+        Returns:
+            ChatCompletion: The response from the OpenAI API.
+
+        Raises:
+            openai.OpenAIError: If there's an error in the API call.
+            ValueError: If tools are requested but not provided.
+        """
+        params = self._build_request_params(messages, tools, use_tools)
+        fingerprint = self._fingerprint(params)
+        cached = self._cache_lookup(fingerprint)
+        if cached is not None:
+            return cached
+
+        async def complete() -> ChatCompletion:
+            response, estimated = await self._acreate(self.async_client.chat.completions.create, params)
+            self.rate_limiter.release(estimated_tokens=estimated, actual_tokens=_usage_tokens(response))
+            self.prompt_cache_stats.record(getattr(response, 'usage', None))
+            self._cache_store(fingerprint, response)
+            return response
+
+        try:
+            if not self.coalesce:
+                return await complete()
+            response, shared = await single_flight.ado(fingerprint, complete)
+
+        except openai.OpenAIError as e:
+            raise openai.OpenAIError(f"Chat completion failed: {str(e)}")
+
+        return response.model_copy(deep=True) if shared else response
+
+    def stream_response(self,
+                        messages: list[dict[str, str]],
+                        tools: list[dict[str, Any]] | None = None,
+                        use_tools: bool = False) -> Iterator[ChatCompletionChunk]:
+        """
+        Execute a streaming chat completion.
+
+        Args:
+            messages (List[Dict[str, str]]): List of conversation messages.
+            tools (Optional[List[Dict[str, Any]]]): List of tools for function calling.
+            use_tools (bool): Whether to use function calling with tools.
+
+        Yields:
+            ChatCompletionChunk: Chunks as they arrive from the OpenAI API. Use a
+                `StreamAccumulator` to rebuild the complete message.
+
+        Raises:
+            openai.OpenAIError: If there's an error in the API call.
+            ValueError: If tools are requested but not provided.
+        """
+        params = self._build_request_params(messages, tools, use_tools)
+        params['stream'] = True
+        if self.prompt_cache.send_key:
+            params.setdefault('stream_options', {'include_usage': True})
+
+        try:
+            stream, estimated = self._create(self.client.chat.completions.create, params, stream=True)
+        except openai.OpenAIError as e:
+            raise openai.OpenAIError(f"Chat completion failed: {str(e)}")
+
+        outcome = 'error'
+        try:
+            for chunk in stream:
+                self.prompt_cache_stats.record(getattr(chunk, 'usage', None))
+                yield chunk
+            outcome = 'success'
+
+        except openai.OpenAIError as e:
+            raise openai.OpenAIError(f"Chat completion failed: {str(e)}")
+
+        finally:
+            self.rate_limiter.release(outcome, estimated_tokens=estimated)
+
+    async def astream_response(self,
+                               messages: list[dict[str, str]],
+                               tools: list[dict[str, Any]] | None = None,
+                               use_tools: bool = False) -> AsyncIterator[ChatCompletionChunk]:
+        """
+        Execute a streaming chat completion without blocking the running event loop.
+
+        Args:
+            messages (List[Dict[str, str]]): List of conversation messages.
+            tools (Optional[List[Dict[str, Any]]]): List of tools for function calling.
+            use_tools (bool): Whether to use function calling with tools.
+
+        Yields:
+            ChatCompletionChunk: Chunks as they arrive from the OpenAI API.
+
+        Raises:
+            openai.OpenAIError: If there's an error in the API call.
+            ValueError: If tools are requested but not provided.
+        """
+        params = self._build_request_params(messages, tools, use_tools)
+        params['stream'] = True
+        if self.prompt_cache.send_key:
+            params.setdefault('stream_options', {'include_usage': True})
+
+        try:
+            stream, estimated = await self._acreate(self.async_client.chat.completions.create, params, stream=True)
+        except openai.OpenAIError as e:
+            raise openai.OpenAIError(f"Chat completion failed: {str(e)}")
+
+        outcome = 'error'
+        try:
+            async for chunk in stream:
+                self.prompt_cache_stats.record(getattr(chunk, 'usage', None))
+                yield chunk
+            outcome = 'success'
 
         except openai.OpenAIError as e:
             raise openai.OpenAIError(f"Chat completion failed: {str(e)}")
 
+        finally:
+            self.rate_limiter.release(outcome, estimated_tokens=estimated)
+
     def __str__(self) -> str:
         """Return a string representation of the AI instance."""
         return f"AI(model={self.llm_config['model']})"
@@ -104,3 +515,41 @@ class AI:
     def __repr__(self) -> str:
         """Return a detailed string representation of the AI instance."""
         return f"AI(llm_config={self.llm_config})"
+
+
+class AsyncAI(AI):
+    """
+    An asyncio-native variant of the AI class built on ``openai.AsyncOpenAI``.
+
+    ``generate_response`` is a coroutine here, so standalone callers can await
+    completions directly without tying up a thread per in-flight request.
+    """
+
+    async def generate_response(self,
+                                messages: list[dict[str, str]],
+                                tools: list[dict[str, Any]] | None = None,
+                                use_tools: bool = False) -> ChatCompletion:
+        """
+        Execute a chat completion asynchronously.
+
+        Args:
+            messages (List[Dict[str, str]]): List of conversation messages.
+            tools (Optional[List[Dict[str, Any]]]): List of tools for function calling.
+            use_tools (bool): Whether to use function calling with tools.
+
+        Returns:
+            ChatCompletion: The response from the OpenAI API.
+
+        Raises:
+            openai.OpenAIError: If there's an error in the API call.
+            ValueError: If tools are requested but not provided.
+        """
+        return await self.agenerate_response(messages, tools=tools, use_tools=use_tools)
+
+    def __str__(self) -> str:
+        """Return a string representation of the AsyncAI instance."""
+        return f"AsyncAI(model={self.llm_config['model']})"
+
+    def __repr__(self) -> str:
+        """Return a detailed string representation of the AsyncAI instance."""
+        return f"AsyncAI(llm_config={self.llm_config})"
@@ -0,0 +1,279 @@
+"""
+Client pool module for sharing OpenAI clients across AI instances.
+
+Every AI, Agent, Supervisor and Architect component used to build its own
+``openai.OpenAI`` client, and with it its own httpx connection pool. This module
+provides a process-wide registry that hands out one client per endpoint,
+credential and transport configuration, so keep-alive connections (and HTTP/2
+streams when enabled) are shared by every instance talking to the same provider.
+
+Transport settings are read from the optional ``client`` section of an
+``llm_config``:
+
+    llm_config = {
+        "api_key": "...",
+        "model": "gpt-4o",
+        "client": {
+            "timeout": 60,
+            "max_retries": 0,
+            "http2": True,
+            "max_connections": 200,
+            "max_keepalive_connections": 50,
+            "keepalive_expiry": 30,
+            "prewarm": 2,
+        },
+    }
+"""
+
+import asyncio
+import importlib.util
+import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import httpx
+import openai
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://api.openai.com/v1'
+
+# Settings of the ``client`` section that are part of the pool key.
+_CLIENT_SETTINGS = (
+    'timeout',
+    'max_retries',
+    'http2',
+    'max_connections',
+    'max_keepalive_connections',
+    'keepalive_expiry',
+)
+
+
+class ClientPool:
+    """
+    A thread-safe registry of OpenAI clients keyed by endpoint, credentials and transport settings.
+
+    Sync clients are shared process-wide. Async clients are additionally scoped
+    to the event loop they are used from, because httpx connection pools cannot
+    be shared between loops.
+    """
+
+    def __init__(self):
+        """Initialize an empty pool with default connection limits."""
+        self._lock = threading.Lock()
+        self._clients: dict[tuple, openai.OpenAI] = {}
+        self._http_clients: dict[tuple, httpx.Client] = {}
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, openai.AsyncOpenAI]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._defaults: dict[str, Any] = {
+            'max_connections': 100,
+            'max_keepalive_connections': 20,
+            'keepalive_expiry': 30.0,
+            'http2': False,
+            # Retries are handled by the shared rate limiter so it can observe 429s.
+            'max_retries': 0,
+        }
+        self.hits = 0
+        self.misses = 0
+        self._warned_no_h2 = False
+
+    def configure(self,
+                  max_connections: int | None = None,
+                  max_keepalive_connections: int | None = None,
+                  keepalive_expiry: float | None = None,
+                  http2: bool | None = None) -> None:
+        """
+        Set process-wide default connection limits for clients created afterwards.
+
+        Per-config values in ``llm_config['client']`` take precedence over these defaults.
+
+        Args:
+            max_connections (Optional[int]): Maximum concurrent connections per client.
+            max_keepalive_connections (Optional[int]): Maximum idle connections kept alive.
+            keepalive_expiry (Optional[float]): Seconds an idle connection is kept.
+            http2 (Optional[bool]): Whether to negotiate HTTP/2 (requires the ``h2`` package).
+        """
+        updates = {
+            'max_connections': max_connections,
+            'max_keepalive_connections': max_keepalive_connections,
+            'keepalive_expiry': keepalive_expiry,
+            'http2': http2,
+        }
+        with self._lock:
+            self._defaults.update({k: v for k, v in updates.items() if v is not None})
+
+    def _settings(self, llm_config: dict[str, Any]) -> dict[str, Any]:
+        """Merge pool defaults with the ``client`` section of an llm_config."""
+        overrides = llm_config.get('client') or {}
+        settings = dict(self._defaults)
+        settings.update({k: overrides[k] for k in _CLIENT_SETTINGS if k in overrides})
+        if settings.get('http2') and importlib.util.find_spec('h2') is None:
+            if not self._warned_no_h2:
+                self._warned_no_h2 = True
+                logger.warning("HTTP/2 requested but the 'h2' package is not installed "
+                               "(pip install 'primisai[http2]'); falling back to HTTP/1.1")
+            settings['http2'] = False
+        return settings
+
+    def _key(self, llm_config: dict[str, Any], settings: dict[str, Any]) -> tuple:
+        """Build the pool key for an llm_config."""
+        return (
+            llm_config.get('base_url', DEFAULT_BASE_URL),
+            llm_config['api_key'],
+            tuple((name, settings.get(name)) for name in _CLIENT_SETTINGS),
+        )
+
+    @staticmethod
+    def _client_kwargs(llm_config: dict[str, Any], settings: dict[str, Any]) -> dict[str, Any]:
+        """Keyword arguments shared by the sync and async OpenAI constructors."""
+        kwargs = {
+            'base_url': llm_config.get('base_url', DEFAULT_BASE_URL),
+            'api_key': llm_config['api_key'],
+        }
+        if settings.get('timeout') is not None:
+            kwargs['timeout'] = settings['timeout']
+        if settings.get('max_retries') is not None:
+            kwargs['max_retries'] = settings['max_retries']
+        return kwargs
+
+    @staticmethod
+    def _limits(settings: dict[str, Any]) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings['max_connections'],
+            max_keepalive_connections=settings['max_keepalive_connections'],
+            keepalive_expiry=settings['keepalive_expiry'],
+        )
+
+    def get_client(self, llm_config: dict[str, Any]) -> openai.OpenAI:
+        """
+        Return the shared sync client for an llm_config, creating it on first use.
+
+        Args:
+            llm_config (Dict[str, Any]): Configuration containing 'api_key' and
+                optionally 'base_url' and a 'client' section.
+
+        Returns:
+            openai.OpenAI: The pooled client.
+        """
+        settings = self._settings(llm_config)
+        key = self._key(llm_config, settings)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+            self.misses += 1
+            http_client = openai.DefaultHttpxClient(limits=self._limits(settings), http2=settings['http2'])
+            client = openai.OpenAI(http_client=http_client, **self._client_kwargs(llm_config, settings))
+            self._clients[key] = client
+            self._http_clients[key] = http_client
+
+        prewarm = (llm_config.get('client') or {}).get('prewarm')
+        if prewarm:
+            threading.Thread(
+                target=self._prewarm_key, args=(key, int(prewarm)), daemon=True
+            ).start()
+        return client
+
+    def get_async_client(self, llm_config: dict[str, Any]) -> openai.AsyncOpenAI:
+        """
+        Return the shared async client for an llm_config on the running event loop.
+
+        Args:
+            llm_config (Dict[str, Any]): Configuration containing 'api_key' and
+                optionally 'base_url' and a 'client' section.
+
+        Returns:
+            openai.AsyncOpenAI: The pooled client bound to the running loop.
+
+        Raises:
+            RuntimeError: If called outside a running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        settings = self._settings(llm_config)
+        key = self._key(llm_config, settings)
+        with self._lock:
+            loop_clients = self._async_clients.setdefault(loop, {})
+            client = loop_clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+            self.misses += 1
+            http_client = openai.DefaultAsyncHttpxClient(limits=self._limits(settings), http2=settings['http2'])
+            client = openai.AsyncOpenAI(http_client=http_client, **self._client_kwargs(llm_config, settings))
+            loop_clients[key] = client
+        return client
+
+    def _prewarm_key(self, key: tuple, connections: int) -> None:
+        """Open `connections` keep-alive connections for a pooled sync client."""
+        http_client = self._http_clients.get(key)
+        client = self._clients.get(key)
+        if http_client is None or client is None:
+            return
+        base_url = str(client.base_url)
+
+        def _touch(_):
+            try:
+                http_client.head(base_url)
+            except httpx.HTTPError as e:
+                logger.debug(f"Connection prewarm to {base_url} failed: {e}")
+
+        with ThreadPoolExecutor(max_workers=connections) as pool:
+            list(pool.map(_touch, range(connections)))
+
+    def prewarm(self, llm_configs: list[dict[str, Any]], connections: int = 1) -> None:
+        """
+        Establish connections ahead of the first request.
+
+        Performs the TCP/TLS handshake (and HTTP/2 negotiation) for each distinct
+        endpoint so the first chat turn does not pay connection setup cost.
+        Connection errors are logged and ignored.
+
+        Args:
+            llm_configs (List[Dict[str, Any]]): Configurations whose endpoints to warm up.
+            connections (int): Number of parallel connections to open per endpoint.
+        """
+        keys = []
+        for llm_config in llm_configs:
+            self.get_client(llm_config)
+            key = self._key(llm_config, self._settings(llm_config))
+            if key not in keys:
+                keys.append(key)
+        for key in keys:
+            self._prewarm_key(key, connections)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get pool usage counters.
+
+        Returns:
+            Dict[str, int]: Number of pooled sync/async clients and lookup hits/misses.
+        """
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'async_clients': sum(len(clients) for clients in self._async_clients.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def clear(self) -> None:
+        """Close all pooled sync clients and forget every pooled client."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._http_clients.clear()
+            self._async_clients = weakref.WeakKeyDictionary()
+            self.hits = 0
+            self.misses = 0
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+
+client_pool = ClientPool()
@@ -0,0 +1,161 @@
+"""
+Coalescing module for sharing identical in-flight requests.
+
+When the Architect Evaluator runs several threads, or many sessions query the
+same stateless agent with the same prompt, byte-for-byte identical completions
+are often in flight at the same moment. ``SingleFlight`` lets the first caller
+(the leader) perform the upstream call while concurrent callers with the same
+key wait for and share its result, for both threads and asyncio tasks.
+
+Coalescing is off by default, as callers that sample (temperature > 0) would
+otherwise share one answer instead of getting independent completions. Enable
+it per agent with ``"coalesce": True`` in its ``llm_config``.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable
+
+
+class _Call:
+    """An in-flight sync call that followers wait on."""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class _LeaderCancelled(Exception):
+    """Raised to async followers when the leading task was cancelled."""
+
+
+class SingleFlight:
+    """
+    A thread-safe registry of in-flight calls keyed by request fingerprint.
+
+    Async calls are only shared between tasks of the same event loop, since a
+    future cannot be awaited from another loop.
+
+    Attributes:
+        leaders (int): Calls that went upstream.
+        coalesced (int): Calls that shared a leader's result instead.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self._async_calls: dict[tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Run `fn` unless an identical call is in flight, in which case wait for it.
+
+        Args:
+            key (str): Request fingerprint.
+            fn (Callable[[], Any]): The upstream call.
+
+        Returns:
+            Tuple[Any, bool]: The result and whether it was shared from another caller.
+
+        Raises:
+            Exception: Whatever `fn` raised, for the leader and its followers alike.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """
+        Async variant of `do` for tasks on the running event loop.
+
+        If the leading task is cancelled, its followers retry on their own
+        instead of inheriting the cancellation.
+
+        Args:
+            key (str): Request fingerprint.
+            fn (Callable[[], Awaitable[Any]]): Coroutine function making the upstream call.
+
+        Returns:
+            Tuple[Any, bool]: The result and whether it was shared from another caller.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                future = self._async_calls.get((loop, key))
+                leader = future is None
+                if leader:
+                    future = loop.create_future()
+                    self._async_calls[(loop, key)] = future
+                    self.leaders += 1
+                else:
+                    self.coalesced += 1
+
+            if not leader:
+                try:
+                    return await asyncio.shield(future), True
+                except _LeaderCancelled:
+                    continue
+
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                future.set_exception(_LeaderCancelled())
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result, False
+            finally:
+                with self._lock:
+                    del self._async_calls[(loop, key)]
+                # Retrieve the exception so an unawaited future does not log a warning.
+                if future.done() and not future.cancelled():
+                    future.exception()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get coalescing counters.
+
+        Returns:
+            Dict[str, int]: Leader and coalesced call counts and calls in flight.
+        """
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls) + len(self._async_calls),
+            }
+
+
+single_flight = SingleFlight()
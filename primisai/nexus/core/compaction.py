@@ -0,0 +1,281 @@
+"""
+Compaction module for folding old conversation turns into a rolling summary.
+
+Truncation (see `context`) keeps prompts small by forgetting old turns. For
+long-running agents with ``keep_history=True`` a ``Compactor`` instead
+condenses the oldest turns into a single summary message placed right after
+the system prompt, so facts from early turns survive while the prompt stays
+small. Each new summary folds in the previous one.
+
+By default the summarizer call is deferred: it runs on a background thread
+while the conversation continues, and its result is applied before a later
+request. The summary is persisted through ``HistoryManager`` as a system
+record flagged in its metadata, so ``load_chat_history`` can resume from the
+latest summary plus the turns after it.
+
+A compactor is enabled per agent or supervisor with the ``compaction``
+argument (or YAML key):
+
+    agent = Agent(..., compaction={"trigger_tokens": 6000, "keep_last_turns": 4})
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+from primisai.nexus.core.context import TokenCounter, leading_system_messages
+
+logger = logging.getLogger(__name__)
+
+Message = dict[str, Any]
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARIZER_PROMPT = (
+    "You maintain the running summary of a conversation between a user, an assistant "
+    "and its tools. Merge the existing summary (if any) with the new messages into one "
+    "concise summary. Keep every fact, decision, number, name, open question and tool "
+    "result that later turns may rely on. Answer with the summary only."
+)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _summary_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool running deferred summarizer calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="nexus-compaction")
+        return _executor
+
+
+def _transcript(messages: list[Message]) -> str:
+    """Render messages as plain text for the summarizer."""
+    lines = []
+    for message in messages:
+        if message.get('tool_calls'):
+            calls = ", ".join(
+                f"{call['function']['name']}({call['function']['arguments']})" for call in message['tool_calls']
+            )
+            lines.append(f"assistant called tools: {calls}")
+        elif message.get('role') == 'tool':
+            lines.append(f"tool result: {message.get('content')}")
+        else:
+            lines.append(f"{message.get('role')}: {message.get('content')}")
+    return "\n".join(lines)
+
+
+def is_summary_message(message: Message) -> bool:
+    """Return True if `message` is a rolling summary created by a Compactor."""
+    content = message.get('content')
+    return message.get('role') == 'system' and isinstance(content, str) and content.startswith(SUMMARY_PREFIX)
+
+
+class Compactor:
+    """
+    Folds the oldest turns of a chat history into a rolling summary.
+
+    Attributes:
+        compactions (int): Summaries applied so far.
+    """
+
+    def __init__(self,
+                 trigger_tokens: int,
+                 keep_last_turns: int = 4,
+                 deferred: bool = True,
+                 token_counter: Callable[[Message], int] | None = None):
+        """
+        Initialize the compactor.
+
+        Args:
+            trigger_tokens (int): History size in tokens above which old turns are summarized.
+            keep_last_turns (int): Number of most recent user turns kept verbatim.
+            deferred (bool): Run the summarizer in the background and apply its result
+                before a later request, instead of blocking the current one.
+            token_counter (Optional[Callable[[Dict[str, Any]], int]]): Function counting
+                the tokens of a message.
+
+        Raises:
+            ValueError: If the settings are out of range.
+        """
+        if trigger_tokens <= 0:
+            raise ValueError("trigger_tokens must be positive")
+        if keep_last_turns < 1:
+            raise ValueError("keep_last_turns must be at least 1")
+        self.trigger_tokens = trigger_tokens
+        self.keep_last_turns = keep_last_turns
+        self.deferred = deferred
+        self.counter = TokenCounter(token_counter)
+        self.compactions = 0
+        self._pending: tuple[Future, list[Message]] | None = None
+
+    def compact(self,
+                messages: list[Message],
+                summarize: Callable[[list[Message]], str],
+                persist: Callable[[Message, int], None] | None = None) -> list[Message]:
+        """
+        Apply a finished summary and start a new one if the history is too large.
+
+        Args:
+            messages (List[Dict[str, Any]]): The in-memory chat history.
+            summarize (Callable[[List[Dict[str, Any]]], str]): Sends summarizer messages
+                to the LLM and returns the summary text.
+            persist (Optional[Callable[[Dict[str, Any], int], None]]): Records an applied
+                summary message together with the number of user turns kept after it.
+
+        Returns:
+            List[Dict[str, Any]]: The history to use from now on.
+        """
+        messages, folded, request = self._prepare(messages, summarize, persist)
+        if request is None:
+            return messages
+
+        future: Future = Future()
+        try:
+            future.set_result(summarize(request))
+        except Exception as e:
+            future.set_exception(e)
+        return self._apply(messages, future, folded, persist)
+
+    async def acompact(self,
+                       messages: list[Message],
+                       summarize: Callable[[list[Message]], str],
+                       asummarize: Callable[[list[Message]], Awaitable[str]],
+                       persist: Callable[[Message, int], None] | None = None) -> list[Message]:
+        """
+        Async variant of `compact` for use on an event loop.
+
+        A non-deferred summary is awaited through `asummarize` instead of blocking
+        the loop; deferred summaries still run `summarize` on the background pool.
+
+        Args:
+            messages (List[Dict[str, Any]]): The in-memory chat history.
+            summarize (Callable[[List[Dict[str, Any]]], str]): Blocking summarizer, used
+                for deferred summaries.
+            asummarize (Callable[[List[Dict[str, Any]]], Awaitable[str]]): Async summarizer,
+                used for non-deferred summaries.
+            persist (Optional[Callable[[Dict[str, Any], int], None]]): Records an applied
+                summary message together with the number of user turns kept after it.
+
+        Returns:
+            List[Dict[str, Any]]: The history to use from now on.
+        """
+        messages, folded, request = self._prepare(messages, summarize, persist)
+        if request is None:
+            return messages
+
+        future: Future = Future()
+        try:
+            future.set_result(await asummarize(request))
+        except Exception as e:
+            future.set_exception(e)
+        return self._apply(messages, future, folded, persist)
+
+    def _prepare(self,
+                 messages: list[Message],
+                 summarize: Callable[[list[Message]], str],
+                 persist: Callable[[Message, int], None] | None
+                 ) -> tuple[list[Message], list[Message], list[Message] | None]:
+        """
+        Apply a finished deferred summary and build the next summarizer request, if one is due.
+
+        Deferred requests are submitted here; the returned request is set only when
+        the caller must run the summarizer itself.
+
+        Returns:
+            Tuple: The current history, the messages to fold, and the summarizer request or None.
+        """
+        if self._pending is not None and self._pending[0].done():
+            future, folded = self._pending
+            self._pending = None
+            messages = self._apply(messages, future, folded, persist)
+
+        if self._pending is not None or self.counter.total(messages) <= self.trigger_tokens:
+            return messages, [], None
+
+        folded = self._select(messages)
+        if not folded:
+            return messages, [], None
+
+        request = [
+            {'role': 'system', 'content': SUMMARIZER_PROMPT},
+            {'role': 'user', 'content': _transcript(folded)},
+        ]
+        if self.deferred:
+            self._pending = (_summary_executor().submit(summarize, request), folded)
+            return messages, folded, None
+        return messages, folded, request
+
+    def _select(self, messages: list[Message]) -> list[Message]:
+        """Return the messages to fold: an existing summary plus the turns before the kept tail."""
+        head = leading_system_messages(messages)
+        summaries = [message for message in head if is_summary_message(message)]
+        body = messages[len(head):]
+        turn_starts = [i for i, message in enumerate(body) if message.get('role') == 'user']
+        if len(turn_starts) <= self.keep_last_turns:
+            return []
+        tail_start = turn_starts[-self.keep_last_turns]
+        if tail_start == 0:
+            return []
+        return summaries + body[:tail_start]
+
+    def _apply(self,
+               messages: list[Message],
+               future: Future,
+               folded: list[Message],
+               persist: Callable[[Message, int], None] | None) -> list[Message]:
+        """Replace the folded messages with the summary if they still lead the history."""
+        try:
+            summary = future.result()
+        except Exception as e:
+            logger.warning(f"Conversation compaction failed: {e}")
+            return messages
+
+        head = [message for message in leading_system_messages(messages) if not is_summary_message(message)]
+        start = len(head)
+        if len(messages) < start + len(folded) or any(
+                current is not old for current, old in zip(messages[start:start + len(folded)], folded)):
+            # The history was reset or pruned meanwhile; the summary no longer applies.
+            return messages
+
+        summary_msg = {'role': 'system', 'content': SUMMARY_PREFIX + (summary or '').strip()}
+        tail = messages[start + len(folded):]
+        compacted = head + [summary_msg] + tail
+        self.counter.retain(compacted)
+        self.compactions += 1
+        if persist is not None:
+            persist(summary_msg, sum(1 for message in tail if message.get('role') == 'user'))
+        return compacted
+
+    def wait(self) -> None:
+        """Block until a deferred summarizer call, if any, has finished."""
+        if self._pending is not None:
+            self._pending[0].exception()
+
+
+def build_compactor(config: "dict[str, Any] | Compactor | None") -> Compactor | None:
+    """
+    Build a Compactor from a ``compaction`` setting.
+
+    Args:
+        config: None to disable, a dict of `Compactor` arguments, or a ready-made Compactor.
+
+    Returns:
+        Optional[Compactor]: The compactor, or None if disabled.
+
+    Raises:
+        ValueError: If the configuration is invalid.
+    """
+    if config is None or isinstance(config, Compactor):
+        return config
+    if not isinstance(config, dict):
+        raise ValueError("compaction must be a dictionary")
+    unknown = set(config) - {'trigger_tokens', 'keep_last_turns', 'deferred'}
+    if unknown:
+        raise ValueError(f"Unknown compaction settings: {sorted(unknown)}")
+    if 'trigger_tokens' not in config:
+        raise ValueError("compaction requires 'trigger_tokens'")
+    return Compactor(**config)
@@ -0,0 +1,296 @@
+"""
+Context module for keeping chat history within a token budget.
+
+``Agent.chat_history`` and ``Supervisor.chat_history`` are resent on every
+iteration of the tool loop, so without a bound the tokens sent per turn grow
+with the whole conversation. A ``ContextWindow`` prunes the in-memory history
+before each completion request. The persisted history (``HistoryManager``) is
+never touched.
+
+Pruning works on units that must stay together: an assistant message carrying
+``tool_calls`` is always kept or dropped along with its tool responses, and the
+leading system messages and the current turn are always kept. Strategies:
+
+- ``sliding_window``: drop the oldest units until the budget is met.
+- ``last_n_turns``: keep only the last ``last_n_turns`` user turns (including
+  the current one), then apply the sliding window.
+- ``tool_pairs``: drop completed tool exchanges (oldest first) before any
+  user/assistant dialogue, then apply the sliding window.
+
+Further strategies can be added with `register_strategy`. A window is enabled
+per agent with the ``context_window`` argument (or YAML key):
+
+    agent = Agent(..., context_window={"max_tokens": 8000, "strategy": "tool_pairs"})
+"""
+
+import json
+from typing import Any, Callable
+
+Message = dict[str, Any]
+Strategy = Callable[["ContextWindow", list[list[Message]], int], list[list[Message]]]
+
+_STRATEGIES: dict[str, Strategy] = {}
+
+
+def register_strategy(name: str, strategy: Strategy) -> None:
+    """
+    Register a pruning strategy.
+
+    Args:
+        name (str): Name used in the ``strategy`` setting.
+        strategy (Callable): Function ``(window, units, budget) -> units`` receiving
+            the history before the current turn grouped into units (oldest first)
+            and the token budget left for them, and returning the units to keep.
+    """
+    _STRATEGIES[name] = strategy
+
+
+def estimate_message_tokens(message: Message) -> int:
+    """
+    Roughly estimate the tokens of a chat message (~4 characters per token).
+
+    Args:
+        message (Dict[str, Any]): A chat message.
+
+    Returns:
+        int: Estimated token count, including a small per-message overhead.
+    """
+    content = message.get('content') or ''
+    if not isinstance(content, str):
+        content = json.dumps(content, default=str)
+    size = len(content)
+    if message.get('tool_calls'):
+        size += len(json.dumps(message['tool_calls'], default=str))
+    return size // 4 + 4
+
+
+def leading_system_messages(messages: list[Message]) -> list[Message]:
+    """
+    Return the system messages at the start of a history.
+
+    These are the system prompt and, once a conversation has been compacted,
+    its rolling summary; both are always kept.
+
+    Args:
+        messages (List[Dict[str, Any]]): A chat history.
+
+    Returns:
+        List[Dict[str, Any]]: The leading run of system messages.
+    """
+    end = 0
+    while end < len(messages) and messages[end].get('role') == 'system':
+        end += 1
+    return messages[:end]
+
+
+class TokenCounter:
+    """
+    Counts message tokens, caching the count per message object.
+
+    Chat histories only ever append new message objects, so each message is
+    counted once no matter how many requests it is sent with.
+    """
+
+    def __init__(self, token_counter: Callable[[Message], int] | None = None):
+        """
+        Initialize the counter.
+
+        Args:
+            token_counter (Optional[Callable[[Dict[str, Any]], int]]): Function counting the
+                tokens of a message; defaults to `estimate_message_tokens`.
+        """
+        self.token_counter = token_counter or estimate_message_tokens
+        self._counts: dict[int, tuple[Message, int]] = {}
+
+    def count(self, message: Message) -> int:
+        """
+        Get the token count of a message, computing it on first use.
+
+        Args:
+            message (Dict[str, Any]): A chat message.
+
+        Returns:
+            int: Token count.
+        """
+        entry = self._counts.get(id(message))
+        if entry is None or entry[0] is not message:
+            entry = (message, self.token_counter(message))
+            self._counts[id(message)] = entry
+        return entry[1]
+
+    def total(self, messages: list[Message]) -> int:
+        """Return the total token count of `messages`."""
+        return sum(self.count(message) for message in messages)
+
+    def retain(self, messages: list[Message]) -> None:
+        """Forget the counts of every message not in `messages`."""
+        kept_ids = {id(message) for message in messages}
+        self._counts = {key: entry for key, entry in self._counts.items() if key in kept_ids}
+
+
+class ContextWindow:
+    """
+    Enforces a token budget on a chat history.
+
+    Token counts are cached per message object, so each message is counted
+    once no matter how many requests it is sent with.
+    """
+
+    def __init__(self,
+                 max_tokens: int,
+                 strategy: str = 'sliding_window',
+                 last_n_turns: int | None = None,
+                 token_counter: Callable[[Message], int] | None = None):
+        """
+        Initialize the window.
+
+        Args:
+            max_tokens (int): Token budget for the messages of one request.
+            strategy (str): Name of a registered pruning strategy.
+            last_n_turns (Optional[int]): Number of user turns kept by ``last_n_turns``.
+            token_counter (Optional[Callable[[Dict[str, Any]], int]]): Function counting the
+                tokens of a message; defaults to `estimate_message_tokens`.
+
+        Raises:
+            ValueError: If the budget is not positive or the strategy is unknown.
+        """
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        if strategy not in _STRATEGIES:
+            raise ValueError(f"Unknown context strategy '{strategy}'. Available: {sorted(_STRATEGIES)}")
+        if strategy == 'last_n_turns' and not last_n_turns:
+            raise ValueError("The 'last_n_turns' strategy requires 'last_n_turns'")
+        self.max_tokens = max_tokens
+        self.strategy = strategy
+        self.last_n_turns = last_n_turns
+        self.counter = TokenCounter(token_counter)
+        self.pruned_messages = 0
+
+    def count(self, message: Message) -> int:
+        """Return the (cached) token count of a message."""
+        return self.counter.count(message)
+
+    def total(self, messages: list[Message]) -> int:
+        """Return the total token count of `messages`."""
+        return self.counter.total(messages)
+
+    def units_tokens(self, units: list[list[Message]]) -> int:
+        """Return the total token count of grouped messages."""
+        return sum(self.total(unit) for unit in units)
+
+    @staticmethod
+    def group(messages: list[Message]) -> list[list[Message]]:
+        """
+        Group messages into units that must be kept or dropped together.
+
+        Args:
+            messages (List[Dict[str, Any]]): Chat messages without the system message.
+
+        Returns:
+            List[List[Dict[str, Any]]]: Units in order; a tool-call message and its
+                tool responses form one unit.
+        """
+        units: list[list[Message]] = []
+        for message in messages:
+            if message.get('role') == 'tool' and units and units[-1][0].get('tool_calls'):
+                units[-1].append(message)
+            else:
+                units.append([message])
+        return units
+
+    def fit(self, messages: list[Message]) -> list[Message]:
+        """
+        Return the messages to send so that they fit the budget.
+
+        The leading system messages and the current turn (the latest user
+        message and everything after it) are always kept, even if they alone
+        exceed the budget; strategies prune the earlier units.
+
+        Args:
+            messages (List[Dict[str, Any]]): The full in-memory chat history.
+
+        Returns:
+            List[Dict[str, Any]]: The pruned history (the same list if nothing was pruned).
+        """
+        if self.total(messages) <= self.max_tokens and self.strategy != 'last_n_turns':
+            return messages
+
+        head = leading_system_messages(messages)
+        units = self.group(messages[len(head):])
+        current_start = max((i for i, unit in enumerate(units) if unit[0].get('role') == 'user'), default=len(units))
+        earlier, current = units[:current_start], units[current_start:]
+        budget = self.max_tokens - self.total(head) - self.units_tokens(current)
+        kept = _STRATEGIES[self.strategy](self, earlier, budget) + current
+        pruned = head + [message for unit in kept for message in unit]
+        if len(pruned) == len(messages):
+            return messages
+
+        self.pruned_messages += len(messages) - len(pruned)
+        self.counter.retain(pruned)
+        return pruned
+
+
+def _sliding_window(window: ContextWindow, units: list[list[Message]], budget: int) -> list[list[Message]]:
+    total = window.units_tokens(units)
+    start = 0
+    while total > budget and start < len(units):
+        total -= window.total(units[start])
+        start += 1
+    return units[start:]
+
+
+def _last_n_turns(window: ContextWindow, units: list[list[Message]], budget: int) -> list[list[Message]]:
+    # The current turn is kept by `fit`, so only n - 1 earlier turns remain.
+    earlier_turns = window.last_n_turns - 1
+    turn_starts = [i for i, unit in enumerate(units) if unit[0].get('role') == 'user']
+    if len(turn_starts) > earlier_turns:
+        units = units[turn_starts[len(turn_starts) - earlier_turns]:] if earlier_turns else []
+    return _sliding_window(window, units, budget)
+
+
+def _tool_pairs(window: ContextWindow, units: list[list[Message]], budget: int) -> list[list[Message]]:
+    total = window.units_tokens(units)
+    dropped = set()
+    for index, unit in enumerate(units):
+        if total <= budget:
+            break
+        if unit[0].get('tool_calls'):
+            dropped.add(index)
+            total -= window.total(unit)
+    kept = [unit for index, unit in enumerate(units) if index not in dropped]
+    return _sliding_window(window, kept, budget)
+
+
+register_strategy('sliding_window', _sliding_window)
+register_strategy('last_n_turns', _last_n_turns)
+register_strategy('tool_pairs', _tool_pairs)
+
+
+def build_context_window(config: "int | dict[str, Any] | ContextWindow | None") -> ContextWindow | None:
+    """
+    Build a ContextWindow from a ``context_window`` setting.
+
+    Args:
+        config: None to disable, a token budget, a dict of `ContextWindow`
+            arguments, or a ready-made ContextWindow.
+
+    Returns:
+        Optional[ContextWindow]: The window, or None if disabled.
+
+    Raises:
+        ValueError: If the configuration is invalid.
+    """
+    if config is None or isinstance(config, ContextWindow):
+        return config
+    if isinstance(config, bool):
+        raise ValueError("context_window must be a token budget or a dictionary")
+    if isinstance(config, int):
+        return ContextWindow(max_tokens=config)
+    if isinstance(config, dict):
+        unknown = set(config) - {'max_tokens', 'strategy', 'last_n_turns'}
+        if unknown:
+            raise ValueError(f"Unknown context_window settings: {sorted(unknown)}")
+        if 'max_tokens' not in config:
+            raise ValueError("context_window requires 'max_tokens'")
+        return ContextWindow(**config)
+    raise ValueError("context_window must be a token budget or a dictionary")
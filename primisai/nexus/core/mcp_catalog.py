@@ -0,0 +1,154 @@
+"""
+MCP catalog module caching the tool lists of MCP servers on disk.
+
+Discovering an MCP server's tools means connecting to it, calling
+``list_tools()`` and converting every tool schema to the OpenAI format, on
+every process start. With ``mcp_catalog_cache`` enabled an agent instead
+registers the converted tools it cached for a server last time and connects in
+the background; once connected it compares the server's current tool list with
+the cached one and, if it changed, updates both the cache and the agent's tools.
+
+    agent = Agent(..., mcp_servers=[...], mcp_catalog_cache=True)
+
+The catalog is a JSON file (``nexus_workflows/mcp_catalog.json`` by default)
+mapping a hash of each server's identity (so auth tokens are not written to
+disk) to its converted tools and their content hash.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from primisai.nexus.core.prompt_cache import canonical_dumps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = Path("nexus_workflows") / "mcp_catalog.json"
+
+_FORMAT_VERSION = 1
+
+
+def catalog_hash(tools: list[dict[str, Any]]) -> str:
+    """
+    Hash a converted tool list, to detect changes on the server.
+
+    Args:
+        tools (List[Dict[str, Any]]): Tool schemas in OpenAI format.
+
+    Returns:
+        str: Hex digest of the canonical JSON of the tools.
+    """
+    return hashlib.sha256(canonical_dumps(tools).encode("utf-8")).hexdigest()
+
+
+def _entry_key(server_key: str) -> str:
+    """Return the catalog key of a server identity."""
+    return hashlib.sha256(server_key.encode("utf-8")).hexdigest()[:32]
+
+
+class McpCatalogCache:
+    """
+    Converted MCP tool lists per server, persisted in a JSON file.
+
+    Attributes:
+        path (Path): The catalog file.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_CATALOG_PATH):
+        """
+        Initialize the cache; the file is read on first use.
+
+        Args:
+            path (Union[str, Path]): The catalog file.
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] | None = None
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        """Return the entries, reading the file the first time."""
+        if self._entries is None:
+            entries: dict[str, dict[str, Any]] = {}
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                if data.get("version") == _FORMAT_VERSION:
+                    entries = data.get("servers") or {}
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.warning(f"[MCP] Ignoring unreadable tool catalog {self.path}: {e}")
+            self._entries = entries
+        return self._entries
+
+    def get(self, server_key: str) -> list[dict[str, Any]] | None:
+        """
+        Get the cached tools of a server.
+
+        Args:
+            server_key (str): The server identity (see `mcp_sessions.server_key`).
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: Tool schemas in OpenAI format, or None if not cached.
+        """
+        with self._lock:
+            entry = self._load().get(_entry_key(server_key))
+        if entry is None or catalog_hash(entry.get("tools", [])) != entry.get("hash"):
+            return None
+        return entry["tools"]
+
+    def put(self, server_key: str, label: str, tools: list[dict[str, Any]]) -> None:
+        """
+        Store the tools of a server and rewrite the catalog file.
+
+        Args:
+            server_key (str): The server identity.
+            label (str): Human-readable server description (without credentials).
+            tools (List[Dict[str, Any]]): Tool schemas in OpenAI format.
+        """
+        with self._lock:
+            entries = self._load()
+            entries[_entry_key(server_key)] = {
+                "server": label,
+                "hash": catalog_hash(tools),
+                "updated": datetime.now(timezone.utc).isoformat(),
+                "tools": tools,
+            }
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                temporary = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                with open(temporary, "w") as f:
+                    json.dump({"version": _FORMAT_VERSION, "servers": entries}, f)
+                os.replace(temporary, self.path)
+            except OSError as e:
+                logger.warning(f"[MCP] Could not write tool catalog {self.path}: {e}")
+
+
+_catalogs: dict[str, McpCatalogCache] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_mcp_catalog(config: bool | str | None) -> McpCatalogCache | None:
+    """
+    Return the shared catalog for an ``mcp_catalog_cache`` setting.
+
+    Args:
+        config (Optional[Union[bool, str]]): False/None to disable, True for the
+            default file, or the path of the catalog file.
+
+    Returns:
+        Optional[McpCatalogCache]: The shared catalog, or None if disabled.
+    """
+    if not config:
+        return None
+    path = str(Path(DEFAULT_CATALOG_PATH if config is True else config).resolve())
+    with _catalogs_lock:
+        catalog = _catalogs.get(path)
+        if catalog is None:
+            catalog = _catalogs[path] = McpCatalogCache(path)
+        return catalog
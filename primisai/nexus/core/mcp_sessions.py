@@ -0,0 +1,332 @@
+"""
+MCP session module sharing server connections across agents.
+
+Every agent used to open its own connection to each of its MCP servers, on an
+event loop thread of its own; for stdio servers that meant one subprocess per
+agent. The process-wide `McpSessionManager` instead runs a single event loop
+thread and pools connections by server identity (transport and URL, auth
+token or script path):
+
+- the first agent using a server connects to it and lists its tools,
+- later agents reuse the open session and its tool list,
+- each connection is reference-counted and closed when the last agent using
+  it releases it (`Agent.close`, `update_mcp_tools` or garbage collection).
+
+A ``ClientSession`` multiplexes requests by id, so any number of ``call_tool``
+requests from any number of agents can be in flight on one session.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+from contextlib import AsyncExitStack, contextmanager
+from typing import Any, Iterator
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.shared.message import SessionMessage
+from mcp.types import JSONRPCRequest
+
+logger = logging.getLogger(__name__)
+
+# Ids of the requests sent from the current context, see `record_request_ids`.
+_sent_request_ids: contextvars.ContextVar[list[Any] | None] = contextvars.ContextVar(
+    "nexus_mcp_sent_request_ids", default=None)
+
+
+@contextmanager
+def record_request_ids() -> Iterator[list[Any]]:
+    """
+    Collect the JSON-RPC ids of the MCP requests sent from the current context.
+
+    A session sends a request from the task awaiting it, so the ids are known
+    while the request is in flight, e.g. to cancel it.
+
+    Yields:
+        List[Any]: The ids, in the order the requests were sent.
+    """
+    ids: list[Any] = []
+    token = _sent_request_ids.set(ids)
+    try:
+        yield ids
+    finally:
+        _sent_request_ids.reset(token)
+
+
+class _RequestIdRecorder:
+    """Write stream of a session that records the ids of outgoing requests for `record_request_ids`."""
+
+    def __init__(self, stream: Any):
+        self._stream = stream
+
+    async def send(self, message: SessionMessage) -> None:
+        ids = _sent_request_ids.get()
+        if ids is not None and isinstance(message.message.root, JSONRPCRequest):
+            ids.append(message.message.root.id)
+        await self._stream.send(message)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+    async def __aenter__(self) -> "_RequestIdRecorder":
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> Any:
+        return await self._stream.__aexit__(*exc_info)
+
+
+def server_key(server: dict[str, Any]) -> str:
+    """
+    Return the identity of an MCP server configuration, under which its session is pooled.
+
+    Args:
+        server (Dict[str, Any]): The MCP server configuration.
+
+    Returns:
+        str: The pool key.
+
+    Raises:
+        ValueError: If the transport type is unknown.
+    """
+    ttype = server.get("type", "sse")
+    if ttype == "sse":
+        return f"sse:{server['url']}::{server.get('auth_token') or ''}"
+    if ttype == "stdio":
+        return f"stdio:{os.path.abspath(server['script_path'])}"
+    raise ValueError(f"[MCP] Unknown transport type: {ttype}")
+
+
+class McpConnection:
+    """
+    One open MCP session, shared by every agent configured with the same server.
+
+    The session lives in a task of its own, because the transports' context
+    managers must be entered and exited by the same task.
+
+    Attributes:
+        key (str): The server identity (see `server_key`).
+        session (Optional[ClientSession]): The initialized session, once connected.
+        tools (list): The server's tools as listed after connecting.
+        refs (int): Number of leases held by agents.
+    """
+
+    def __init__(self, key: str, server: dict[str, Any]):
+        """
+        Initialize the connection; `start` opens it.
+
+        Args:
+            key (str): The server identity.
+            server (Dict[str, Any]): The MCP server configuration.
+        """
+        self.key = key
+        self.server = server
+        self.session: ClientSession | None = None
+        self.tools: list[Any] = []
+        self.refs = 0
+        self._ready: asyncio.Future | None = None
+        self._closed: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start connecting on the running loop."""
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        self._closed = asyncio.Event()
+        self._task = loop.create_task(self._run(), name=f"nexus-mcp:{self.key}")
+
+    async def wait_ready(self) -> "McpConnection":
+        """
+        Wait until the session is initialized and its tools are listed.
+
+        Returns:
+            McpConnection: This connection.
+
+        Raises:
+            Exception: Any error raised while connecting.
+        """
+        return await asyncio.shield(self._ready)
+
+    async def refresh_tools(self) -> None:
+        """List the server's tools again, e.g. after they changed on the server."""
+        self.tools = (await self.session.list_tools()).tools
+
+    def add_done_callback(self, callback) -> None:
+        """Call `callback(self)` on the loop once the session has ended."""
+        self._task.add_done_callback(lambda _: callback(self))
+
+    def close(self) -> None:
+        """Ask the connection task to close the session and its transport."""
+        if self._closed is not None:
+            self._closed.set()
+
+    async def _run(self) -> None:
+        """Hold the session open until `close` is called."""
+        try:
+            async with AsyncExitStack() as stack:
+                if self.server.get("type", "sse") == "stdio":
+                    params = StdioServerParameters(command="python", args=[self.server["script_path"]], env=None)
+                    streams = await stack.enter_async_context(stdio_client(params))
+                else:
+                    auth_token = self.server.get("auth_token")
+                    headers = {"Authorization": f"Bearer {auth_token}"} if auth_token else {}
+                    # Use the user-supplied URL exactly as written.
+                    streams = await stack.enter_async_context(sse_client(self.server["url"], headers=headers))
+                read_stream, write_stream = streams[:2]
+                session = await stack.enter_async_context(
+                    ClientSession(read_stream, _RequestIdRecorder(write_stream)))
+                await session.initialize()
+                self.tools = (await session.list_tools()).tools
+                self.session = session
+                self._ready.set_result(self)
+                await self._closed.wait()
+        except BaseException as e:
+            if not self._ready.done():
+                self._ready.set_exception(e if isinstance(e, Exception) else RuntimeError(f"[MCP] {e!r}"))
+            elif not isinstance(e, asyncio.CancelledError):
+                logger.warning(f"[MCP] Session {self.key} ended with an error: {e}")
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self.session = None
+
+
+class McpSessionManager:
+    """
+    Process-wide pool of MCP sessions on one event loop thread.
+
+    Attributes:
+        loop (asyncio.AbstractEventLoop): The loop owning every session; agents also
+            run their native async tools on it from synchronous code.
+    """
+
+    def __init__(self):
+        """Start the event loop thread."""
+        self._connections: dict[str, McpConnection] = {}
+        ready = threading.Event()
+
+        def run() -> None:
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            ready.set()
+            self.loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="nexus-mcp", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    async def acquire(self, server: dict[str, Any], refresh: bool = False) -> McpConnection:
+        """
+        Lease the shared session of a server, connecting to it if needed.
+
+        Must run on `loop`. Every successful call must be paired with a `release`.
+
+        Args:
+            server (Dict[str, Any]): The MCP server configuration.
+            refresh (bool): List the tools of an already open session again.
+
+        Returns:
+            McpConnection: The connected, shared session.
+
+        Raises:
+            Exception: Any error raised while connecting.
+        """
+        key = server_key(server)
+        connection = self._connections.get(key)
+        created = connection is None
+        if created:
+            connection = self._connections[key] = McpConnection(key, server)
+            connection.start()
+            connection.add_done_callback(self._forget)
+        connection.refs += 1
+        try:
+            await connection.wait_ready()
+            if refresh and not created:
+                await connection.refresh_tools()
+            return connection
+        except BaseException:
+            self._drop(connection)
+            raise
+
+    def release(self, key: str) -> None:
+        """
+        Return a lease; the session is closed when no agent holds it anymore.
+
+        Safe to call from any thread.
+
+        Args:
+            key (str): The server identity of the leased session.
+        """
+        if self.loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._release(key)
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._release, key)
+        except RuntimeError:
+            pass
+
+    def _release(self, key: str) -> None:
+        """Drop one lease of `key`, on the loop."""
+        connection = self._connections.get(key)
+        if connection is not None:
+            self._drop(connection)
+
+    def _drop(self, connection: McpConnection) -> None:
+        """Drop one lease of a connection and close it if it was the last."""
+        connection.refs -= 1
+        if connection.refs <= 0:
+            if self._connections.get(connection.key) is connection:
+                del self._connections[connection.key]
+            connection.close()
+            logger.debug(f"[MCP] Closing session {connection.key}")
+
+    def _forget(self, connection: McpConnection) -> None:
+        """Remove a connection whose session ended, so the next `acquire` reconnects."""
+        if self._connections.get(connection.key) is connection:
+            del self._connections[connection.key]
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the open sessions and their lease counts.
+
+        Returns:
+            Dict[str, int]: Leases per server identity.
+        """
+        return {key: connection.refs for key, connection in list(self._connections.items())}
+
+
+_manager: McpSessionManager | None = None
+_manager_lock = threading.Lock()
+
+
+def release_leases(leases: list[str]) -> None:
+    """
+    Return every lease in `leases` and empty the list.
+
+    Used by agents when they are closed or garbage collected.
+
+    Args:
+        leases (List[str]): Server identities of the leased sessions.
+    """
+    if leases and _manager is not None:
+        for key in leases:
+            _manager.release(key)
+    leases.clear()
+
+
+def get_mcp_manager() -> McpSessionManager:
+    """Return the process-wide MCP session manager, starting it on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = McpSessionManager()
+        return _manager
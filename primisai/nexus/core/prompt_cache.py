@@ -0,0 +1,219 @@
+"""
+Prompt cache module for keeping request prefixes byte-identical across calls.
+
+Providers such as OpenAI discount and speed up the part of a request whose
+prefix (tools, then system message, then earlier turns) matches a recent
+request exactly. A prefix only matches if it is serialized identically, so the
+``prompt_cache`` section of an ``llm_config`` enables a mode that:
+
+- sorts tools by name and serializes each one with sorted keys, reusing the
+  same frozen list for as long as the tool set does not change,
+- makes agents render their system message deterministically (e.g. the
+  output-schema instruction uses sorted keys), and
+- sends a ``prompt_cache_key`` where the provider supports it, so requests
+  sharing a prefix are routed to the same cache.
+
+    llm_config = {
+        "api_key": "...",
+        "model": "gpt-4o",
+        "prompt_cache": True,   # or {"key": "research-agent"}
+    }
+
+Cached-token counts reported in ``usage`` are collected per agent in a
+``PromptCacheStats`` (``agent.prompt_cache_stats.stats()``) whether or not the
+mode is enabled, so hit rates can be compared.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any
+
+from primisai.nexus.core.client_pool import DEFAULT_BASE_URL
+
+_PROMPT_CACHE_SETTINGS = {
+    'enabled': True,
+    'key': None,
+    'send_key': None,
+}
+
+
+def canonicalize(value: Any) -> Any:
+    """
+    Return a copy of a JSON-like value with every dict's keys sorted.
+
+    The OpenAI SDK serializes request bodies in dict insertion order, so
+    sorting the keys makes equal values serialize to identical bytes.
+
+    Args:
+        value (Any): A JSON-like value.
+
+    Returns:
+        Any: The canonical copy.
+    """
+    if isinstance(value, dict):
+        return {key: canonicalize(value[key]) for key in sorted(value)}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item) for item in value]
+    return value
+
+
+def canonical_dumps(value: Any, indent: int | None = None) -> str:
+    """Serialize a value to JSON with sorted keys, for text embedded in prompts."""
+    return json.dumps(value, indent=indent, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _tool_name(tool: dict[str, Any]) -> str:
+    """Return the function name of a tool schema, for ordering."""
+    function = tool.get('function')
+    return function.get('name', '') if isinstance(function, dict) else ''
+
+
+class PromptCachePolicy:
+    """
+    The stable-prefix settings of one AI instance and its frozen tool list.
+
+    Attributes:
+        enabled (bool): Whether requests are canonicalized.
+        key (Optional[str]): Explicit ``prompt_cache_key``; derived from the prefix if None.
+        send_key (bool): Whether ``prompt_cache_key`` is sent with requests.
+    """
+
+    def __init__(self, config: bool | dict[str, Any] | None = None, base_url: str = DEFAULT_BASE_URL):
+        """
+        Initialize the policy.
+
+        Args:
+            config (Optional[Union[bool, Dict[str, Any]]]): The ``prompt_cache`` section of an
+                llm_config: False/None to disable, True for defaults, or a dict with any of
+                enabled, key (the ``prompt_cache_key`` to send) and send_key (defaults to
+                True for the OpenAI API or when a key is given, False otherwise).
+            base_url (str): API endpoint the requests go to.
+
+        Raises:
+            ValueError: If the configuration contains unknown settings.
+        """
+        settings = dict(_PROMPT_CACHE_SETTINGS)
+        if isinstance(config, dict):
+            unknown = set(config) - set(_PROMPT_CACHE_SETTINGS)
+            if unknown:
+                raise ValueError(f"Unknown prompt_cache settings: {sorted(unknown)}")
+            settings.update(config)
+        self.enabled = bool(config) and bool(settings['enabled'])
+        self.key = settings['key']
+        send_key = settings['send_key']
+        if send_key is None:
+            send_key = self.key is not None or base_url.rstrip('/') == DEFAULT_BASE_URL.rstrip('/')
+        self.send_key = self.enabled and bool(send_key)
+        self._lock = threading.Lock()
+        self._frozen: tuple[list[dict[str, Any]], list[dict[str, Any]]] | None = None
+        self._derived: tuple[str, list[Any], str] | None = None
+
+    def freeze_tools(self, tools: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Return the canonical, name-ordered form of a tool list.
+
+        The canonical list is cached and returned again as long as the same
+        tool dicts are passed, so it is built once per tool set rather than
+        once per request.
+
+        Args:
+            tools (List[Dict[str, Any]]): Tool schemas as registered.
+
+        Returns:
+            List[Dict[str, Any]]: Tools sorted by name with sorted keys.
+        """
+        with self._lock:
+            frozen = self._frozen
+            if frozen is not None and len(frozen[0]) == len(tools) and all(
+                    a is b for a, b in zip(frozen[0], tools)):
+                return frozen[1]
+            canonical = [canonicalize(tool) for tool in sorted(tools, key=_tool_name)]
+            self._frozen = (list(tools), canonical)
+            return canonical
+
+    def cache_key(self, model: str, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None) -> str:
+        """
+        Get the ``prompt_cache_key`` of a request.
+
+        Without an explicit key, the key is derived from the model, the tools
+        and the leading system messages, so every request of an agent shares it
+        until its prefix changes.
+
+        Args:
+            model (str): Model name.
+            messages (List[Dict[str, Any]]): Request messages.
+            tools (Optional[List[Dict[str, Any]]]): Frozen tool list, if any.
+
+        Returns:
+            str: The key to send.
+        """
+        if self.key is not None:
+            return self.key
+        head = []
+        for message in messages:
+            if message.get('role') != 'system':
+                break
+            head.append(message)
+        # The objects themselves are kept, so a replaced message cannot reuse the id of its predecessor.
+        prefix = [tools, *head]
+        with self._lock:
+            derived = self._derived
+            if derived is not None and derived[0] == model and len(derived[1]) == len(prefix) and all(
+                    a is b for a, b in zip(derived[1], prefix)):
+                return derived[2]
+        payload = canonical_dumps([model, tools or [], [message.get('content') for message in head]])
+        key = "nexus-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+        with self._lock:
+            self._derived = (model, prefix, key)
+        return key
+
+
+class PromptCacheStats:
+    """
+    Prompt and cached-token counts reported by the provider.
+
+    Attributes:
+        requests (int): Responses that reported usage.
+        prompt_tokens (int): Prompt tokens over those responses.
+        cached_tokens (int): Prompt tokens served from the provider's prompt cache.
+    """
+
+    def __init__(self):
+        """Initialize empty counters."""
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, usage: Any) -> None:
+        """
+        Add the ``usage`` of a completion or final stream chunk.
+
+        Args:
+            usage (Any): A ``CompletionUsage`` object or dict, or None.
+        """
+        if usage is None:
+            return
+        if not isinstance(usage, dict):
+            usage = usage.model_dump() if hasattr(usage, 'model_dump') else vars(usage)
+        details = usage.get('prompt_tokens_details') or {}
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage.get('prompt_tokens') or 0
+            self.cached_tokens += details.get('cached_tokens') or 0
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get the counters and the cached share of prompt tokens.
+
+        Returns:
+            Dict[str, Any]: Request, prompt and cached token counts and hit_rate.
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'prompt_tokens': self.prompt_tokens,
+                'cached_tokens': self.cached_tokens,
+                'hit_rate': self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+            }
@@ -0,0 +1,414 @@
+"""
+Rate limiter module for client-side throttling of LLM requests.
+
+Every AI instance in the process routes its completions through a limiter
+shared per ``(base_url, model)``, so a busy workflow (or the Architect
+Evaluator's thread pool) cannot starve other workflows or get the API key
+banned. A limiter combines:
+
+- token buckets for requests per minute and tokens per minute, and
+- an AIMD (additive increase, multiplicative decrease) concurrency limit that
+  shrinks on 429/5xx responses, grows back on success, and pauses all callers
+  for the duration of a provider ``Retry-After`` header.
+
+Limits are configured through the ``rate_limit`` section of an ``llm_config``:
+
+    llm_config = {
+        "api_key": "...",
+        "model": "gpt-4o",
+        "rate_limit": {
+            "requests_per_minute": 500,
+            "tokens_per_minute": 200000,
+            "max_concurrency": 32,
+        },
+    }
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import math
+import threading
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_SETTINGS = {
+    'requests_per_minute': None,
+    'tokens_per_minute': None,
+    'max_concurrency': 64,
+    'min_concurrency': 1,
+    'decrease_factor': 0.5,
+}
+
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously at ``rate_per_minute``.
+
+    Reservations may drive the balance negative; the caller is told how long to
+    wait until its reservation is covered, which keeps waiting callers in FIFO
+    order without a queue.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate_per_minute (float): Tokens added per minute; also the bucket capacity.
+        """
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_second)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` tokens and return the seconds to wait before using them.
+
+        Args:
+            amount (float): Number of tokens to reserve.
+
+        Returns:
+            float: Seconds until the reservation is covered (0 if immediately).
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate_per_second
+
+    def adjust(self, delta: float) -> None:
+        """Return (positive) or charge (negative) tokens after the fact."""
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class RateLimiter:
+    """
+    A shared limiter for one ``(base_url, model)`` pair.
+
+    Usable from threads and event loops at the same time. Callers waiting for a
+    slot queue in arrival order, whether sync or async: a thread blocks on an
+    event, a coroutine awaits a future of its own loop, and a freed slot is
+    handed to the longest waiting caller (as in `tool_execution.ToolLimiter`).
+
+    Attributes:
+        limit (float): Current adaptive concurrency limit.
+        in_flight (int): Requests currently holding a slot.
+        throttled (int): Number of 429/5xx responses observed.
+    """
+
+    def __init__(self, **settings: Any):
+        """
+        Initialize the limiter.
+
+        Args:
+            **settings: Any of requests_per_minute, tokens_per_minute,
+                max_concurrency, min_concurrency, decrease_factor.
+        """
+        self._lock = threading.Lock()
+        # Waiting callers in arrival order: threading.Event or asyncio.Future.
+        self._waiters: collections.deque[Any] = collections.deque()
+        self.settings = dict(_DEFAULT_SETTINGS)
+        self.request_bucket: TokenBucket | None = None
+        self.token_bucket: TokenBucket | None = None
+        self.limit = float(self.settings['max_concurrency'])
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.requests = 0
+        self.configure(**settings)
+
+    def configure(self, **settings: Any) -> None:
+        """
+        Update limiter settings in place.
+
+        Args:
+            **settings: Any of the settings accepted by the constructor.
+
+        Raises:
+            ValueError: If an unknown setting is given.
+        """
+        unknown = set(settings) - set(_DEFAULT_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown rate_limit settings: {sorted(unknown)}")
+        with self._lock:
+            self.settings.update({k: v for k, v in settings.items() if v is not None})
+            rpm = self.settings['requests_per_minute']
+            tpm = self.settings['tokens_per_minute']
+            # Rebuild a bucket only when its rate changes so re-applying the same
+            # configuration (e.g. when another agent is created) keeps its balance.
+            if (self.request_bucket.capacity if self.request_bucket else None) != (float(rpm) if rpm else None):
+                self.request_bucket = TokenBucket(rpm) if rpm else None
+            if (self.token_bucket.capacity if self.token_bucket else None) != (float(tpm) if tpm else None):
+                self.token_bucket = TokenBucket(tpm) if tpm else None
+            self.limit = min(max(self.limit, self.settings['min_concurrency']), self.settings['max_concurrency'])
+            granted = self._grant_slots()
+        self._wake(granted)
+
+    @property
+    def tracks_tokens(self) -> bool:
+        """Whether a tokens-per-minute budget is configured."""
+        return self.token_bucket is not None
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        """Reserve bucket capacity and return the wait in seconds (lock held)."""
+        wait = 0.0
+        if self.request_bucket is not None:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket is not None and estimated_tokens:
+            wait = max(wait, self.token_bucket.reserve(estimated_tokens))
+        return wait
+
+    def _slot_available(self) -> bool:
+        return self.in_flight < max(1, math.floor(self.limit)) and time.monotonic() >= self.paused_until
+
+    def _admit(self, waiter: Any) -> bool:
+        """Take a slot if nobody is waiting for one, else queue `waiter` (lock held)."""
+        if not self._waiters and self._slot_available():
+            self.in_flight += 1
+            return True
+        self._waiters.append(waiter)
+        return False
+
+    def _grant_slots(self) -> list[Any]:
+        """Take the free slots for the longest waiting callers and return them (lock held)."""
+        granted = []
+        while self._waiters and self._slot_available():
+            self.in_flight += 1
+            granted.append(self._waiters.popleft())
+        return granted
+
+    def _wake(self, granted: list[Any]) -> None:
+        """Tell waiting callers they were handed a slot; called without the lock."""
+        for waiter in granted:
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+                continue
+            try:
+                waiter.get_loop().call_soon_threadsafe(self._grant, waiter)
+            except RuntimeError:
+                # The waiter's loop is closed; pass the slot on.
+                self._return_slot()
+
+    def _grant(self, waiter: asyncio.Future) -> None:
+        """Hand a slot to a waiting coroutine, on its own loop."""
+        if waiter.done():
+            self._return_slot()
+        else:
+            waiter.set_result(True)
+
+    def _return_slot(self) -> None:
+        """Return a slot that was never used, e.g. one granted to a cancelled caller."""
+        with self._lock:
+            self.in_flight -= 1
+            granted = self._grant_slots()
+        self._wake(granted)
+
+    def _resume_after(self, pause: float) -> None:
+        """Hand out the slots freed by the end of a pause, `pause` seconds from now."""
+        timer = threading.Timer(pause, self._resume)
+        timer.daemon = True
+        timer.start()
+
+    def _resume(self) -> None:
+        """Timer callback of `_resume_after`."""
+        with self._lock:
+            pause = self.paused_until - time.monotonic()
+            granted = self._grant_slots() if pause <= 0 else []
+        if pause > 0:
+            self._resume_after(pause)  # extended meanwhile, or the timer fired early
+        self._wake(granted)
+
+    def _withdraw(self, waiter: Any) -> bool:
+        """Remove a waiter that gave up; return False if it was already handed a slot."""
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                return True
+            return False
+
+    def acquire(self, estimated_tokens: int = 0) -> None:
+        """
+        Block until a request may be sent.
+
+        Args:
+            estimated_tokens (int): Estimated prompt plus completion tokens.
+        """
+        event = threading.Event()
+        with self._lock:
+            admitted = self._admit(event)
+        if not admitted:
+            event.wait()
+        with self._lock:
+            wait = self._reserve(estimated_tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, estimated_tokens: int = 0) -> None:
+        """
+        Wait on the running event loop until a request may be sent.
+
+        Args:
+            estimated_tokens (int): Estimated prompt plus completion tokens.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        with self._lock:
+            admitted = self._admit(waiter)
+        if not admitted:
+            try:
+                await asyncio.wait({waiter})
+            except asyncio.CancelledError:
+                if not self._withdraw(waiter) and not waiter.cancel():
+                    self._return_slot()
+                raise
+        with self._lock:
+            wait = self._reserve(estimated_tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.release('error', estimated_tokens=estimated_tokens)
+                raise
+
+    def release(self,
+                outcome: str = 'success',
+                retry_after: float | None = None,
+                estimated_tokens: int = 0,
+                actual_tokens: int | None = None) -> None:
+        """
+        Return a slot and feed the outcome back into the AIMD controller.
+
+        Args:
+            outcome (str): 'success' grows the concurrency limit, 'throttled'
+                (429 or 5xx) shrinks it and pauses callers, 'error' leaves it unchanged.
+            retry_after (Optional[float]): Provider-requested pause in seconds.
+            estimated_tokens (int): Tokens reserved at acquire time.
+            actual_tokens (Optional[int]): Tokens actually used, from `usage`.
+        """
+        pause = 0.0
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            if outcome == 'throttled':
+                self.throttled += 1
+                self.limit = max(self.settings['min_concurrency'], self.limit * self.settings['decrease_factor'])
+                # Without a Retry-After header the retrying caller backs off on its own.
+                pause = retry_after or 0.0
+                self.paused_until = max(self.paused_until, time.monotonic() + pause)
+                logger.warning(
+                    f"LLM request throttled; concurrency limit now {self.limit:.1f}, pausing {pause:.1f}s"
+                )
+            elif outcome == 'success':
+                self.limit = min(self.settings['max_concurrency'], self.limit + 1.0 / max(self.limit, 1.0))
+            if self.token_bucket is not None and actual_tokens is not None:
+                self.token_bucket.adjust(estimated_tokens - actual_tokens)
+            granted = self._grant_slots()
+        if pause > 0:
+            self._resume_after(pause)
+        self._wake(granted)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get limiter state.
+
+        Returns:
+            Dict[str, Any]: Current concurrency limit, in-flight count and counters.
+        """
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'paused_for': max(0.0, self.paused_until - time.monotonic()),
+            }
+
+
+def estimate_tokens(params: dict[str, Any]) -> int:
+    """
+    Roughly estimate the tokens a request will consume.
+
+    Uses the common ~4 characters per token heuristic for the prompt and adds
+    the requested completion budget, if any.
+
+    Args:
+        params (Dict[str, Any]): Chat completion request parameters.
+
+    Returns:
+        int: Estimated total tokens.
+    """
+    prompt = json.dumps(params.get('messages', []), default=str)
+    if params.get('tools'):
+        prompt += json.dumps(params['tools'], default=str)
+    completion = params.get('max_completion_tokens') or params.get('max_tokens') or 0
+    return len(prompt) // 4 + int(completion)
+
+
+def retry_after_seconds(error: Exception) -> float | None:
+    """
+    Extract the provider-requested pause from an API error's response headers.
+
+    Args:
+        error (Exception): An ``openai.APIStatusError`` or similar.
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is absent.
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get('retry-after')
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            return None
+    return None
+
+
+_limiters: dict[tuple[str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(base_url: str, model: str, settings: dict[str, Any] | None = None) -> RateLimiter:
+    """
+    Return the process-wide limiter for a ``(base_url, model)`` pair.
+
+    Explicit settings are applied to the shared limiter, so the most recent
+    configuration for a model wins.
+
+    Args:
+        base_url (str): API endpoint.
+        model (str): Model name.
+        settings (Optional[Dict[str, Any]]): The ``rate_limit`` section of an llm_config.
+
+    Returns:
+        RateLimiter: The shared limiter.
+    """
+    key = (base_url, model)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(**(settings or {}))
+            _limiters[key] = limiter
+            return limiter
+    if settings:
+        limiter.configure(**settings)
+    return limiter
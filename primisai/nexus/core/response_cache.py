@@ -0,0 +1,303 @@
+"""
+Response cache module for reusing identical chat completions.
+
+Architect re-evaluations, CI runs and deterministic agents (``temperature: 0``)
+frequently send byte-for-byte identical requests. This module provides an
+opt-in two-tier cache for completions:
+
+- a bounded in-memory LRU tier (max entries / max bytes), and
+- an optional persistent SQLite tier, by default in the workflow root
+  (``nexus_workflows/llm_cache.sqlite3``).
+
+Both tiers honour a TTL and keep hit/miss counters. The cache is enabled per
+agent through the ``cache`` section of its ``llm_config`` (also from YAML):
+
+    llm_config = {
+        "api_key": "...",
+        "model": "gpt-4o",
+        "temperature": 0,
+        "cache": {"ttl": 86400, "max_entries": 2048, "disk": True},
+    }
+
+``"cache": True`` enables the cache with default settings. The same class
+backs the tool result cache (see `tool_execution`), which keeps its disk tier
+in ``nexus_workflows/tool_cache.sqlite3``.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+DEFAULT_CACHE_PATH = Path("nexus_workflows") / "llm_cache.sqlite3"
+DEFAULT_TOOL_CACHE_PATH = Path("nexus_workflows") / "tool_cache.sqlite3"
+
+_DEFAULT_SETTINGS = {
+    'ttl': None,
+    'max_entries': 1024,
+    'max_bytes': 64 * 1024 * 1024,
+    'disk': False,
+    'path': None,
+    'disk_max_entries': 100_000,
+    'disk_max_bytes': 1024 * 1024 * 1024,
+}
+
+
+def request_fingerprint(params: dict[str, Any], namespace: str = "") -> str:
+    """
+    Compute a stable hash of a request payload.
+
+    Keys are sorted and separators fixed so logically identical payloads hash
+    identically regardless of dict insertion order.
+
+    Args:
+        params (Dict[str, Any]): The request parameters.
+        namespace (str): Extra scope mixed into the hash (e.g. the endpoint URL).
+
+    Returns:
+        str: Hex SHA-256 digest of the canonical payload.
+    """
+    payload = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False)
+    return hashlib.sha256(f"{namespace}\n{payload}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    A thread-safe two-tier (memory LRU + SQLite) cache of serialized responses.
+
+    Attributes:
+        hits (int): Lookups served from either tier.
+        misses (int): Lookups not found or expired in both tiers.
+        memory_hits (int): Lookups served from the memory tier.
+        disk_hits (int): Lookups served from the disk tier.
+        evictions (int): Entries dropped to respect size limits.
+    """
+
+    def __init__(self,
+                 ttl: float | None = None,
+                 max_entries: int = 1024,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 disk: bool = False,
+                 path: str | Path | None = None,
+                 disk_max_entries: int = 100_000,
+                 disk_max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl (Optional[float]): Seconds an entry stays valid; None for no expiry.
+            max_entries (int): Maximum entries in the memory tier.
+            max_bytes (int): Maximum total payload bytes in the memory tier.
+            disk (bool): Whether to enable the persistent SQLite tier.
+            path (Optional[Union[str, Path]]): SQLite file; defaults to the workflow root.
+            disk_max_entries (int): Maximum entries in the disk tier.
+            disk_max_bytes (int): Maximum total payload bytes in the disk tier.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_max_entries = disk_max_entries
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple[float | None, str]]" = OrderedDict()
+        self._memory_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        self.path: Path | None = None
+        self._db: sqlite3.Connection | None = None
+        if disk:
+            self.path = Path(path) if path else DEFAULT_CACHE_PATH
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+            self._db.commit()
+
+    def get(self, key: str) -> str | None:
+        """
+        Look up a payload, promoting disk hits into the memory tier.
+
+        Args:
+            key (str): Request fingerprint.
+
+        Returns:
+            Optional[str]: The cached payload, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return payload
+                self._drop_memory(key)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    payload, expires_at = row
+                    if expires_at is None or expires_at > now:
+                        self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._store_memory(key, payload, expires_at)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return payload
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, payload: str) -> None:
+        """
+        Store a payload in every enabled tier.
+
+        Args:
+            key (str): Request fingerprint.
+            payload (str): Serialized response.
+        """
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._store_memory(key, payload, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, payload, size, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload), expires_at, now)
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _store_memory(self, key: str, payload: str, expires_at: float | None) -> None:
+        if len(payload) > self.max_bytes:
+            return
+        if key in self._memory:
+            self._drop_memory(key)
+        self._memory[key] = (expires_at, payload)
+        self._memory_bytes += len(payload)
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+            oldest = next(iter(self._memory))
+            self._drop_memory(oldest)
+            self.evictions += 1
+
+    def _drop_memory(self, key: str) -> None:
+        _, payload = self._memory.pop(key)
+        self._memory_bytes -= len(payload)
+
+    def _evict_disk(self, now: float) -> None:
+        self._db.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        while count > self.disk_max_entries or total > self.disk_max_bytes:
+            key, size = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get cache counters and sizes.
+
+        Returns:
+            Dict[str, Any]: Hit/miss counters and the current memory-tier size.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'evictions': self.evictions,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+            }
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self.hits = self.misses = self.memory_hits = self.disk_hits = self.evictions = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self) -> None:
+        """Close the SQLite connection of the disk tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_caches: dict[tuple, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(config: bool | dict[str, Any] | None,
+                       scope: str = 'llm',
+                       default_path: Path = DEFAULT_CACHE_PATH) -> ResponseCache | None:
+    """
+    Return the shared cache for a ``cache`` configuration value.
+
+    Instances with identical settings share one cache, so every agent that opts
+    in with the same configuration benefits from the others' entries.
+
+    Args:
+        config (Optional[Union[bool, Dict[str, Any]]]): False/None to disable,
+            True for defaults, or a dict of `ResponseCache` settings.
+        scope (str): What is cached (``'llm'`` or ``'tool'``); scopes never share a cache.
+        default_path (Path): SQLite file of the disk tier when no path is configured.
+
+    Returns:
+        Optional[ResponseCache]: The shared cache, or None if caching is disabled.
+
+    Raises:
+        ValueError: If the configuration contains unknown settings.
+    """
+    if not config:
+        return None
+    settings = dict(_DEFAULT_SETTINGS)
+    if isinstance(config, dict):
+        unknown = set(config) - set(_DEFAULT_SETTINGS) - {'enabled'}
+        if unknown:
+            raise ValueError(f"Unknown cache settings: {sorted(unknown)}")
+        if not config.get('enabled', True):
+            return None
+        settings.update({k: v for k, v in config.items() if k != 'enabled'})
+    if settings['disk'] and settings['path'] is None:
+        settings['path'] = str(default_path)
+    if settings['path'] is not None:
+        settings['path'] = str(Path(settings['path']).resolve())
+
+    key = (scope,) + tuple(sorted(settings.items()))
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = ResponseCache(**settings)
+            _caches[key] = cache
+        return cache
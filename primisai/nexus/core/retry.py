@@ -0,0 +1,248 @@
+"""
+Retry module for backoff and hedging of LLM requests.
+
+A single slow or failed completion stalls every level of a supervisor
+hierarchy waiting on it. This module provides the policies the AI layer uses
+to bound that cost:
+
+- ``RetryPolicy``: retries of transient failures with exponential backoff and
+  jitter (configured by the ``retry`` section of an ``llm_config``), and
+- ``HedgePolicy``: hedged requests, which fire a duplicate request when a call
+  outlives a latency percentile tracked per model and keep whichever response
+  arrives first (configured by the ``hedge`` section).
+
+    llm_config = {
+        "api_key": "...",
+        "model": "gpt-4o",
+        "retry": {"max_retries": 3, "initial_backoff": 0.5, "max_backoff": 8},
+        "hedge": {"percentile": 0.95, "min_samples": 20},
+    }
+
+Latency samples and hedge/retry counters are kept by a ``LatencyTracker``
+shared per ``(base_url, model)``.
+"""
+
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+_RETRY_SETTINGS = {
+    'max_retries': 2,
+    'initial_backoff': 0.5,
+    'max_backoff': 8.0,
+    'multiplier': 2.0,
+    'jitter': 1.0,
+}
+
+_HEDGE_SETTINGS = {
+    'enabled': True,
+    'percentile': 0.95,
+    'min_samples': 20,
+    'min_delay': 0.1,
+}
+
+
+def _merge_settings(defaults: dict[str, Any], config: dict[str, Any] | None, section: str) -> dict[str, Any]:
+    """Merge a config section over its defaults, rejecting unknown keys."""
+    settings = dict(defaults)
+    if config:
+        unknown = set(config) - set(defaults)
+        if unknown:
+            raise ValueError(f"Unknown {section} settings: {sorted(unknown)}")
+        settings.update(config)
+    return settings
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with jitter for transient request failures.
+
+    The n-th retry waits ``min(max_backoff, initial_backoff * multiplier ** (n - 1))``
+    seconds, of which a random fraction up to ``jitter`` is subtracted so that
+    callers failing together do not retry in lockstep.
+    """
+
+    def __init__(self, config: dict[str, Any] | None = None):
+        """
+        Initialize the policy.
+
+        Args:
+            config (Optional[Dict[str, Any]]): The ``retry`` section of an llm_config
+                with any of max_retries, initial_backoff, max_backoff, multiplier, jitter.
+
+        Raises:
+            ValueError: If the configuration contains unknown settings.
+        """
+        settings = _merge_settings(_RETRY_SETTINGS, config, 'retry')
+        self.max_retries = int(settings['max_retries'])
+        self.initial_backoff = float(settings['initial_backoff'])
+        self.max_backoff = float(settings['max_backoff'])
+        self.multiplier = float(settings['multiplier'])
+        self.jitter = min(max(float(settings['jitter']), 0.0), 1.0)
+
+    def delay(self, attempt: int) -> float:
+        """
+        Compute the pause before a retry.
+
+        Args:
+            attempt (int): The retry number, starting at 1.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        backoff = min(self.max_backoff, self.initial_backoff * self.multiplier**(attempt - 1))
+        return backoff * (1.0 - self.jitter * random.random())
+
+
+class HedgePolicy:
+    """
+    When to fire a duplicate ("hedged") request for a slow completion.
+
+    A hedge fires once a request has been outstanding longer than the
+    ``percentile`` latency observed for the model, but only after
+    ``min_samples`` latencies have been recorded.
+    """
+
+    def __init__(self, config: bool | dict[str, Any] | None = None):
+        """
+        Initialize the policy.
+
+        Args:
+            config (Optional[Union[bool, Dict[str, Any]]]): The ``hedge`` section of an
+                llm_config: False/None to disable, True for defaults, or a dict with
+                any of enabled, percentile, min_samples, min_delay.
+
+        Raises:
+            ValueError: If the configuration contains unknown settings.
+        """
+        settings = _merge_settings(_HEDGE_SETTINGS, config if isinstance(config, dict) else None, 'hedge')
+        self.enabled = bool(config) and bool(settings['enabled'])
+        self.percentile = float(settings['percentile'])
+        self.min_samples = int(settings['min_samples'])
+        self.min_delay = float(settings['min_delay'])
+
+    def delay(self, tracker: "LatencyTracker") -> float | None:
+        """
+        Get the time after which a request should be hedged.
+
+        Args:
+            tracker (LatencyTracker): Latency history of the model.
+
+        Returns:
+            Optional[float]: Seconds to wait before hedging, or None to not hedge.
+        """
+        if not self.enabled:
+            return None
+        latency = tracker.percentile(self.percentile, self.min_samples)
+        if latency is None:
+            return None
+        return max(self.min_delay, latency)
+
+
+class LatencyTracker:
+    """
+    A rolling window of request latencies plus retry and hedge counters.
+
+    Attributes:
+        retries (int): Retries performed after transient failures.
+        hedged (int): Requests for which a hedge was fired.
+        hedge_wins (int): Hedged requests where the duplicate answered first.
+    """
+
+    def __init__(self, window: int = 500):
+        """
+        Initialize an empty tracker.
+
+        Args:
+            window (int): Number of most recent latencies to keep.
+        """
+        self._lock = threading.Lock()
+        self._samples: deque[float] = deque(maxlen=window)
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, latency: float) -> None:
+        """Add the latency of a successful request, in seconds."""
+        with self._lock:
+            self._samples.append(latency)
+
+    def count(self, counter: str) -> None:
+        """Increment one of the retries/hedged/hedge_wins counters."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def percentile(self, q: float, min_samples: int = 1) -> float | None:
+        """
+        Get a latency percentile.
+
+        Args:
+            q (float): Percentile as a fraction (e.g. 0.95).
+            min_samples (int): Minimum samples required for a meaningful answer.
+
+        Returns:
+            Optional[float]: The latency in seconds, or None with too few samples.
+        """
+        with self._lock:
+            if not self._samples or len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get latency percentiles and counters.
+
+        Returns:
+            Dict[str, Any]: Sample count, p50/p95/p99 latency and retry/hedge counters.
+        """
+        with self._lock:
+            samples = len(self._samples)
+            retries, hedged, hedge_wins = self.retries, self.hedged, self.hedge_wins
+        return {
+            'samples': samples,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'retries': retries,
+            'hedged': hedged,
+            'hedge_wins': hedge_wins,
+        }
+
+
+_trackers: dict[tuple[str, str], LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(base_url: str, model: str) -> LatencyTracker:
+    """
+    Return the process-wide latency tracker for a ``(base_url, model)`` pair.
+
+    Args:
+        base_url (str): API endpoint.
+        model (str): Model name.
+
+    Returns:
+        LatencyTracker: The shared tracker.
+    """
+    with _trackers_lock:
+        tracker = _trackers.get((base_url, model))
+        if tracker is None:
+            tracker = LatencyTracker()
+            _trackers[(base_url, model)] = tracker
+        return tracker
+
+
+_hedge_executor: ThreadPoolExecutor | None = None
+_hedge_executor_lock = threading.Lock()
+
+
+def hedge_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool running hedged sync requests."""
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="nexus-hedge")
+        return _hedge_executor
@@ -0,0 +1,113 @@
+"""
+Streaming module for assembling streamed chat completions.
+
+When a completion is requested with ``stream=True`` the provider sends a
+sequence of ``ChatCompletionChunk`` objects. Content arrives as text deltas and
+tool calls arrive as fragments keyed by their index (the id and function name
+in the first fragment, the JSON arguments spread over the following ones). This
+module rebuilds a regular ``ChatCompletion`` from those chunks so the
+tool-calling loops in Agent and Supervisor can treat streamed and non-streamed
+responses alike.
+"""
+
+from typing import Any
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+
+class StreamAccumulator:
+    """
+    Accumulates streamed chunks into a complete chat completion.
+
+    Example:
+        >>> accumulator = StreamAccumulator()
+        >>> for chunk in ai.stream_response(messages):
+        ...     delta = accumulator.add(chunk)
+        ...     if delta:
+        ...         print(delta, end="")
+        >>> choice = accumulator.to_completion().choices[0]
+    """
+
+    def __init__(self):
+        """Initialize an empty accumulator."""
+        self.id: str | None = None
+        self.model: str | None = None
+        self.created: int = 0
+        self.content_parts: list[str] = []
+        self.tool_calls: dict[int, dict[str, Any]] = {}
+        self.finish_reason: str | None = None
+        self.usage: Any = None
+
+    def add(self, chunk: ChatCompletionChunk) -> str | None:
+        """
+        Fold a chunk into the accumulated message.
+
+        Args:
+            chunk (ChatCompletionChunk): The next chunk of the stream.
+
+        Returns:
+            Optional[str]: The content delta carried by the chunk, if any.
+        """
+        self.id = self.id or chunk.id
+        self.model = self.model or chunk.model
+        self.created = self.created or chunk.created
+        if getattr(chunk, 'usage', None) is not None:
+            self.usage = chunk.usage
+
+        if not chunk.choices:
+            return None
+
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+
+        delta = choice.delta
+        if delta is None:
+            return None
+
+        for tool_call_delta in delta.tool_calls or []:
+            entry = self.tool_calls.setdefault(tool_call_delta.index, {
+                'id': None,
+                'type': 'function',
+                'function': {'name': '', 'arguments': ''}
+            })
+            if tool_call_delta.id:
+                entry['id'] = tool_call_delta.id
+            if tool_call_delta.function is not None:
+                if tool_call_delta.function.name:
+                    entry['function']['name'] += tool_call_delta.function.name
+                if tool_call_delta.function.arguments:
+                    entry['function']['arguments'] += tool_call_delta.function.arguments
+
+        if delta.content:
+            self.content_parts.append(delta.content)
+            return delta.content
+        return None
+
+    @property
+    def content(self) -> str | None:
+        """The text content received so far, or None if no content was streamed."""
+        return "".join(self.content_parts) if self.content_parts else None
+
+    def to_completion(self) -> ChatCompletion:
+        """
+        Build the ChatCompletion equivalent to the accumulated stream.
+
+        Returns:
+            ChatCompletion: A completion with a single choice holding the full
+                message and tool calls.
+        """
+        message: dict[str, Any] = {'role': 'assistant', 'content': self.content}
+        if self.tool_calls:
+            message['tool_calls'] = [self.tool_calls[index] for index in sorted(self.tool_calls)]
+
+        finish_reason = self.finish_reason or ('tool_calls' if self.tool_calls else 'stop')
+        completion: dict[str, Any] = {
+            'id': self.id or 'stream',
+            'object': 'chat.completion',
+            'created': self.created,
+            'model': self.model or '',
+            'choices': [{'index': 0, 'finish_reason': finish_reason, 'message': message}],
+        }
+        if self.usage is not None:
+            completion['usage'] = self.usage.model_dump() if hasattr(self.usage, 'model_dump') else self.usage
+        return ChatCompletion.model_validate(completion)
@@ -5,14 +5,20 @@ This module provides a Supervisor class that coordinates interactions between
 users and multiple specialized AI agents.
 """
 
+import asyncio
 import logging
 import json, uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Iterator, AsyncIterator, Awaitable
 from openai.types.chat import ChatCompletionMessage
 from primisai.nexus.core import AI
 from primisai.nexus.core import Agent
-from primisai.nexus.history import HistoryManager, EntityType
+from primisai.nexus.core.streaming import StreamAccumulator
+from primisai.nexus.core.context import ContextWindow, build_context_window
+from primisai.nexus.core.compaction import Compactor, build_compactor
+from primisai.nexus.core.tool_execution import concurrency_limit
+from primisai.nexus.history import EntityType, get_history_manager
 from primisai.nexus.utils import Debugger
 
 logger = logging.getLogger(__name__)
@@ -36,7 +42,13 @@ class Supervisor(AI):
                  workflow_id: str | None = None,
                  is_assistant: bool = False,
                  system_message: str | None = None, 
-                 use_agents: bool = True):
+                 use_agents: bool = True,
+                 context_window: int | dict[str, Any] | ContextWindow | None = None,
+                 compaction: dict[str, Any] | Compactor | None = None,
+                 parallel_delegation: bool | int = False,
+                 history_durability: str | None = None,
+                 history_backend: str | None = None,
+                 history_root: str | None = None):
         """
         Initialize the Supervisor instance.
 
@@ -47,9 +59,28 @@ class Supervisor(AI):
             is_assistant (bool): Whether this is an assistant supervisor.
             system_message (Optional[str]): The initial system message for the agent.
             use_agents (bool): Whether to use agents or not.
+            context_window (Optional[Union[int, Dict[str, Any], ContextWindow]]): Token budget
+                for the chat history sent with each request: a token count, a dict of
+                `ContextWindow` settings, or a ContextWindow. None keeps the full history.
+            compaction (Optional[Union[Dict[str, Any], Compactor]]): Rolling-summary settings
+                (see `Compactor`) folding old turns into a summary once the history grows
+                past a token threshold. None disables compaction.
+            parallel_delegation (Union[bool, int]): Run the delegations of one LLM response
+                concurrently: True for up to 8 sub-agents at once, or the maximum number of
+                concurrent sub-agents. Calls to the same agent still run in order.
+            history_durability (Optional[str]): When the workflow's history records are
+                written (main supervisor only): ``"message"`` (default), ``"interval"`` or
+                ``"turn"`` (see `HistoryManager`).
+            history_backend (Optional[str]): Where the workflow's history is stored (main
+                supervisor only): ``"jsonl"`` (default), ``"sqlite"`` or ``"memory"`` (see
+                `storage`).
+            history_root (Optional[str]): Directory holding the workflows' histories (main
+                supervisor only); ``nexus_workflows`` by default.
 
         Raises:
-            ValueError: If the name is empty or if workflow management rules are violated.
+            ValueError: If the name is empty, if workflow management rules are violated
+                or if the context window, compaction, parallel_delegation or history
+                settings are invalid.
         """
         super().__init__(llm_config=llm_config)
 
@@ -59,6 +90,9 @@ class Supervisor(AI):
         self.name = name
         self.is_assistant = is_assistant
         self.workflow_id = workflow_id
+        self._history_backend = history_backend or "jsonl"
+        self._history_root = Path(history_root) if history_root is not None else Path("nexus_workflows")
+        history_settings = {"durability": history_durability, "backend": history_backend, "root": history_root}
         
         self._pending_registrations: list[Union[Agent, 'Supervisor']] = []
         self.system_message = system_message if system_message is not None else self._get_default_system_message()
@@ -66,23 +100,27 @@ class Supervisor(AI):
         if not is_assistant:
             if workflow_id:
                 try:
-                    self.history_manager = HistoryManager(workflow_id)
+                    self.history_manager = get_history_manager(workflow_id, **history_settings)
                 # except:
                 except Exception:
                     self._initialize_workflow()
-                    self.history_manager = HistoryManager(workflow_id)
+                    self.history_manager = get_history_manager(workflow_id, **history_settings)
                 if not self.history_manager.has_system_message(self.name):
                     self._initialize_chat_history()
             else:
                 self._initialize_workflow()
-                self.history_manager = HistoryManager(self.workflow_id)
+                self.history_manager = get_history_manager(self.workflow_id, **history_settings)
                 self._initialize_chat_history()
         else:
             self.history_manager = None
         
         self.registered_agents: list[Union[Agent, 'Supervisor']] = []
+        self._agent_index: dict[str, Union[Agent, 'Supervisor']] = {}
         self.available_tools: list[dict[str, Any]] = []
         self.use_agents = use_agents
+        self.context_window = build_context_window(context_window)
+        self.compactor = build_compactor(compaction)
+        self.max_delegation_concurrency = concurrency_limit(parallel_delegation, 'parallel_delegation')
         
         self.chat_history: list[dict[str, str]] = []
         
@@ -155,6 +193,7 @@ class Supervisor(AI):
             agent.set_workflow_id(self.workflow_id)
         
         self.registered_agents.append(agent)
+        self._agent_index.setdefault(self._normalize_agent_name(agent.name), agent)
         self._add_agent_tool(agent)
         # self.system_message += f"{agent.name}: {agent.system_message}\n"
     
@@ -167,7 +206,7 @@ class Supervisor(AI):
         """
         self.workflow_id = workflow_id
         self.debugger.update_workflow_id(workflow_id)
-        self.history_manager = HistoryManager(workflow_id)
+        self.history_manager = get_history_manager(workflow_id)
         self._initialize_chat_history()
         self._process_pending_registrations()
         
@@ -236,12 +275,16 @@ class Supervisor(AI):
         if not self.workflow_id:
             self.workflow_id = str(uuid.uuid4())
         
-        workflow_path = Path("nexus_workflows") / self.workflow_id
+        if self._history_backend == "memory":
+            return  # nothing on disk
+
+        workflow_path = self._history_root / self.workflow_id
         workflow_path.mkdir(parents=True, exist_ok=True)
         
-        history_file = workflow_path / "history.jsonl"
-        if not history_file.exists():
-            history_file.touch()
+        if self._history_backend == "jsonl":
+            history_file = workflow_path / "history.jsonl"
+            if not history_file.exists():
+                history_file.touch()
 
     def get_registered_agents(self) -> list[str]:
         """
@@ -267,6 +310,56 @@ class Supervisor(AI):
         Returns:
             str: The response from the delegated agent.
 
+        Raises:
+            ValueError: If no matching agent is found for delegation or if the message structure is unexpected.
+        """
+        agent, target_agent_name, agent_query = self._resolve_delegation(function_call, supervisor_chain)
+        agent_response = agent.chat(query=agent_query, sender_name=self.name)
+        self.debugger.log(f"[RESPONSE] {target_agent_name}: {agent_response}")
+        return agent_response
+
+    async def adelegate_to_agent(self,
+                                 function_call,
+                                 parent_msg_id: str,
+                                 supervisor_chain: list[str] | None = None) -> str:
+        """
+        Delegate a task to the appropriate agent, awaiting its `achat` coroutine.
+
+        Args:
+            function_call: A single tool call object (from tool_calls array).
+            parent_msg_id (str): ID of the parent message in history.
+            supervisor_chain (Optional[List[str]]): Chain of supervisors involved in delegation.
+
+        Returns:
+            str: The response from the delegated agent.
+
+        Raises:
+            ValueError: If no matching agent is found for delegation or if the message structure is unexpected.
+        """
+        agent, target_agent_name, agent_query = self._resolve_delegation(function_call, supervisor_chain)
+        agent_response = await agent.achat(query=agent_query, sender_name=self.name)
+        self.debugger.log(f"[RESPONSE] {target_agent_name}: {agent_response}")
+        return agent_response
+
+    @staticmethod
+    def _normalize_agent_name(name: str) -> str:
+        """Normalize an agent name the way delegation tool names are matched."""
+        return name.lower().replace(" ", "_")
+
+    def _resolve_delegation(self,
+                            function_call,
+                            supervisor_chain: list[str] | None = None) -> tuple[Union[Agent, 'Supervisor'], str, str]:
+        """
+        Find the agent targeted by a delegation call and build its query.
+
+        Args:
+            function_call: A single tool call object (from tool_calls array).
+            supervisor_chain (Optional[List[str]]): Chain of supervisors involved in delegation.
+
+        Returns:
+            Tuple[Union[Agent, Supervisor], str, str]: The target agent, its normalized
+                name and the query to send to it.
+
         Raises:
             ValueError: If no matching agent is found for delegation or if the message structure is unexpected.
         """
@@ -287,26 +380,17 @@ class Supervisor(AI):
         self.debugger.log(f"[CONTEXT] {context}")
         self.debugger.log(f"[QUERY] {query}")
         
-        current_chain = supervisor_chain or []
-        current_chain.append(self.name)
-
-        for agent in self.registered_agents:
-            normalized_agent_name = agent.name.lower().replace(" ", "_")
-            normalized_target_name = target_agent_name.replace(" ", "_")
-            if normalized_agent_name == normalized_target_name:
-                agent_response = agent.chat(
-                    query=f"CONTEXT:\n{context}\n\nQUERY:\n{query}",
-                    sender_name=self.name
-                )
-                self.debugger.log(f"[RESPONSE] {target_agent_name}: {agent_response}")
-                return agent_response
+        agent = self._agent_index.get(self._normalize_agent_name(target_agent_name))
+        if agent is not None:
+            return agent, target_agent_name, f"CONTEXT:\n{context}\n\nQUERY:\n{query}"
 
         raise ValueError(f"No agent found with name '{target_agent_name}'")
 
     def chat(self, 
              query: str,
              sender_name: str | None = None,
-             supervisor_chain: list[str] | None = None) -> str:
+             supervisor_chain: list[str] | None = None,
+             stream: bool = False) -> str | Iterator[str]:
         """
         Process user input and generate a response using the appropriate agents.
 
@@ -314,13 +398,287 @@ class Supervisor(AI):
             query (str): The user's input query.
             sender_name (Optional[str]): Name of the sender (for assistant supervisors).
             supervisor_chain (Optional[List[str]]): Chain of supervisors in delegation.
+            stream (bool): If True, return a generator yielding the supervisor's
+                content deltas as they arrive. Delegated agents run non-streaming.
+
+        Returns:
+            Union[str, Iterator[str]]: The final response to the user's query, or a
+                generator of content deltas when streaming.
+
+        Raises:
+            RuntimeError: If there's an error in processing the user input.
+        """
+        if stream:
+            return self._chat_stream(query, sender_name, supervisor_chain)
+
+        user_msg_id, current_chain = self._start_turn(query, sender_name, supervisor_chain)
+
+        try:
+            while True:
+                supervisor_response = self.generate_response(self._fit_context(), tools=self.available_tools, use_tools=self.use_agents).choices[0]
+
+                if not supervisor_response.finish_reason == "tool_calls":
+                    return self._finish_turn(supervisor_response.message.content, user_msg_id, current_chain)
+
+                self._run_delegations(supervisor_response.message.tool_calls, user_msg_id, current_chain)
+
+        except Exception as e:
+            error_msg = f"Error in processing user input: {str(e)}"
+            self.debugger.log(f"[ERROR] {error_msg}", level="error")
+            raise RuntimeError(error_msg)
+
+    def achat(self,
+              query: str,
+              sender_name: str | None = None,
+              supervisor_chain: list[str] | None = None,
+              stream: bool = False) -> Awaitable[str] | AsyncIterator[str]:
+        """
+        Process user input on the running event loop.
+
+        LLM completions and nested delegations (via each agent's `achat`) are
+        awaited instead of blocking a thread. Behaviour and history recording
+        are identical to `chat`.
+
+        Args:
+            query (str): The user's input query.
+            sender_name (Optional[str]): Name of the sender (for assistant supervisors).
+            supervisor_chain (Optional[List[str]]): Chain of supervisors in delegation.
+            stream (bool): If True, return an async generator yielding the
+                supervisor's content deltas instead of a coroutine.
 
         Returns:
-            str: The final response to the user's query.
+            Union[Awaitable[str], AsyncIterator[str]]: A coroutine resolving to the
+                final response, or an async generator of content deltas when streaming.
+
+        Raises:
+            RuntimeError: If there's an error in processing the user input.
+        """
+        if stream:
+            return self._achat_stream(query, sender_name, supervisor_chain)
+        return self._achat(query, sender_name, supervisor_chain)
+
+    async def _achat(self,
+                     query: str,
+                     sender_name: str | None = None,
+                     supervisor_chain: list[str] | None = None) -> str:
+        """Coroutine implementing the non-streaming `achat`."""
+        user_msg_id, current_chain = self._start_turn(query, sender_name, supervisor_chain)
+
+        try:
+            while True:
+                supervisor_response = (await self.agenerate_response(
+                    await self._afit_context(), tools=self.available_tools, use_tools=self.use_agents
+                )).choices[0]
+
+                if not supervisor_response.finish_reason == "tool_calls":
+                    return self._finish_turn(supervisor_response.message.content, user_msg_id, current_chain)
+
+                await self._arun_delegations(supervisor_response.message.tool_calls, user_msg_id, current_chain)
+
+        except Exception as e:
+            error_msg = f"Error in processing user input: {str(e)}"
+            self.debugger.log(f"[ERROR] {error_msg}", level="error")
+            raise RuntimeError(error_msg)
+
+    def _chat_stream(self,
+                     query: str,
+                     sender_name: str | None = None,
+                     supervisor_chain: list[str] | None = None) -> Iterator[str]:
+        """
+        Generator implementing `chat(stream=True)`.
+
+        Args:
+            query (str): The user's input query.
+            sender_name (Optional[str]): Name of the sender (for assistant supervisors).
+            supervisor_chain (Optional[List[str]]): Chain of supervisors in delegation.
+
+        Yields:
+            str: Content deltas of the supervisor's responses.
 
         Raises:
             RuntimeError: If there's an error in processing the user input.
         """
+        user_msg_id, current_chain = self._start_turn(query, sender_name, supervisor_chain)
+
+        try:
+            while True:
+                accumulator = StreamAccumulator()
+                for chunk in self.stream_response(self._fit_context(), tools=self.available_tools, use_tools=self.use_agents):
+                    delta = accumulator.add(chunk)
+                    if delta:
+                        yield delta
+                supervisor_response = accumulator.to_completion().choices[0]
+
+                if not supervisor_response.finish_reason == "tool_calls":
+                    self._finish_turn(supervisor_response.message.content, user_msg_id, current_chain)
+                    return
+
+                self._run_delegations(supervisor_response.message.tool_calls, user_msg_id, current_chain)
+
+        except Exception as e:
+            error_msg = f"Error in processing user input: {str(e)}"
+            self.debugger.log(f"[ERROR] {error_msg}", level="error")
+            raise RuntimeError(error_msg)
+
+    async def _achat_stream(self,
+                            query: str,
+                            sender_name: str | None = None,
+                            supervisor_chain: list[str] | None = None) -> AsyncIterator[str]:
+        """
+        Async generator implementing `achat(stream=True)`.
+
+        Args:
+            query (str): The user's input query.
+            sender_name (Optional[str]): Name of the sender (for assistant supervisors).
+            supervisor_chain (Optional[List[str]]): Chain of supervisors in delegation.
+
+        Yields:
+            str: Content deltas of the supervisor's responses.
+
+        Raises:
+            RuntimeError: If there's an error in processing the user input.
+        """
+        user_msg_id, current_chain = self._start_turn(query, sender_name, supervisor_chain)
+
+        try:
+            while True:
+                accumulator = StreamAccumulator()
+                async for chunk in self.astream_response(
+                        await self._afit_context(), tools=self.available_tools, use_tools=self.use_agents):
+                    delta = accumulator.add(chunk)
+                    if delta:
+                        yield delta
+                supervisor_response = accumulator.to_completion().choices[0]
+
+                if not supervisor_response.finish_reason == "tool_calls":
+                    self._finish_turn(supervisor_response.message.content, user_msg_id, current_chain)
+                    return
+
+                await self._arun_delegations(supervisor_response.message.tool_calls, user_msg_id, current_chain)
+
+        except Exception as e:
+            error_msg = f"Error in processing user input: {str(e)}"
+            self.debugger.log(f"[ERROR] {error_msg}", level="error")
+            raise RuntimeError(error_msg)
+
+    def _run_delegations(self, tool_calls, user_msg_id: str | None, current_chain: list[str]) -> None:
+        """
+        Delegate the tool calls of one LLM response and record the agents' answers.
+
+        With parallel delegation enabled, calls to different agents run on
+        separate threads while calls to the same agent keep their order. The
+        tool-call records are persisted before the agents start and the answers
+        after all of them finish, both in tool-call order, so the history is
+        threaded the same way as in sequential mode.
+
+        Args:
+            tool_calls: Tool call objects from the supervisor's LLM response.
+            user_msg_id (Optional[str]): ID of the query message of this turn.
+            current_chain (List[str]): Chain of supervisors in delegation.
+
+        Raises:
+            Exception: The error of the first failed delegation, after the answers
+                before it have been recorded.
+        """
+        if self.max_delegation_concurrency <= 1 or len(tool_calls) < 2:
+            for tool_call, tool_msg_id in self._record_delegation_calls(tool_calls, user_msg_id, current_chain):
+                agent_feedback = self.delegate_to_agent(tool_call, tool_msg_id, supervisor_chain=current_chain)
+                self._record_delegation_result(tool_call, agent_feedback, tool_msg_id, current_chain)
+            return
+
+        calls = list(self._record_delegation_calls(tool_calls, user_msg_id, current_chain))
+        outcomes: list[tuple[bool, Any] | None] = [None] * len(calls)
+
+        def run(indexes: list[int]) -> None:
+            for index in indexes:
+                tool_call, tool_msg_id = calls[index]
+                try:
+                    outcomes[index] = (True, self.delegate_to_agent(
+                        tool_call, tool_msg_id, supervisor_chain=current_chain))
+                except Exception as e:
+                    outcomes[index] = (False, e)
+                    return
+
+        groups = self._group_delegations(calls)
+        with ThreadPoolExecutor(max_workers=min(self.max_delegation_concurrency, len(groups)),
+                                thread_name_prefix=f"nexus-{self.name}") as pool:
+            list(pool.map(run, groups))
+        self._record_delegation_outcomes(calls, outcomes, current_chain)
+
+    async def _arun_delegations(self, tool_calls, user_msg_id: str | None, current_chain: list[str]) -> None:
+        """Async variant of `_run_delegations`; parallel delegations are gathered on the running loop."""
+        if self.max_delegation_concurrency <= 1 or len(tool_calls) < 2:
+            for tool_call, tool_msg_id in self._record_delegation_calls(tool_calls, user_msg_id, current_chain):
+                agent_feedback = await self.adelegate_to_agent(tool_call, tool_msg_id, supervisor_chain=current_chain)
+                self._record_delegation_result(tool_call, agent_feedback, tool_msg_id, current_chain)
+            return
+
+        calls = list(self._record_delegation_calls(tool_calls, user_msg_id, current_chain))
+        outcomes: list[tuple[bool, Any] | None] = [None] * len(calls)
+        semaphore = asyncio.Semaphore(self.max_delegation_concurrency)
+
+        async def run(indexes: list[int]) -> None:
+            async with semaphore:
+                for index in indexes:
+                    tool_call, tool_msg_id = calls[index]
+                    try:
+                        outcomes[index] = (True, await self.adelegate_to_agent(
+                            tool_call, tool_msg_id, supervisor_chain=current_chain))
+                    except Exception as e:
+                        outcomes[index] = (False, e)
+                        return
+
+        await asyncio.gather(*(run(indexes) for indexes in self._group_delegations(calls)))
+        self._record_delegation_outcomes(calls, outcomes, current_chain)
+
+    @staticmethod
+    def _group_delegations(calls: list[tuple[Any, str]]) -> list[list[int]]:
+        """Group call indexes by target agent; an agent handles one query at a time."""
+        groups: dict[str, list[int]] = {}
+        for index, (tool_call, _) in enumerate(calls):
+            groups.setdefault(tool_call.function.name, []).append(index)
+        return list(groups.values())
+
+    def _record_delegation_outcomes(self,
+                                    calls: list[tuple[Any, str]],
+                                    outcomes: list[tuple[bool, Any] | None],
+                                    current_chain: list[str]) -> None:
+        """
+        Record the answers of concurrent delegations in tool-call order.
+
+        Args:
+            calls (List[Tuple[Any, str]]): Tool calls with the IDs of their persisted records.
+            outcomes (List[Optional[Tuple[bool, Any]]]): Success flag and answer or exception
+                per call; None for calls skipped after an earlier failure to the same agent.
+            current_chain (List[str]): Chain of supervisors in delegation.
+
+        Raises:
+            Exception: The error of the first failed delegation.
+        """
+        for (tool_call, tool_msg_id), outcome in zip(calls, outcomes):
+            if outcome is None:
+                break
+            ok, result = outcome
+            if not ok:
+                raise result
+            self._record_delegation_result(tool_call, result, tool_msg_id, current_chain)
+
+    def _start_turn(self,
+                    query: str,
+                    sender_name: str | None,
+                    supervisor_chain: list[str] | None) -> tuple[str | None, list[str]]:
+        """
+        Record the incoming query in chat history and the history manager.
+
+        Args:
+            query (str): The user's input query.
+            sender_name (Optional[str]): Name of the sender (for assistant supervisors).
+            supervisor_chain (Optional[List[str]]): Chain of supervisors in delegation.
+
+        Returns:
+            Tuple[Optional[str], List[str]]: ID of the persisted query message and
+                the supervisor chain including this supervisor.
+        """
         self.debugger.log(f"[USER INPUT] {query}")
         
         current_chain = supervisor_chain or []
@@ -339,83 +697,114 @@ class Supervisor(AI):
             sender_name=sender_name or "user",
             supervisor_chain=current_chain
         )
+        return user_msg_id, current_chain
 
-        try:
-            while True:
-                supervisor_response = self.generate_response(self.chat_history, tools=self.available_tools, use_tools=self.use_agents).choices[0]
+    def _finish_turn(self, query_answer: str, user_msg_id: str | None, current_chain: list[str]) -> str:
+        """
+        Record the supervisor's final answer for a turn.
 
-                if not supervisor_response.finish_reason == "tool_calls":
-                    query_answer = supervisor_response.message.content
-                    self.debugger.log(f"[SUPERVISOR RESPONSE] {query_answer}")
-                    
-                    response_msg = {"role": "assistant", "content": query_answer}
-                    self.chat_history.append(response_msg)
-                    
-                    self.history_manager.append_message(
-                        message=response_msg,
-                        sender_type=EntityType.MAIN_SUPERVISOR if not self.is_assistant 
-                                    else EntityType.ASSISTANT_SUPERVISOR,
-                        sender_name=self.name,
-                        parent_id=user_msg_id,
-                        supervisor_chain=current_chain
-                    )
-                    
-                    return query_answer
-
-                all_tool_calls = supervisor_response.message.tool_calls
-                tool_msg = {
-                    "role": "assistant",
-                    "content": None,
-                    "tool_calls": [
-                        {
-                            'id': tc.id,
-                            'type': 'function',
-                            'function': {
-                                'name': tc.function.name,
-                                'arguments': tc.function.arguments
-                            }
-                        }
-                        for tc in all_tool_calls
-                    ]
-                }
-                self.chat_history.append(tool_msg)
-
-                for tool_call in all_tool_calls:
-                    tool_msg_id = self.history_manager.append_message(
-                        message=tool_msg,
-                        sender_type=EntityType.MAIN_SUPERVISOR if not self.is_assistant
-                                    else EntityType.ASSISTANT_SUPERVISOR,
-                        sender_name=self.name,
-                        parent_id=user_msg_id,
-                        tool_call_id=tool_call.id,
-                        supervisor_chain=current_chain
-                    )
-
-                    agent_feedback = self.delegate_to_agent(
-                        tool_call,
-                        tool_msg_id,
-                        supervisor_chain=current_chain
-                    )
-                    feedback_msg = {
-                        "role": "tool",
-                        "content": agent_feedback,
-                        "tool_call_id": tool_call.id
+        Args:
+            query_answer (str): The final answer.
+            user_msg_id (Optional[str]): ID of the query message this answers.
+            current_chain (List[str]): Chain of supervisors in delegation.
+
+        Returns:
+            str: The final answer.
+        """
+        self.debugger.log(f"[SUPERVISOR RESPONSE] {query_answer}")
+        
+        response_msg = {"role": "assistant", "content": query_answer}
+        self.chat_history.append(response_msg)
+        
+        self.history_manager.append_message(
+            message=response_msg,
+            sender_type=EntityType.MAIN_SUPERVISOR if not self.is_assistant 
+                        else EntityType.ASSISTANT_SUPERVISOR,
+            sender_name=self.name,
+            parent_id=user_msg_id,
+            supervisor_chain=current_chain
+        )
+        self.history_manager.end_turn()
+        
+        return query_answer
+
+    def _record_delegation_calls(self,
+                                 all_tool_calls,
+                                 user_msg_id: str | None,
+                                 current_chain: list[str]) -> Iterator[tuple[Any, str]]:
+        """
+        Append the delegation tool-call message to chat history and persist it per call.
+
+        Each call is persisted only when it is yielded, so history records stay
+        interleaved with the delegation results written by the caller.
+
+        Args:
+            all_tool_calls: Tool call objects from the supervisor's LLM response.
+            user_msg_id (Optional[str]): ID of the query message of this turn.
+            current_chain (List[str]): Chain of supervisors in delegation.
+
+        Yields:
+            Tuple[Any, str]: Each tool call paired with the ID of its persisted
+                tool-call message.
+        """
+        tool_msg = {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    'id': tc.id,
+                    'type': 'function',
+                    'function': {
+                        'name': tc.function.name,
+                        'arguments': tc.function.arguments
                     }
-                    self.chat_history.append(feedback_msg)
+                }
+                for tc in all_tool_calls
+            ]
+        }
+        self.chat_history.append(tool_msg)
 
-                    self.history_manager.append_message(
-                        message=feedback_msg,
-                        sender_type=EntityType.TOOL,
-                        sender_name=self.name,
-                        parent_id=tool_msg_id,
-                        tool_call_id=tool_call.id,
-                        supervisor_chain=current_chain
-                    )
+        for tool_call in all_tool_calls:
+            tool_msg_id = self.history_manager.append_message(
+                message=tool_msg,
+                sender_type=EntityType.MAIN_SUPERVISOR if not self.is_assistant
+                            else EntityType.ASSISTANT_SUPERVISOR,
+                sender_name=self.name,
+                parent_id=user_msg_id,
+                tool_call_id=tool_call.id,
+                supervisor_chain=current_chain
+            )
+            yield tool_call, tool_msg_id
+
+    def _record_delegation_result(self,
+                                  tool_call,
+                                  agent_feedback: str,
+                                  tool_msg_id: str,
+                                  current_chain: list[str]) -> None:
+        """
+        Append a delegated agent's answer as the tool response for its call.
 
-        except Exception as e:
-            error_msg = f"Error in processing user input: {str(e)}"
-            self.debugger.log(f"[ERROR] {error_msg}", level="error")
-            raise RuntimeError(error_msg)
+        Args:
+            tool_call: The delegation tool call.
+            agent_feedback (str): The delegated agent's answer.
+            tool_msg_id (str): ID of the persisted tool-call message.
+            current_chain (List[str]): Chain of supervisors in delegation.
+        """
+        feedback_msg = {
+            "role": "tool",
+            "content": agent_feedback,
+            "tool_call_id": tool_call.id
+        }
+        self.chat_history.append(feedback_msg)
+
+        self.history_manager.append_message(
+            message=feedback_msg,
+            sender_type=EntityType.TOOL,
+            sender_name=self.name,
+            parent_id=tool_msg_id,
+            tool_call_id=tool_call.id,
+            supervisor_chain=current_chain
+        )
 
     def start_interactive_session(self) -> None:
         """
@@ -447,6 +836,42 @@ class Supervisor(AI):
         return (f"Supervisor(name={self.name}, llm_config={self.llm_config}, "
                 f"registered_agents={[agent.name for agent in self.registered_agents]})")
 
+    def _fit_context(self) -> list[dict[str, Any]]:
+        """Compact and prune the chat history as configured and return it for the next request."""
+        if self.compactor is not None:
+            self.chat_history = self.compactor.compact(self.chat_history, self._summarize, self._persist_summary)
+        if self.context_window is not None:
+            self.chat_history = self.context_window.fit(self.chat_history)
+        return self.chat_history
+
+    async def _afit_context(self) -> list[dict[str, Any]]:
+        """Async variant of `_fit_context`; a non-deferred summary does not block the event loop."""
+        if self.compactor is not None:
+            self.chat_history = await self.compactor.acompact(
+                self.chat_history, self._summarize, self._asummarize, self._persist_summary)
+        if self.context_window is not None:
+            self.chat_history = self.context_window.fit(self.chat_history)
+        return self.chat_history
+
+    def _summarize(self, messages: list[dict[str, Any]]) -> str:
+        """Run a summarizer request for conversation compaction."""
+        return self.generate_response(messages).choices[0].message.content
+
+    async def _asummarize(self, messages: list[dict[str, Any]]) -> str:
+        """Async variant of `_summarize`."""
+        return (await self.agenerate_response(messages)).choices[0].message.content
+
+    def _persist_summary(self, summary_msg: dict[str, Any], tail_turns: int) -> None:
+        """Record a compaction summary so `load_chat_history` can resume from it."""
+        if self.history_manager:
+            self.history_manager.append_message(
+                message=summary_msg,
+                sender_type=EntityType.MAIN_SUPERVISOR if not self.is_assistant
+                        else EntityType.ASSISTANT_SUPERVISOR,
+                sender_name=self.name,
+                metadata={'summary': True, 'tail_turns': tail_turns}
+            )
+
     def reset_chat_history(self) -> None:
         """Reset chat history to initial state and clear history manager."""
         self.history_manager.clear_history()
@@ -518,6 +943,9 @@ class Supervisor(AI):
         agent = self.get_agent_by_name(agent_name)
         if agent:
             self.registered_agents.remove(agent)
+            self._agent_index = {}
+            for registered in self.registered_agents:
+                self._agent_index.setdefault(self._normalize_agent_name(registered.name), registered)
             safe_name = agent_name.replace(" ", "_") #ADDED
             self.available_tools = [tool for tool in self.available_tools
                                     # if tool['function']['name'] != f"delegate_to_{agent_name}"]
@@ -529,7 +957,11 @@ class Supervisor(AI):
         """
         Update the system message to reflect the current set of registered agents.
         """
-        agent_descriptions = "\n".join(f"{agent.name}: {agent.system_message}" for agent in self.registered_agents)
+        agents = self.registered_agents
+        if self.prompt_cache.enabled:
+            # Registration order may differ between runs; keep the prompt byte-identical.
+            agents = sorted(agents, key=lambda agent: agent.name)
+        agent_descriptions = "\n".join(f"{agent.name}: {agent.system_message}" for agent in agents)
         self.system_message = f"{self._get_default_system_message()}\n\n{agent_descriptions}"
         self.reset_chat_history()
         
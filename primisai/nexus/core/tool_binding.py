@@ -0,0 +1,277 @@
+"""
+Tool binding module for matching tool-call arguments to tool functions.
+
+Each tool is inspected once, when it is registered (see
+`tool_execution.prepare_tool`):
+
+- its signature decides whether it is called with keyword arguments
+  (``tool(**arguments)``) or with the arguments as a single dict
+  (``tool(arguments)``), and
+- its JSON schema (``metadata.function.parameters``) and signature are compiled
+  into a validator.
+
+Calls with invalid arguments are rejected before the tool runs. The model
+receives an `InvalidToolArguments` error listing every problem, so it can
+correct the call, and the tool never runs twice for one call.
+
+The validator covers the JSON Schema keywords used in tool schemas (``type``,
+``enum``, ``const``, ``properties``, ``required``, ``additionalProperties``,
+``items``, ``anyOf``/``oneOf``, length and range bounds); other keywords are
+ignored.
+"""
+
+import inspect
+import json
+from typing import Any, Callable
+
+# Appends the problems of a value, found at the given path, to a list.
+Checker = Callable[[Any, str, list[str]], None]
+
+KWARGS = 'kwargs'
+SINGLE_DICT = 'dict'
+
+_TYPE_CHECKS: dict[str, Callable[[Any], bool]] = {
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    'boolean': lambda value: isinstance(value, bool),
+    'array': lambda value: isinstance(value, list),
+    'object': lambda value: isinstance(value, dict),
+    'null': lambda value: value is None,
+}
+
+_KEYWORD_KINDS = (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+_POSITIONAL_KINDS = (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+
+
+class InvalidToolArguments(str):
+    """The JSON error returned as a tool's output when its arguments were rejected."""
+
+
+def invalid_arguments_result(tool_name: str, problems: list[str]) -> InvalidToolArguments:
+    """
+    Build the error the model receives for a rejected call.
+
+    Args:
+        tool_name (str): Name of the tool.
+        problems (List[str]): What is wrong with the arguments.
+
+    Returns:
+        InvalidToolArguments: The JSON error.
+    """
+    return InvalidToolArguments(json.dumps({
+        'error': 'invalid_arguments',
+        'tool': tool_name,
+        'problems': problems,
+        'message': f"Tool '{tool_name}' was not called. Fix the arguments and call it again.",
+    }))
+
+
+def _path(path: str, key: Any) -> str:
+    """Join a property name or list index to a value path."""
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else str(key)
+
+
+def _where(path: str) -> str:
+    """Describe a value path in a problem message."""
+    return f"'{path}'" if path else "arguments"
+
+
+def _compile(schema: Any) -> Checker | None:
+    """Compile a JSON schema into a checker; None if the schema accepts everything."""
+    if not isinstance(schema, dict) or not schema:
+        return None
+    checks: list[Checker] = []
+
+    types = schema.get('type')
+    if types is not None:
+        names = [types] if isinstance(types, str) else list(types)
+        tests = [_TYPE_CHECKS[name] for name in names if name in _TYPE_CHECKS]
+        if tests:
+            expected = " or ".join(names)
+
+            def check_type(value, path, problems):
+                if not any(test(value) for test in tests):
+                    problems.append(f"{_where(path)} must be of type {expected}, got {type(value).__name__}")
+            checks.append(check_type)
+
+    if 'enum' in schema:
+        allowed = list(schema['enum'])
+
+        def check_enum(value, path, problems):
+            if value not in allowed:
+                problems.append(f"{_where(path)} must be one of {allowed}, got {value!r}")
+        checks.append(check_enum)
+
+    if 'const' in schema:
+        const = schema['const']
+
+        def check_const(value, path, problems):
+            if value != const:
+                problems.append(f"{_where(path)} must be {const!r}, got {value!r}")
+        checks.append(check_const)
+
+    for keyword, test, message in (
+            ('minimum', lambda value, bound: value >= bound, "must be >= {}"),
+            ('maximum', lambda value, bound: value <= bound, "must be <= {}"),
+            ('exclusiveMinimum', lambda value, bound: value > bound, "must be > {}"),
+            ('exclusiveMaximum', lambda value, bound: value < bound, "must be < {}")):
+        bound = schema.get(keyword)
+        if isinstance(bound, (int, float)) and not isinstance(bound, bool):
+            def check_bound(value, path, problems, bound=bound, test=test, message=message):
+                if _TYPE_CHECKS['number'](value) and not test(value, bound):
+                    problems.append(f"{_where(path)} {message.format(bound)}, got {value!r}")
+            checks.append(check_bound)
+
+    for keyword, sized, test, message in (
+            ('minLength', str, lambda size, bound: size >= bound, "must have at least {} characters"),
+            ('maxLength', str, lambda size, bound: size <= bound, "must have at most {} characters"),
+            ('minItems', list, lambda size, bound: size >= bound, "must have at least {} items"),
+            ('maxItems', list, lambda size, bound: size <= bound, "must have at most {} items")):
+        bound = schema.get(keyword)
+        if isinstance(bound, int) and not isinstance(bound, bool):
+            def check_size(value, path, problems, bound=bound, sized=sized, test=test, message=message):
+                if isinstance(value, sized) and not test(len(value), bound):
+                    problems.append(f"{_where(path)} {message.format(bound)}")
+            checks.append(check_size)
+
+    properties = schema.get('properties')
+    if isinstance(properties, dict) or 'required' in schema or 'additionalProperties' in schema:
+        property_checks = {name: _compile(sub) for name, sub in (properties or {}).items()}
+        required = [name for name in schema.get('required') or [] if isinstance(name, str)]
+        additional = schema.get('additionalProperties', True)
+        additional_check = _compile(additional) if isinstance(additional, dict) else None
+
+        def check_object(value, path, problems):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    problems.append(f"missing required argument '{_path(path, name)}'")
+            for name, item in value.items():
+                if name in property_checks:
+                    checker = property_checks[name]
+                elif additional is False:
+                    problems.append(f"unexpected argument '{_path(path, name)}'")
+                    continue
+                else:
+                    checker = additional_check
+                if checker is not None:
+                    checker(item, _path(path, name), problems)
+        checks.append(check_object)
+
+    items = _compile(schema.get('items'))
+    if items is not None:
+        def check_items(value, path, problems):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    items(item, _path(path, i), problems)
+        checks.append(check_items)
+
+    alternatives = [_compile(sub) for sub in schema.get('anyOf') or schema.get('oneOf') or []]
+    if alternatives:
+        def check_alternatives(value, path, problems):
+            for checker in alternatives:
+                found: list[str] = []
+                if checker is not None:
+                    checker(value, path, found)
+                if not found:
+                    return
+            problems.append(f"{_where(path)} does not match any of the allowed schemas")
+        checks.append(check_alternatives)
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path, problems):
+        for check in checks:
+            check(value, path, problems)
+    return check_all
+
+
+def _parameters(function: Callable[..., Any]) -> list[inspect.Parameter] | None:
+    """Return the parameters of a function, or None if its signature cannot be inspected."""
+    try:
+        return list(inspect.signature(function).parameters.values())
+    except (TypeError, ValueError):
+        return None
+
+
+def call_mode(function: Callable[..., Any], property_names: list[str]) -> str:
+    """
+    Decide how a tool function receives the arguments of a tool call.
+
+    Functions accepting the schema's properties as keywords (or ``**kwargs``)
+    are called with keyword arguments. Functions taking a single positional
+    parameter that is not one of the properties receive the arguments as one
+    dict.
+
+    Args:
+        function (Callable): The tool function.
+        property_names (List[str]): Property names of the tool's parameter schema.
+
+    Returns:
+        str: `KWARGS` or `SINGLE_DICT`.
+    """
+    parameters = _parameters(function)
+    if parameters is None or any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters):
+        return KWARGS
+    keywords = {p.name for p in parameters if p.kind in _KEYWORD_KINDS}
+    positional = [p for p in parameters if p.kind in _POSITIONAL_KINDS]
+    if set(property_names) <= keywords and all(
+            p.name in property_names for p in parameters
+            if p.default is inspect.Parameter.empty and p.kind in _KEYWORD_KINDS):
+        return KWARGS
+    if len(positional) == 1 and positional[0].name not in property_names and all(
+            p.default is not inspect.Parameter.empty for p in parameters
+            if p is not positional[0] and p.kind is not inspect.Parameter.VAR_POSITIONAL):
+        return SINGLE_DICT
+    return KWARGS
+
+
+def compile_validator(function: Callable[..., Any] | None,
+                      schema: dict[str, Any] | None,
+                      mode: str) -> Callable[[Any], list[str]]:
+    """
+    Build the argument validator of a tool.
+
+    In `KWARGS` mode the function's signature is checked as well: arguments it
+    does not accept and required parameters without a value are reported, as
+    the call would fail with them.
+
+    Args:
+        function (Optional[Callable]): The tool function, if it can be inspected.
+        schema (Optional[Dict[str, Any]]): The tool's parameter schema.
+        mode (str): The tool's call mode (see `call_mode`).
+
+    Returns:
+        Callable[[Any], List[str]]: Returns the problems of decoded tool-call
+            arguments; an empty list if they are valid.
+    """
+    check = _compile(schema)
+    parameters = _parameters(function) if function is not None and mode == KWARGS else None
+    accepted: set[str] | None = None
+    needed: list[str] = []
+    if parameters is not None and not any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters):
+        accepted = {p.name for p in parameters if p.kind in _KEYWORD_KINDS}
+        needed = [p.name for p in parameters
+                  if p.kind in _KEYWORD_KINDS and p.default is inspect.Parameter.empty]
+
+    def validate(arguments: Any) -> list[str]:
+        if not isinstance(arguments, dict):
+            return [f"arguments must be a JSON object, got {type(arguments).__name__}"]
+        problems: list[str] = []
+        if check is not None:
+            check(arguments, '', problems)
+        if accepted is not None:
+            problems.extend(f"unexpected argument '{name}'" for name in arguments
+                            if name not in accepted and f"unexpected argument '{name}'" not in problems)
+            problems.extend(f"missing required argument '{name}'" for name in needed
+                            if name not in arguments and f"missing required argument '{name}'" not in problems)
+        return problems
+
+    return validate
@@ -0,0 +1,577 @@
+"""
+Tool execution module for running an agent's tool calls concurrently.
+
+When the LLM answers with several ``tool_calls`` they are independent of each
+other, so an agent created with ``parallel_tools`` runs them at the same time
+instead of one after another: awaitable tools (such as MCP proxies, through
+their ``async_tool``) are gathered on an event loop and plain callables run on
+a shared thread pool, at most ``max_concurrency`` at once.
+
+A tool that must not overlap with other tools is marked with ``"serial": True``
+in its tool dict. It runs alone, after the calls before it and before the
+calls after it.
+
+A tool's ``tool`` entry may also be an ``async def`` function. Agents detect
+this when the tool is registered (see `prepare_tool`) and await it natively,
+on the caller's event loop in ``achat`` and on the agent's background loop in
+``chat``, so I/O-bound tools do not hold a thread while they wait.
+
+Pure or slow-changing tools can opt into a result cache with a ``cache`` entry
+in their tool dict (or YAML tool config), using the settings of the LLM
+response cache (``ttl``, ``max_entries``, ``max_bytes``, ``disk``, ...):
+
+    {"tool": lookup, "metadata": {...}, "cache": {"ttl": 600, "disk": True}}
+
+Results are keyed on the tool name and its canonicalized JSON arguments and
+stored as the text recorded in the chat history. Served results are returned
+as `CachedResult` so the hit can be recorded in the workflow history.
+
+A tool can be bounded with ``"timeout"`` (seconds; agents also take a default
+``tool_timeout``) and ``"max_concurrency"``, a cap on its concurrent calls
+shared by every agent in the process:
+
+    {"tool": render, "metadata": {...}, "timeout": 30, "max_concurrency": 2}
+
+A call that does not finish in time is cancelled (async tools and MCP calls)
+or abandoned (threads cannot be interrupted), and the model receives a
+`ToolTimeout`, a JSON error it can react to, as the tool's output.
+
+Arguments are validated against the tool's schema and signature before any
+of this happens (see `tool_binding`).
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from primisai.nexus.core.response_cache import DEFAULT_TOOL_CACHE_PATH, get_response_cache, request_fingerprint
+from primisai.nexus.core.tool_binding import KWARGS, call_mode, compile_validator, invalid_arguments_result
+
+logger = logging.getLogger(__name__)
+
+# (registered tool dict, decoded arguments) of one tool call.
+ToolJob = tuple[dict[str, Any], dict[str, Any]]
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+_limiters: dict[str, "ToolLimiter"] = {}
+_limiters_lock = threading.Lock()
+
+
+def tool_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool running synchronous tools in parallel mode."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="nexus-tool")
+        return _executor
+
+
+class CachedResult(str):
+    """A tool output served from the tool result cache instead of running the tool."""
+
+
+class ToolTimeout(str):
+    """The JSON error returned as a tool's output when the call exceeded its timeout."""
+
+
+class ToolError(str):
+    """An error message returned as a tool's output (e.g. a failed MCP call); never cached."""
+
+
+class _DeadlineExceeded(Exception):
+    """Raised internally when a tool call runs past its timeout."""
+
+
+class ToolLimiter:
+    """
+    Caps the concurrent calls of one tool, for threads and event loops alike.
+
+    Slots are handed to waiters in arrival order, so a busy tool cannot
+    starve callers on either side.
+
+    Attributes:
+        limit (int): Maximum number of concurrent calls.
+    """
+
+    def __init__(self, limit: int):
+        """
+        Initialize the limiter.
+
+        Args:
+            limit (int): Maximum number of concurrent calls.
+        """
+        self.limit = limit
+        self._active = 0
+        self._lock = threading.Lock()
+        # threading.Event for blocked threads, asyncio.Future for waiting coroutines.
+        self._waiters: collections.deque = collections.deque()
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """
+        Take a slot, blocking the calling thread.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait at most; None waits indefinitely.
+
+        Returns:
+            bool: True if a slot was taken, False on timeout.
+        """
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return True
+            event = threading.Event()
+            self._waiters.append(event)
+        if event.wait(timeout):
+            return True
+        return not self._withdraw(event)
+
+    async def aacquire(self, timeout: float | None = None) -> bool:
+        """
+        Take a slot without blocking the running event loop.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait at most; None waits indefinitely.
+
+        Returns:
+            bool: True if a slot was taken, False on timeout.
+        """
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return True
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=timeout)
+        except asyncio.CancelledError:
+            if not self._withdraw(waiter) and not waiter.cancel():
+                self.release()
+            raise
+        return bool(done) or not self._withdraw(waiter)
+
+    def release(self) -> None:
+        """Return a slot, handing it to the longest waiting caller if any."""
+        with self._lock:
+            if not self._waiters:
+                self._active -= 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return
+        try:
+            waiter.get_loop().call_soon_threadsafe(self._grant, waiter)
+        except RuntimeError:
+            # The waiter's loop is closed; pass the slot on.
+            self.release()
+
+    def _grant(self, waiter: asyncio.Future) -> None:
+        """Hand a slot to a waiting coroutine, on its own loop."""
+        if waiter.done():
+            self.release()
+        else:
+            waiter.set_result(True)
+
+    def _withdraw(self, waiter: Any) -> bool:
+        """Remove a waiter that gave up; return False if it was already handed a slot."""
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                return True
+            return False
+
+
+def tool_limiter(name: str, limit: int) -> ToolLimiter:
+    """
+    Return the process-wide limiter of a tool.
+
+    Args:
+        name (str): Tool name, prefixed by its ``_namespace`` (the function of a Python
+            tool, the server of an MCP tool), so unrelated same-named tools are not limited together.
+        limit (int): Maximum number of concurrent calls; the first registration wins.
+
+    Returns:
+        ToolLimiter: The shared limiter.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = ToolLimiter(limit)
+        elif limiter.limit != limit:
+            logger.warning(f"Tool '{name}' is already limited to {limiter.limit} concurrent calls; "
+                           f"ignoring max_concurrency={limit}")
+        return limiter
+
+
+def _timeout_result(tool: dict[str, Any], timeout: float) -> ToolTimeout:
+    """Build the error the model receives for a timed-out call."""
+    name = tool['metadata']['function']['name']
+    return ToolTimeout(json.dumps({
+        'error': 'timeout',
+        'tool': name,
+        'timeout_seconds': timeout,
+        'message': f"Tool '{name}' did not finish within {timeout:g} seconds and was cancelled. "
+                   f"Try again, with different arguments, or continue without it.",
+    }))
+
+
+def _remaining(deadline: float | None) -> float | None:
+    """Seconds left until `deadline`, or None without a deadline."""
+    return None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+
+async def _bounded(awaitable: Any, timeout: float | None) -> Any:
+    """Await `awaitable`, cancelling it and raising `_DeadlineExceeded` after `timeout` seconds."""
+    if timeout is None:
+        return await awaitable
+    task = asyncio.ensure_future(awaitable)
+    try:
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    if not done:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        raise _DeadlineExceeded()
+    return task.result()
+
+
+def _submit(tool: dict[str, Any], arguments: dict[str, Any], limiter: ToolLimiter | None) -> concurrent.futures.Future:
+    """Run a synchronous tool on the shared pool; its slot is returned when the thread finishes."""
+    future = tool_executor().submit(invoke_tool, tool['tool'], arguments, tool['_call_mode'])
+    if limiter is not None:
+        future.add_done_callback(lambda _: limiter.release())
+    return future
+
+
+def _cache_lookup(tool: dict[str, Any], arguments: dict[str, Any]) -> tuple[str | None, CachedResult | None]:
+    """Return the cache key of a tool call and its cached output, if the tool is cached."""
+    cache = tool.get('_result_cache')
+    if cache is None:
+        return None, None
+    key = request_fingerprint({'tool': tool['metadata']['function']['name'], 'arguments': arguments},
+                              namespace=tool.get('_namespace', ''))
+    payload = cache.get(key)
+    return key, CachedResult(payload) if payload is not None else None
+
+
+def _cache_store(tool: dict[str, Any], key: str | None, result: Any) -> None:
+    """Store a tool output under `key` if the tool is cached; errors are not stored."""
+    if key is not None and not isinstance(result, ToolError):
+        tool['_result_cache'].set(key, str(result))
+
+
+def run_tool(tool: dict[str, Any],
+             arguments: dict[str, Any],
+             run_coroutine: Callable[[Any], Any],
+             default_timeout: float | None = None) -> Any:
+    """
+    Run a tool call from synchronous code, applying its cache, limiter and timeout.
+
+    Args:
+        tool (Dict[str, Any]): The registered tool dict.
+        arguments (Dict[str, Any]): Decoded tool-call arguments.
+        run_coroutine (Callable): Runs a coroutine to completion on an event loop,
+            for native async tools and for awaitable tools with a timeout.
+        default_timeout (Optional[float]): Timeout of tools without their own.
+
+    Returns:
+        Any: The tool's output, a `CachedResult` on a cache hit, a `ToolTimeout`
+            if the call did not finish in time, or an `InvalidToolArguments` error
+            if the arguments were rejected.
+    """
+    rejected = _check_arguments(tool, arguments)
+    if rejected is not None:
+        return rejected
+    key, cached = _cache_lookup(tool, arguments)
+    if cached is not None:
+        return cached
+    timeout = tool.get('timeout', default_timeout)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    limiter = tool.get('_limiter')
+    if limiter is not None and not limiter.acquire(timeout):
+        return _timeout_result(tool, timeout)
+    release = limiter
+    try:
+        if tool.get('_native_async') or (timeout is not None and tool.get('async_tool') is not None):
+            result = run_coroutine(_bounded(ainvoke_tool(tool['async_tool'], arguments, tool['_async_call_mode']),
+                                            _remaining(deadline)))
+        elif timeout is None:
+            result = invoke_tool(tool['tool'], arguments, tool['_call_mode'])
+        else:
+            future, release = _submit(tool, arguments, limiter), None
+            done, _ = concurrent.futures.wait([future], timeout=_remaining(deadline))
+            if not done:
+                future.cancel()
+                raise _DeadlineExceeded()
+            result = future.result()
+    except _DeadlineExceeded:
+        return _timeout_result(tool, timeout)
+    finally:
+        if release is not None:
+            release.release()
+    _cache_store(tool, key, result)
+    return result
+
+
+async def arun_tool(tool: dict[str, Any],
+                    arguments: dict[str, Any],
+                    blocking_in_executor: bool = False,
+                    default_timeout: float | None = None) -> Any:
+    """
+    Run a tool call on the running event loop, applying its cache, limiter and timeout.
+
+    Args:
+        tool (Dict[str, Any]): The registered tool dict.
+        arguments (Dict[str, Any]): Decoded tool-call arguments.
+        blocking_in_executor (bool): Run synchronous tools on the shared thread pool
+            instead of calling them on the loop. Always done for tools with a timeout.
+        default_timeout (Optional[float]): Timeout of tools without their own.
+
+    Returns:
+        Any: The tool's output, a `CachedResult` on a cache hit, a `ToolTimeout`
+            if the call did not finish in time, or an `InvalidToolArguments` error
+            if the arguments were rejected.
+    """
+    rejected = _check_arguments(tool, arguments)
+    if rejected is not None:
+        return rejected
+    key, cached = _cache_lookup(tool, arguments)
+    if cached is not None:
+        return cached
+    timeout = tool.get('timeout', default_timeout)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    limiter = tool.get('_limiter')
+    if limiter is not None and not await limiter.aacquire(timeout):
+        return _timeout_result(tool, timeout)
+    release = limiter
+    try:
+        async_function = tool.get('async_tool')
+        if async_function is not None:
+            result = await _bounded(ainvoke_tool(async_function, arguments, tool['_async_call_mode']),
+                                    _remaining(deadline))
+        elif blocking_in_executor or timeout is not None:
+            future, release = _submit(tool, arguments, limiter), None
+            result = await _bounded(asyncio.wrap_future(future), _remaining(deadline))
+        else:
+            result = invoke_tool(tool['tool'], arguments, tool['_call_mode'])
+    except _DeadlineExceeded:
+        return _timeout_result(tool, timeout)
+    finally:
+        if release is not None:
+            release.release()
+    _cache_store(tool, key, result)
+    return result
+
+
+def _check_arguments(tool: dict[str, Any], arguments: Any) -> Any:
+    """Return the error for arguments rejected by the tool's validator, or None if they are valid."""
+    problems = tool['_validate'](arguments)
+    if not problems:
+        return None
+    return invalid_arguments_result(tool['metadata']['function']['name'], problems)
+
+
+def invoke_tool(tool_function: Callable[..., Any], arguments: dict[str, Any], mode: str = KWARGS) -> Any:
+    """
+    Call a synchronous tool with the decoded arguments of a tool call.
+
+    Args:
+        tool_function (Callable): The tool to call.
+        arguments (Dict[str, Any]): Decoded tool-call arguments.
+        mode (str): ``'kwargs'`` to pass the arguments as keywords, ``'dict'`` to
+            pass them as a single dict (see `tool_binding.call_mode`).
+
+    Returns:
+        Any: The tool's output.
+    """
+    if mode == KWARGS:
+        return tool_function(**arguments)
+    return tool_function(arguments)
+
+
+async def ainvoke_tool(async_function: Callable[..., Any], arguments: dict[str, Any], mode: str = KWARGS) -> Any:
+    """
+    Await an async tool with the decoded arguments of a tool call.
+
+    Args:
+        async_function (Callable): Coroutine function implementing the tool.
+        arguments (Dict[str, Any]): Decoded tool-call arguments.
+        mode (str): How the arguments are passed, as for `invoke_tool`.
+
+    Returns:
+        Any: The tool's output.
+    """
+    if mode == KWARGS:
+        return await async_function(**arguments)
+    return await async_function(arguments)
+
+
+def is_async_callable(function: Any) -> bool:
+    """Return True if calling `function` returns a coroutine (``async def`` functions, partials and callables)."""
+    while isinstance(function, functools.partial):
+        function = function.func
+    if inspect.iscoroutinefunction(function):
+        return True
+    call = getattr(function, '__call__', None)
+    return not inspect.isfunction(function) and inspect.iscoroutinefunction(call)
+
+
+def tool_namespace(function: Any) -> str:
+    """
+    Return the scope of a Python tool's cache entries and limiter.
+
+    Tools are told apart by the function they call, so unrelated tools that
+    share a name do not share results. Lambdas and nested functions also get
+    their line number, as their qualified names are not unique.
+
+    Args:
+        function (Any): The tool's callable.
+
+    Returns:
+        str: The namespace, stable across processes (for disk caches).
+    """
+    while isinstance(function, functools.partial):
+        function = function.func
+    function = getattr(function, '__func__', function)
+    if not hasattr(function, '__qualname__'):
+        function = type(function)  # callable instance
+    namespace = f"{getattr(function, '__module__', '')}.{function.__qualname__}"
+    code = getattr(function, '__code__', None)
+    if '<' in namespace and code is not None:
+        namespace += f":{code.co_firstlineno}"
+    return namespace + ":"
+
+
+def prepare_tool(tool: dict[str, Any]) -> dict[str, Any]:
+    """
+    Detect a native async tool when it is registered.
+
+    A tool whose ``tool`` entry is an ``async def`` function is flagged with
+    ``_native_async`` and gets it as its ``async_tool``, which every execution
+    path awaits. The call mode and argument validator of the tool are compiled
+    (see `tool_binding`). A tool with a ``cache`` entry gets its shared result
+    cache and one with ``max_concurrency`` its process-wide limiter, both scoped
+    by the tool's ``_namespace`` (its server for MCP tools, see `tool_namespace`
+    for Python tools). The checks are done once per tool dict.
+
+    Args:
+        tool (Dict[str, Any]): A registered tool dict.
+
+    Returns:
+        Dict[str, Any]: The same dict.
+
+    Raises:
+        ValueError: If ``timeout`` or ``max_concurrency`` is not a positive number.
+    """
+    if '_native_async' not in tool:
+        tool['_native_async'] = is_async_callable(tool.get('tool'))
+        if tool['_native_async']:
+            tool.setdefault('async_tool', tool['tool'])
+    if '_validate' not in tool:
+        schema = tool['metadata']['function'].get('parameters')
+        properties = list((schema or {}).get('properties') or {})
+        tool['_call_mode'] = call_mode(tool['tool'], properties)
+        async_function = tool.get('async_tool')
+        tool['_async_call_mode'] = (tool['_call_mode'] if async_function is None or async_function is tool['tool']
+                                    else call_mode(async_function, properties))
+        tool['_validate'] = compile_validator(tool['tool'], schema, tool['_call_mode'])
+    if '_namespace' not in tool:
+        tool['_namespace'] = tool_namespace(tool['tool'])
+    if '_result_cache' not in tool:
+        tool['_result_cache'] = get_response_cache(tool.get('cache'), 'tool', DEFAULT_TOOL_CACHE_PATH)
+    if '_limiter' not in tool:
+        timeout = tool.get('timeout')
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float))
+                                    or timeout <= 0):
+            raise ValueError("Tool 'timeout' must be a positive number of seconds")
+        limit = tool.get('max_concurrency')
+        if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 1):
+            raise ValueError("Tool 'max_concurrency' must be a positive integer")
+        name = tool.get('_namespace', '') + tool['metadata']['function']['name']
+        tool['_limiter'] = tool_limiter(name, limit) if limit is not None else None
+    return tool
+
+
+async def gather_tool_calls(jobs: list[ToolJob],
+                            max_concurrency: int,
+                            default_timeout: float | None = None) -> list[tuple[bool, Any]]:
+    """
+    Run tool calls concurrently on the running event loop.
+
+    Calls run in batches separated by serial tools. If a call fails, the calls
+    after the batch it belongs to are not started.
+
+    Args:
+        jobs (List[Tuple[Dict[str, Any], Dict[str, Any]]]): Tool dicts and their
+            arguments, in tool-call order.
+        max_concurrency (int): Maximum number of tools running at once.
+        default_timeout (Optional[float]): Timeout of tools without their own.
+
+    Returns:
+        List[Tuple[bool, Any]]: Per started call and in tool-call order, whether it
+            succeeded and its output or exception.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(tool: dict[str, Any], arguments: dict[str, Any]) -> tuple[bool, Any]:
+        async with semaphore:
+            try:
+                return True, await arun_tool(tool, arguments, blocking_in_executor=True,
+                                             default_timeout=default_timeout)
+            except Exception as e:
+                return False, e
+
+    outcomes: list[tuple[bool, Any]] = []
+    batch: list[ToolJob] = []
+
+    async def flush() -> bool:
+        outcomes.extend(await asyncio.gather(*(run(tool, arguments) for tool, arguments in batch)))
+        batch.clear()
+        return all(ok for ok, _ in outcomes)
+
+    for tool, arguments in jobs:
+        if not tool.get('serial'):
+            batch.append((tool, arguments))
+            continue
+        if not await flush():
+            return outcomes
+        outcomes.append(await run(tool, arguments))
+        if not outcomes[-1][0]:
+            return outcomes
+    await flush()
+    return outcomes
+
+
+def concurrency_limit(value: bool | int, setting: str = 'parallel_tools') -> int:
+    """
+    Translate a ``parallel_tools`` (or ``parallel_delegation``) setting into a concurrency limit.
+
+    Args:
+        value (Union[bool, int]): False for sequential execution, True for the
+            default limit of 8, or the maximum number of concurrent calls.
+        setting (str): Name of the setting, for error messages.
+
+    Returns:
+        int: The concurrency limit; 1 means sequential.
+
+    Raises:
+        ValueError: If the setting is negative or not a bool or int.
+    """
+    if isinstance(value, bool):
+        return 8 if value else 1
+    if not isinstance(value, int) or value < 0:
+        raise ValueError(f"{setting} must be a boolean or a non-negative integer")
+    return max(value, 1)
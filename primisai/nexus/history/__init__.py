@@ -1,3 +1,3 @@
-from .history_manager import HistoryManager, EntityType
+from .history_manager import HistoryManager, EntityType, get_history_manager, release_history_manager
 
-__all__ = ['HistoryManager', 'EntityType']
\ No newline at end of file
+__all__ = ['HistoryManager', 'EntityType', 'get_history_manager', 'release_history_manager']
@@ -0,0 +1,277 @@
+"""
+History index module providing random access to workflow history files.
+
+Each ``history.jsonl`` gets a sidecar file, ``history.jsonl.idx``, with one
+line per history record: its byte offset and length in the history file and
+the fields queries select records by (message_id, sender_name, parent_id,
+role, and the delegate of user messages, i.e. the last supervisor_chain
+entry). The `HistoryWriter` of the workflow appends to both files.
+
+`HistoryIndex` loads the sidecar into lookup tables and reads the history
+through a memory-mapped view, so queries decode only the records they need.
+Before every query it catches up with records appended since, by other
+managers or processes. The sidecar is rebuilt from the history file when it is
+missing, does not match the history (e.g. after `clear_history`, or when the
+history was written by an older version), or ends in a partial line.
+"""
+
+import collections
+import contextlib
+import json
+import logging
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Iterator, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class IndexEntry(NamedTuple):
+    """Location and lookup fields of one history record."""
+    offset: int
+    length: int
+    message_id: str | None
+    sender_name: str | None
+    parent_id: str | None
+    role: str | None
+    delegate: str | None
+
+
+def index_entry(offset: int, length: int, record: dict[str, Any]) -> IndexEntry:
+    """
+    Build the index entry of a history record.
+
+    Args:
+        offset (int): Byte offset of the record's line in the history file.
+        length (int): Byte length of the line, including the newline.
+        record (Dict[str, Any]): The record.
+
+    Returns:
+        IndexEntry: The entry.
+    """
+    chain = record.get("supervisor_chain")
+    delegate = chain[-1] if record.get("role") == "user" and chain else None
+    return IndexEntry(offset, length, record.get("message_id"), record.get("sender_name"),
+                      record.get("parent_id"), record.get("role"), delegate)
+
+
+def sidecar_path(history_file: Path) -> Path:
+    """Return the path of the sidecar index of a history file."""
+    return history_file.with_name(history_file.name + ".idx")
+
+
+def append_to_sidecar(history_file: Path, entries: Iterable[IndexEntry]) -> int:
+    """
+    Append entries to the sidecar index of a history file.
+
+    Args:
+        history_file (Path): The history file.
+        entries (Iterable[IndexEntry]): Entries of records appended to it.
+
+    Returns:
+        int: Number of bytes written.
+    """
+    data = "".join(json.dumps(list(entry)) + "\n" for entry in entries)
+    if data:
+        with open(sidecar_path(history_file), "a") as f:
+            f.write(data)
+    return len(data)
+
+
+class HistoryView:
+    """
+    Read access to the records of a history file through a memory-mapped view.
+
+    Decoded records are kept for the lifetime of the view, so a query decodes
+    each record at most once.
+
+    Attributes:
+        index (HistoryIndex): The index the view was opened on.
+    """
+
+    def __init__(self, index: "HistoryIndex", buffer: Any):
+        """
+        Initialize the view.
+
+        Args:
+            index (HistoryIndex): The up-to-date index.
+            buffer: The mapped history file.
+        """
+        self.index = index
+        self._buffer = buffer
+        self._decoded: dict[int, dict[str, Any]] = {}
+
+    def record(self, entry: IndexEntry) -> dict[str, Any]:
+        """Decode the record of an index entry."""
+        record = self._decoded.get(entry.offset)
+        if record is None:
+            record = self._decoded[entry.offset] = json.loads(self._buffer[entry.offset:entry.offset + entry.length])
+        return record
+
+    def records(self, entries: Iterable[IndexEntry]) -> list[dict[str, Any]]:
+        """Decode the records of index entries, in the given order."""
+        return [self.record(entry) for entry in entries]
+
+
+class HistoryIndex:
+    """
+    In-memory lookup tables over a history file, backed by its sidecar index.
+
+    The tables hold entries in file order. Use `view` to query them.
+
+    Attributes:
+        history_file (Path): The indexed history file.
+        entries (List[IndexEntry]): Every record, in file order.
+        by_id (Dict[str, IndexEntry]): Records by message_id.
+        by_sender (Dict[str, List[IndexEntry]]): Records by sender_name.
+        by_parent (Dict[str, List[IndexEntry]]): Records by parent_id.
+        by_role (Dict[str, List[IndexEntry]]): Records by role.
+        by_delegate (Dict[str, List[IndexEntry]]): User messages by the last entry of
+            their supervisor_chain.
+    """
+
+    def __init__(self, history_file: Path, write_lock: threading.RLock):
+        """
+        Initialize the index; it is loaded on first use.
+
+        Args:
+            history_file (Path): The history file.
+            write_lock (threading.RLock): The lock held while records are appended to
+                the history file and its sidecar (see `HistoryWriter.lock`).
+        """
+        self.history_file = history_file
+        self._write_lock = write_lock
+        self._query_lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget every entry."""
+        self.entries: list[IndexEntry] = []
+        self.by_id: dict[str, IndexEntry] = {}
+        self.by_sender: dict[str, list[IndexEntry]] = collections.defaultdict(list)
+        self.by_parent: dict[str, list[IndexEntry]] = collections.defaultdict(list)
+        self.by_role: dict[str, list[IndexEntry]] = collections.defaultdict(list)
+        self.by_delegate: dict[str, list[IndexEntry]] = collections.defaultdict(list)
+        # History bytes covered by the entries, and sidecar bytes read.
+        self._end = 0
+        self._sidecar_read = 0
+        self._stat: tuple[int, int] | None = None
+
+    def _add(self, entry: IndexEntry) -> None:
+        """Add an entry to the tables."""
+        self._end = entry.offset + entry.length
+        if entry.role is None:
+            return  # unreadable record
+        self.entries.append(entry)
+        self.by_id.setdefault(entry.message_id, entry)
+        self.by_sender[entry.sender_name].append(entry)
+        if entry.parent_id is not None:
+            self.by_parent[entry.parent_id].append(entry)
+        self.by_role[entry.role].append(entry)
+        if entry.delegate is not None:
+            self.by_delegate[entry.delegate].append(entry)
+
+    def refresh(self) -> None:
+        """Bring the tables up to date with the history file, rebuilding the sidecar if needed."""
+        try:
+            stat = os.stat(self.history_file)
+        except FileNotFoundError:
+            self._reset()
+            return
+        if (stat.st_size, stat.st_mtime_ns) == self._stat:
+            return
+        with self._write_lock:
+            stat = os.stat(self.history_file)
+            if stat.st_size < self._end or (stat.st_size == self._end and self._stat is not None):
+                # Truncated or rewritten in place.
+                self._rebuild()
+            elif not self._read_sidecar():
+                self._rebuild()
+            elif self._end < stat.st_size:
+                self._scan_history()
+            stat = os.stat(self.history_file)
+            # Skip the next refresh only if nothing was appended meanwhile.
+            self._stat = (stat.st_size, stat.st_mtime_ns) if stat.st_size == self._end else None
+
+    def _read_sidecar(self) -> bool:
+        """
+        Add the sidecar entries not read yet.
+
+        Returns:
+            bool: False if the sidecar does not match the history file.
+        """
+        try:
+            with open(sidecar_path(self.history_file), "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < self._sidecar_read:
+                    return False
+                f.seek(self._sidecar_read)
+                data = f.read()
+        except FileNotFoundError:
+            return self._sidecar_read == 0
+        if not data:
+            return True
+        if not data.endswith(b"\n"):
+            return False
+        try:
+            entries = [IndexEntry(*json.loads(line)) for line in data.splitlines()]
+        except (ValueError, TypeError):
+            return False
+        for entry in entries:
+            if entry.offset != self._end:
+                return False
+            self._add(entry)
+        self._sidecar_read += len(data)
+        last = entries[-1]
+        with open(self.history_file, "rb") as f:
+            f.seek(last.offset)
+            line = f.read(last.length)
+        return line[:1] == b"{" and line.endswith(b"\n") and len(line) == last.length
+
+    def _rebuild(self) -> None:
+        """Index the whole history file and rewrite the sidecar."""
+        logger.debug(f"Rebuilding history index {sidecar_path(self.history_file)}")
+        self._reset()
+        # Truncated rather than deleted: the history writer keeps it open for appending.
+        open(sidecar_path(self.history_file), "wb").close()
+        self._scan_history()
+
+    def _scan_history(self) -> None:
+        """Index the complete history lines after the covered bytes and append them to the sidecar."""
+        new: list[IndexEntry] = []
+        offset = self._end
+        with open(self.history_file, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # still being written
+                try:
+                    entry = index_entry(offset, len(line), json.loads(line))
+                except ValueError as e:
+                    logger.warning(f"Skipping unreadable record at byte {offset} of {self.history_file}: {e}")
+                    # Keep a placeholder, so the sidecar stays contiguous.
+                    entry = IndexEntry(offset, len(line), None, None, None, None, None)
+                new.append(entry)
+                self._add(entry)
+                offset += len(line)
+        self._sidecar_read += append_to_sidecar(self.history_file, new)
+
+    @contextlib.contextmanager
+    def view(self) -> Iterator[HistoryView]:
+        """
+        Refresh the index and open a view of the history file.
+
+        Queries on one index are serialized while a view is open.
+
+        Yields:
+            HistoryView: The view.
+        """
+        with self._query_lock:
+            self.refresh()
+            if not self.entries:
+                yield HistoryView(self, b"")
+                return
+            with open(self.history_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield HistoryView(self, buffer)
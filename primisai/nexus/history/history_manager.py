@@ -3,9 +3,10 @@ This module provides functionality for managing conversation history in hierarch
 AI workflows. It handles storage and retrieval of messages between users,
 supervisors, agents, and tools within a workflow.
 
-The module uses a JSONL-based storage system where each workflow's conversation
-history is stored in a dedicated file, supporting message threading, delegation
-chains, and relationship tracking between different entities.
+By default each workflow's conversation history is stored in a dedicated JSONL
+file; SQLite and in-memory backends are also available (see `storage`). Storage
+supports message threading, delegation chains, and relationship tracking between
+different entities.
 
 Components:
     EntityType: Enum for different entity types (USER, MAIN_SUPERVISOR, etc.)
@@ -13,19 +14,30 @@ Components:
 
 Structure:
     nexus_workflows/{workflow_id}/history.jsonl
+    nexus_workflows/{workflow_id}/history.jsonl.idx   (offset index, see history_index)
+    nexus_workflows/history.sqlite3                   (SQLite backend, all workflows)
 
 Note:
-    Workflow directory must be initialized by a main supervisor before use.
+    With the JSONL backend, the workflow directory must be initialized by a main
+    supervisor before use.
 """
 
 import os, collections
 import json
+import logging
+import threading
 import uuid
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Callable
 from pathlib import Path
 from enum import Enum
 
+from primisai.nexus.history.history_writer import get_history_writer
+from primisai.nexus.history.storage import (BACKENDS, DEFAULT_ROOT, HistoryReader, JsonlStorage, open_storage,
+                                           release_storage)
+
+logger = logging.getLogger(__name__)
+
 class EntityType(str, Enum):
     """Enumeration of entity types in the workflow system."""
     USER = "user"
@@ -44,41 +56,76 @@ class HistoryManager:
 
     Attributes:
         workflow_id (str): Unique identifier for the workflow
+        backend (str): The storage backend: ``"jsonl"``, ``"sqlite"`` or ``"memory"``
+        root (Path): Directory holding the workflows' histories
         workflow_path (Path): Path to the workflow directory
-        history_file (Path): Path to the JSONL file storing the conversation history
+        history_file (Optional[Path]): Path to the JSONL file storing the conversation
+            history; None with other backends
+
+    Queries go through indexes of the backend (for JSONL, a sidecar offset index,
+    see `history_index`), so they decode only the records they need.
     """
 
-    def __init__(self, workflow_id: str):
+    def __init__(self,
+                 workflow_id: str,
+                 durability: str | None = None,
+                 flush_interval: float | None = None,
+                 backend: str = "jsonl",
+                 root: str | Path | None = None):
         """
         Initialize the HistoryManager.
 
         Args:
             workflow_id (str): Unique identifier for the workflow.
                              Must be provided by a main supervisor.
+            durability (Optional[str]): When appended messages are written (see
+                `history_writer`): ``"message"`` (each append), ``"interval"`` (every
+                ``flush_interval`` seconds) or ``"turn"`` (at the end of each turn, with
+                fsync). Shared by all managers of the workflow; None keeps the workflow's
+                policy (``"message"`` by default).
+            flush_interval (Optional[float]): Seconds between writes under the
+                ``"interval"`` policy.
+            backend (str): ``"jsonl"`` (a file per workflow), ``"sqlite"`` (one indexed
+                database per root) or ``"memory"`` (kept in the process only, shared by
+                the managers of the workflow). See `storage`.
+            root (Optional[Union[str, Path]]): Directory holding the workflows' histories;
+                ``nexus_workflows`` by default. Ignored by the memory backend.
 
         Raises:
-            ValueError: If workflow_id is None or workflow directory doesn't exist.
+            ValueError: If workflow_id is None, the backend is unknown, the workflow
+                directory of a JSONL history doesn't exist or the durability settings
+                are invalid.
         """
         if not workflow_id:
             raise ValueError("workflow_id must be provided")
+        if backend not in BACKENDS:
+            raise ValueError(f"history backend must be one of {', '.join(BACKENDS)}")
 
         self.workflow_id = workflow_id
-        self.workflow_path = Path("nexus_workflows") / self.workflow_id
-        self.history_file = self.workflow_path / "history.jsonl"
+        self.backend = backend
+        self.root = DEFAULT_ROOT if root is None else Path(root)
+        self.workflow_path = self.root / self.workflow_id
+        self.history_file = self.workflow_path / "history.jsonl" if backend == "jsonl" else None
 
-        if not self.workflow_path.exists():
+        if backend == "jsonl" and not self.workflow_path.exists():
             raise ValueError(
                 f"Workflow directory does not exist: {self.workflow_path}. "
                 "It should be created by the main supervisor."
             )
 
+        self._storage = open_storage(backend, self.root, workflow_id, durability, flush_interval)
+        self._resolved_root = self.root.resolve()
+        # Entities with a system message in this workflow; updated on append.
+        self._system_senders: set[str] = set()
+
     def append_message(self,
                     message: dict[str, Any],
                     sender_type: EntityType,
                     sender_name: str,
                     parent_id: str | None = None,
                     tool_call_id: str | None = None,
-                    supervisor_chain: list[str] | None = None) -> str:
+                    supervisor_chain: list[str] | None = None,
+                    metadata: dict[str, Any] | None = None) -> str:
         """
         Append a message to the conversation history.
         
@@ -92,6 +139,8 @@ class HistoryManager:
             parent_id (Optional[str]): ID of the parent message in conversation
             tool_call_id (Optional[str]): ID of related tool call if applicable
             supervisor_chain (Optional[List[str]]): List of supervisors in the delegation chain
+            metadata (Optional[Dict[str, Any]]): Extra record attributes that are not part of
+                the chat message (e.g. ``{'summary': True, 'tail_turns': 4}`` for compaction summaries)
 
         Returns:
             str: Generated message ID for reference in future messages
@@ -124,10 +173,13 @@ class HistoryManager:
             'supervisor_chain': supervisor_chain or [],  # Empty list if None
             **message  # Include original message fields
         }
+        if metadata:
+            entry['metadata'] = metadata
 
-        # Append to history file
-        with open(self.history_file, 'a') as f:
-            f.write(json.dumps(entry) + '\n')
+        # Append to the storage (written according to the durability policy)
+        self._storage.append(entry)
+        if entry['role'] == 'system':
+            self._system_senders.add(sender_name)
 
         return message_id
 
@@ -141,6 +193,13 @@ class HistoryManager:
         as would be expected by any LLM for conversation continuation. Irrelevant messages 
         intended for other agents are excluded.
 
+        If the entity's conversation was compacted, the history resumes from the latest
+        summary record: the system message, the summary, and only the turns after it.
+
+        Only the entity's records and those threaded under its turns are read through
+        the backend's indexes, so loading takes time linear in the size of that part of
+        the history.
+
         Args:
             entity_name (str): The name of the entity for which to load chat history 
                 (e.g. supervisor, assistant supervisor, or agent).
@@ -152,69 +211,73 @@ class HistoryManager:
         Example:
             >>> agent.chat_history = history_manager.load_chat_history("AgentName")
         """
-        if not self.history_file.exists():
+        if not self._storage.exists():
             return []
-        
-        with open(self.history_file) as f:
-            all_msgs = [json.loads(line) for line in f]
 
+        with self._storage.reader() as reader:
+            return self._load_chat_history(reader, entity_name)
+
+    def _load_chat_history(self, reader: HistoryReader, entity_name: str) -> list[dict[str, Any]]:
+        """Build the chat history of an entity from the records it touches (see `load_chat_history`)."""
+        def children_of(message_id: str, keep: Callable[[dict[str, Any]], bool]) -> list[dict[str, Any]]:
+            # Children come in insertion order, so the stable sort keeps it for equal timestamps.
+            return sorted(filter(keep, reader.children(message_id)), key=lambda x: x["timestamp"])
+
+        own = reader.by_sender(entity_name)
         system = next(
-            (m for m in all_msgs if m["role"] == "system" and m["sender_name"] == entity_name),
+            (m for m in own if m["role"] == "system" and not self._is_summary_record(m)),
+            None
+        )
+        summary = next(
+            (m for m in reversed(own) if self._is_summary_record(m)),
             None
         )
         history = []
+        # Canonical JSON of every message in `history`, for the duplicate check.
+        seen: set[str] = set()
+
+        def add(msg: dict[str, Any], unique: bool = True) -> None:
+            formatted = self._format_for_chat_history(msg)
+            key = json.dumps(formatted, sort_keys=True)
+            if unique and key in seen:
+                return
+            seen.add(key)
+            history.append(formatted)
+
         if system:
-            history.append(self._format_for_chat_history(system))
-
-        delegated_user_msgs = []
-        for m in all_msgs:
-            if m["role"] == "user":
-                if m.get("supervisor_chain") and m["supervisor_chain"] and m["supervisor_chain"][-1] == entity_name:
-                    delegated_user_msgs.append(m)
-                else:
-                    if any(
-                        n["role"] == "assistant" and n["sender_name"] == entity_name and n.get("parent_id") == m["message_id"]
-                        for n in all_msgs
-                    ):
-                        delegated_user_msgs.append(m)
+            add(system, unique=False)
+        if summary:
+            add(summary, unique=False)
 
+        # User messages delegated to this entity, or that it answered.
+        answered = {m["parent_id"] for m in own if m["role"] == "assistant" and m.get("parent_id")}
+        delegated_user_msgs = reader.user_messages(entity_name, answered)
         delegated_user_msgs.sort(key=lambda x: x["timestamp"])
 
+        if summary:
+            # Keep the turns that were still verbatim in memory when the summary
+            # was applied, plus every turn started afterwards.
+            before = [m for m in delegated_user_msgs if m["timestamp"] <= summary["timestamp"]]
+            after = [m for m in delegated_user_msgs if m["timestamp"] > summary["timestamp"]]
+            tail_turns = summary["metadata"].get("tail_turns", 0)
+            delegated_user_msgs = (before[-tail_turns:] if tail_turns else []) + after
+
         for user_msg in delegated_user_msgs:
-            history.append(self._format_for_chat_history(user_msg))
-            
-            queue = collections.deque()
-            
-            children = [m for m in all_msgs if m.get("parent_id") == user_msg["message_id"]]
-            children = [m for m in children if m["sender_name"] == entity_name or m["role"] == "tool"]
-            children.sort(key=lambda x: x["timestamp"])
-            
-            for ch in children:
-                queue.append(ch)
+            add(user_msg, unique=False)
+
+            queue = collections.deque(children_of(
+                user_msg["message_id"], lambda m: m["sender_name"] == entity_name or m["role"] == "tool"))
             while queue:
                 msg = queue.popleft()
-                formatted = self._format_for_chat_history(msg)
-                if formatted not in history:
-                    history.append(formatted)
+                add(msg)
                 if msg["role"] == "assistant" and msg.get("tool_calls"):
+                    tool_msgs = children_of(msg["message_id"], lambda m: m["role"] == "tool")
                     for tool_call in msg["tool_calls"]:
-                        tool_msgs = [
-                            t for t in all_msgs
-                            if t["role"] == "tool"
-                            and t.get("tool_call_id") == tool_call["id"]
-                            and t.get("parent_id") == msg["message_id"]
-                        ]
-                        tool_msgs.sort(key=lambda x: x["timestamp"])
                         for tmsg in tool_msgs:
-                            tfmt = self._format_for_chat_history(tmsg)
-                            if tfmt not in history:
-                                history.append(tfmt)
-
-                            wrapups = [mm for mm in all_msgs if mm.get("parent_id") == tmsg["message_id"]
-                                    and mm["sender_name"] == entity_name]
-                            wrapups.sort(key=lambda x: x["timestamp"])
-                            for wmsg in wrapups:
-                                queue.append(wmsg)
+                            if tmsg.get("tool_call_id") != tool_call["id"]:
+                                continue
+                            add(tmsg)
+                            queue.extend(children_of(tmsg["message_id"], lambda m: m["sender_name"] == entity_name))
 
         return history
 
@@ -228,12 +291,11 @@ class HistoryManager:
         Example:
             >>> history = history_manager.get_frontend_history()
         """
-        if not self.history_file.exists():
+        if not self._storage.exists():
             return []
 
-        messages = []
-        with open(self.history_file) as f:
-            messages = [json.loads(line) for line in f]
+        with self._storage.reader() as reader:
+            messages = reader.messages()
 
         # Add delegation chain information for display
         for msg in messages:
@@ -286,9 +348,17 @@ class HistoryManager:
             formatted["name"] = msg["sender_name"]   # who returned tool output
         return formatted
     
+    @staticmethod
+    def _is_summary_record(msg: dict[str, Any]) -> bool:
+        """Return True if a persisted record is a conversation compaction summary."""
+        return bool((msg.get("metadata") or {}).get("summary"))
+
     def has_system_message(self, entity_name: str) -> bool:
         """
         Check if system message exists for an entity in the current workflow.
+
+        Entities known to have one are kept in memory, so repeated checks (e.g. when
+        agents are registered) do not query the storage.
         
         Args:
             entity_name (str): Name of the entity to check
@@ -296,17 +366,18 @@ class HistoryManager:
         Returns:
             bool: True if system message exists, False otherwise
         """
-        if not self.history_file.exists():
+        if entity_name in self._system_senders:
+            return True
+        if not self._storage.exists():
             return False
-            
-        with open(self.history_file) as f:
-            for line in f:
-                msg = json.loads(line)
-                if (msg['role'] == 'system' and 
-                    msg['sender_name'] == entity_name and 
-                    msg['workflow_id'] == self.workflow_id):
-                    return True
-        return False
+
+        with self._storage.reader() as reader:
+            found = any(
+                msg['workflow_id'] == self.workflow_id for msg in reader.system_messages(entity_name)
+            )
+        if found:
+            self._system_senders.add(entity_name)
+        return found
 
     def _sort_messages(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """
@@ -349,9 +420,38 @@ class HistoryManager:
 
     def clear_history(self) -> None:
         """Clear the entire conversation history for the current workflow."""
-        if self.history_file.exists():
-            self.history_file.unlink()
-            self.history_file.touch()
+        if self._storage.exists():
+            self._storage.clear()
+        self._system_senders.clear()
+
+    def end_turn(self) -> None:
+        """
+        Mark the end of an agent's or supervisor's turn.
+
+        Under the ``"turn"`` durability policy, the turn's messages are written and
+        synced to disk.
+        """
+        self._storage.end_turn()
+
+    def flush(self) -> None:
+        """Write any buffered messages of the workflow and sync them to disk."""
+        self._storage.flush(sync=True)
+
+    def close(self) -> None:
+        """Write any buffered messages and close the workflow's history file; later appends reopen it."""
+        self._storage.close()
+
+    def get_all_messages(self) -> list[dict[str, Any]]:
+        """
+        Get every stored message of the workflow, in the order they were appended.
+
+        Returns:
+            List[Dict[str, Any]]: The raw stored messages.
+        """
+        if not self._storage.exists():
+            return []
+        with self._storage.reader() as reader:
+            return reader.messages()
 
     def get_messages_by_entity(self, entity_name: str) -> list[dict[str, Any]]:
         """
@@ -363,10 +463,105 @@ class HistoryManager:
         Returns:
             List[Dict[str, Any]]: All messages related to the entity
         """
-        messages = []
-        with open(self.history_file) as f:
-            for line in f:
-                msg = json.loads(line)
-                if msg['sender_name'] == entity_name:
-                    messages.append(msg)
-        return self._sort_messages(messages)
\ No newline at end of file
+        with self._storage.reader() as reader:
+            messages = reader.by_sender(entity_name)
+        return self._sort_messages(messages)
+
+    def get_message(self, message_id: str) -> dict[str, Any] | None:
+        """
+        Get a single message by its ID.
+
+        Args:
+            message_id (str): ID returned by `append_message`.
+
+        Returns:
+            Optional[Dict[str, Any]]: The stored message, or None if there is none with this ID.
+        """
+        with self._storage.reader() as reader:
+            return reader.message(message_id)
+
+    def _is_current(self) -> bool:
+        """Return True if the manager still stores where a new one for its workflow would."""
+        if self.backend == "memory":
+            return True
+        if self.root.resolve() != self._resolved_root:
+            return False  # relative root, and the working directory changed
+        return self.workflow_path.exists() if self.backend == "jsonl" else self._storage.exists()
+
+
+_managers: dict[str, HistoryManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_history_manager(workflow_id: str,
+                        durability: str | None = None,
+                        flush_interval: float | None = None,
+                        backend: str | None = None,
+                        root: str | Path | None = None) -> HistoryManager:
+    """
+    Return the shared HistoryManager of a workflow, creating it on first use.
+
+    Agents and supervisors of a workflow share one manager, and with it its
+    storage backend, its indexes and its in-memory metadata, so registering an
+    entity does not re-read the history. Entities that do not name a backend
+    get the one the workflow already uses.
+
+    Args:
+        workflow_id (str): Unique identifier for the workflow.
+        durability (Optional[str]): The workflow's durability policy (see `HistoryManager`);
+            None keeps the current one.
+        flush_interval (Optional[float]): Seconds between writes under the ``"interval"``
+            policy; None keeps the current one.
+        backend (Optional[str]): ``"jsonl"``, ``"sqlite"`` or ``"memory"``; None keeps the
+            workflow's backend (``"jsonl"`` for a new workflow).
+        root (Optional[Union[str, Path]]): Directory holding the workflows' histories;
+            None keeps the workflow's root (``nexus_workflows`` for a new workflow).
+
+    Returns:
+        HistoryManager: The shared manager.
+
+    Raises:
+        ValueError: If workflow_id is None, the backend is unknown, the workflow
+            directory of a JSONL history doesn't exist or the durability settings
+            are invalid.
+    """
+    if not workflow_id:
+        raise ValueError("workflow_id must be provided")
+    with _managers_lock:
+        manager = _managers.get(workflow_id)
+        if manager is not None:
+            same_storage = ((backend is None or backend == manager.backend)
+                            and (root is None or Path(root).resolve() == manager._resolved_root))
+            if same_storage and manager._is_current():
+                if durability is not None or flush_interval is not None:
+                    if isinstance(manager._storage, JsonlStorage):
+                        get_history_writer(manager.history_file, durability, flush_interval)
+                    else:
+                        logger.warning(f"History of workflow {workflow_id} is already open; "
+                                       "ignoring the new durability settings")
+                return manager
+            if backend is None:
+                backend = manager.backend
+            if root is None:
+                root = manager.root
+        manager = _managers[workflow_id] = HistoryManager(
+            workflow_id, durability, flush_interval, "jsonl" if backend is None else backend, root)
+        return manager
+
+
+def release_history_manager(workflow_id: str) -> None:
+    """
+    Close the shared HistoryManager of a finished workflow and forget it.
+
+    The manager's storage is closed and dropped as well (see `release_storage`),
+    so short-lived workflows, such as Architect evaluation runs, do not keep
+    open files or in-memory records for the life of the process. Entities still
+    holding the manager should not use it afterwards.
+
+    Args:
+        workflow_id (str): Unique identifier for the workflow.
+    """
+    with _managers_lock:
+        manager = _managers.pop(workflow_id, None)
+    if manager is not None:
+        release_storage(manager._storage, workflow_id)
@@ -0,0 +1,292 @@
+"""
+History writer module batching appends to workflow history files.
+
+Every agent and supervisor of a workflow appends to the same
+``history.jsonl``; a tool-using turn writes four to six records. Instead of
+opening and closing the file for each record, all `HistoryManager` instances
+of a workflow share one `HistoryWriter`, which keeps the history file and its
+sidecar index (see `history_index`) open and writes records in batches
+(group commit): records appended by concurrent threads while a batch is being
+written go out together in the next one. Batches are written one at a time, so
+lines of concurrent writers never interleave.
+
+When records reach the file depends on the durability policy:
+
+- ``"message"`` (default): each append is written before it returns.
+- ``"interval"``: appends are buffered and written every ``flush_interval``
+  seconds.
+- ``"turn"``: appends are buffered until an agent or supervisor finishes its
+  turn; the batch is then written and fsync'ed to disk.
+
+Pending records are always written before the history is queried, on
+`flush`/`close`, and when the process exits.
+"""
+
+import atexit
+import contextlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from primisai.nexus.history.history_index import IndexEntry, index_entry, sidecar_path
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_POLICIES = ("message", "interval", "turn")
+DEFAULT_FLUSH_INTERVAL = 0.05
+
+
+def validate_durability(durability: str, flush_interval: float) -> None:
+    """
+    Check durability settings.
+
+    Args:
+        durability (str): ``"message"``, ``"interval"`` or ``"turn"``.
+        flush_interval (float): Seconds between writes under the ``"interval"`` policy.
+
+    Raises:
+        ValueError: If the policy is unknown or the interval is not positive.
+    """
+    if durability not in DURABILITY_POLICIES:
+        raise ValueError(f"durability must be one of {', '.join(DURABILITY_POLICIES)}")
+    if isinstance(flush_interval, bool) or not isinstance(flush_interval, (int, float)) or flush_interval <= 0:
+        raise ValueError("flush_interval must be a positive number of seconds")
+
+
+class HistoryWriter:
+    """
+    Buffered, thread-safe appender for one history file and its sidecar index.
+
+    Attributes:
+        history_file (Path): The history file.
+        durability (str): The durability policy (see `DURABILITY_POLICIES`).
+        flush_interval (float): Seconds between writes under the ``"interval"`` policy.
+        lock (threading.RLock): Held while a batch is written; readers hold it while
+            they index the file, so they never see a record without its index entry.
+    """
+
+    def __init__(self,
+                 history_file: Path,
+                 durability: str = "message",
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        """
+        Initialize the writer; the files are opened on the first write.
+
+        Args:
+            history_file (Path): The history file.
+            durability (str): ``"message"``, ``"interval"`` or ``"turn"``.
+            flush_interval (float): Seconds between writes under the ``"interval"`` policy.
+
+        Raises:
+            ValueError: If the policy is unknown or the interval is not positive.
+        """
+        self.history_file = Path(history_file)
+        self.lock = threading.RLock()
+        self._pending_lock = threading.Lock()
+        self._pending: list[tuple[bytes, IndexEntry]] = []
+        self._timer: threading.Timer | None = None
+        self._file: BinaryIO | None = None
+        self._sidecar: BinaryIO | None = None
+        self.configure(durability, flush_interval)
+
+    def configure(self, durability: str, flush_interval: float) -> None:
+        """
+        Change the durability policy, after writing the pending records.
+
+        Args:
+            durability (str): ``"message"``, ``"interval"`` or ``"turn"``.
+            flush_interval (float): Seconds between writes under the ``"interval"`` policy.
+
+        Raises:
+            ValueError: If the policy is unknown or the interval is not positive.
+        """
+        validate_durability(durability, flush_interval)
+        with self.lock:
+            self.flush()
+            self.durability = durability
+            self.flush_interval = flush_interval
+
+    def append(self, record: dict[str, Any]) -> None:
+        """
+        Append a record; when it is written depends on the durability policy.
+
+        Args:
+            record (Dict[str, Any]): The JSON-serializable record.
+        """
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        # Serialized now, as the caller may change the record's lists afterwards.
+        entry = index_entry(0, len(line), record)
+        with self._pending_lock:
+            self._pending.append((line, entry))
+            start_timer = self.durability == "interval" and self._timer is None
+            if start_timer:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if self.durability == "message":
+            self.flush()
+
+    def flush(self, sync: bool = False) -> None:
+        """
+        Write the pending records.
+
+        Records appended by other threads while a batch is written are left for
+        the next call; every caller returns once the records it saw pending are written.
+
+        Args:
+            sync (bool): Also fsync the files, so the records survive a crash.
+        """
+        with self.lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+                timer, self._timer = self._timer, None
+            if timer is not None:
+                timer.cancel()
+            if batch:
+                self._write(batch)
+            if sync and self._file is not None:
+                os.fsync(self._file.fileno())
+                os.fsync(self._sidecar.fileno())
+
+    def _write(self, batch: list[tuple[bytes, IndexEntry]]) -> None:
+        """Write a batch of records and their index entries; called with `lock` held."""
+        if self._file is not None and not (self._is_open_file(self.history_file, self._file)
+                                           and self._is_open_file(sidecar_path(self.history_file), self._sidecar)):
+            self._close_files()  # deleted or replaced behind our back, e.g. a cleaned-up workflow
+        if self._file is None:
+            self._file = open(self.history_file, "ab", buffering=0)
+            self._sidecar = open(sidecar_path(self.history_file), "ab", buffering=0)
+        offset = os.fstat(self._file.fileno()).st_size
+        entries = []
+        for line, entry in batch:
+            entries.append(json.dumps(list(entry._replace(offset=offset))) + "\n")
+            offset += len(line)
+        _write_all(self._file, b"".join(line for line, _ in batch))
+        _write_all(self._sidecar, "".join(entries).encode("utf-8"))
+
+    @staticmethod
+    def _is_open_file(path: Path, f: BinaryIO) -> bool:
+        """Return True if `f` is still the file at `path`."""
+        try:
+            return os.path.samestat(os.stat(path), os.fstat(f.fileno()))
+        except FileNotFoundError:
+            return False
+
+    def end_turn(self) -> None:
+        """Mark the end of an agent's or supervisor's turn; writes and syncs under the ``"turn"`` policy."""
+        if self.durability == "turn":
+            self.flush(sync=True)
+
+    def clear(self) -> None:
+        """Discard pending records and empty the history file and its sidecar."""
+        with self.lock:
+            with self._pending_lock:
+                self._pending = []
+            self._close_files()
+            with contextlib.suppress(FileNotFoundError):
+                self.history_file.unlink()
+            self.history_file.touch()
+            sidecar_path(self.history_file).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Write the pending records and close the files; a later append reopens them."""
+        with self.lock:
+            self.flush(sync=self.durability == "turn")
+            self._close_files()
+
+    def _close_files(self) -> None:
+        """Close the open files; called with `lock` held."""
+        for f in (self._file, self._sidecar):
+            if f is not None:
+                f.close()
+        self._file = self._sidecar = None
+
+
+def _write_all(f: BinaryIO, data: bytes) -> None:
+    """Write all of `data` to an unbuffered file."""
+    view = memoryview(data)
+    while view:
+        view = view[f.write(view):]
+
+
+_writers: dict[str, HistoryWriter] = {}
+# Writers whose settings were given explicitly.
+_configured: set[str] = set()
+_writers_lock = threading.Lock()
+
+
+def get_history_writer(history_file: Path,
+                       durability: str | None = None,
+                       flush_interval: float | None = None) -> HistoryWriter:
+    """
+    Return the shared writer of a history file, creating it on first use.
+
+    The settings of the first call that gives them apply; later, differing
+    settings are ignored with a warning, as all writers of a workflow share one
+    policy.
+
+    Args:
+        history_file (Path): The history file.
+        durability (Optional[str]): The durability policy; None keeps the current one
+            (``"message"`` for a new writer).
+        flush_interval (Optional[float]): Seconds between writes under the ``"interval"``
+            policy; None keeps the current one.
+
+    Returns:
+        HistoryWriter: The shared writer.
+
+    Raises:
+        ValueError: If the settings are invalid.
+    """
+    key = str(Path(history_file).resolve())
+    explicit = durability is not None or flush_interval is not None
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = HistoryWriter(
+                Path(key),
+                "message" if durability is None else durability,
+                DEFAULT_FLUSH_INTERVAL if flush_interval is None else flush_interval)
+        else:
+            settings = (writer.durability if durability is None else durability,
+                        writer.flush_interval if flush_interval is None else flush_interval)
+            if explicit and key not in _configured:
+                writer.configure(*settings)
+            elif settings != (writer.durability, writer.flush_interval):
+                logger.warning(f"History writer for {history_file} already uses durability={writer.durability!r}, "
+                               f"flush_interval={writer.flush_interval}; ignoring the new settings")
+        if explicit:
+            _configured.add(key)
+        return writer
+
+
+def release_history_writer(history_file: Path) -> None:
+    """
+    Close the shared writer of a history file and forget it.
+
+    The next `get_history_writer` call for the file creates a new writer.
+
+    Args:
+        history_file (Path): The history file.
+    """
+    key = str(Path(history_file).resolve())
+    with _writers_lock:
+        writer = _writers.pop(key, None)
+        _configured.discard(key)
+    if writer is not None:
+        writer.close()
+
+
+@atexit.register
+def flush_all() -> None:
+    """Write the pending records of every writer, e.g. when the process exits."""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        try:
+            writer.flush(sync=writer.durability != "message")
+        except Exception as e:
+            logger.warning(f"Could not flush history {writer.history_file}: {e}")
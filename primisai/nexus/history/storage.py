@@ -0,0 +1,508 @@
+"""
+History storage module with pluggable backends for workflow histories.
+
+`HistoryManager` stores records through a `HistoryStorage` backend and
+queries them through the backend's `HistoryReader`:
+
+- ``"jsonl"`` (default): ``{root}/{workflow_id}/history.jsonl`` with its
+  sidecar offset index (see `history_index` and `history_writer`).
+- ``"sqlite"``: one indexed SQLite database per root,
+  ``{root}/history.sqlite3``, in WAL mode, shared by all workflows.
+- ``"memory"``: records kept in the process only, for ephemeral runs such as
+  Architect evaluations; nothing is written to disk.
+
+The root defaults to ``nexus_workflows``. The backend and root are chosen per
+main supervisor (``history_backend``/``history_root``, also YAML keys).
+"""
+
+import abc
+import atexit
+import collections
+import contextlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from primisai.nexus.history.history_index import HistoryIndex, HistoryView
+from primisai.nexus.history.history_writer import (DEFAULT_FLUSH_INTERVAL, get_history_writer, release_history_writer,
+                                                   validate_durability)
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("jsonl", "sqlite", "memory")
+DEFAULT_ROOT = Path("nexus_workflows")
+
+
+class HistoryReader(abc.ABC):
+    """
+    Queries over the records of one workflow, as `HistoryManager` needs them.
+
+    Every method returns records in the order they were appended.
+    """
+
+    @abc.abstractmethod
+    def messages(self) -> list[dict[str, Any]]:
+        """Return every record."""
+
+    @abc.abstractmethod
+    def message(self, message_id: str) -> dict[str, Any] | None:
+        """Return the record with a message_id, or None."""
+
+    @abc.abstractmethod
+    def by_sender(self, sender_name: str) -> list[dict[str, Any]]:
+        """Return the records of a sender."""
+
+    @abc.abstractmethod
+    def system_messages(self, sender_name: str) -> Iterator[dict[str, Any]]:
+        """Yield the system messages of a sender, decoding each as it is consumed."""
+
+    @abc.abstractmethod
+    def children(self, parent_id: str) -> list[dict[str, Any]]:
+        """Return the records whose parent_id is `parent_id`."""
+
+    @abc.abstractmethod
+    def user_messages(self, delegate: str, message_ids: set[str]) -> list[dict[str, Any]]:
+        """
+        Return the user messages delegated to an entity or with one of the given IDs.
+
+        Args:
+            delegate (str): Matches user messages whose supervisor_chain ends with it.
+            message_ids (Set[str]): Matches user messages with these message_ids.
+        """
+
+
+class HistoryStorage(abc.ABC):
+    """
+    Base class of history storage backends.
+
+    Backends must implement the abstract methods; the others suit storages
+    that neither buffer records nor hold open files.
+
+    Attributes:
+        backend (str): The backend name (see `BACKENDS`).
+    """
+
+    backend = ""
+
+    @abc.abstractmethod
+    def append(self, record: dict[str, Any]) -> None:
+        """Append a record."""
+
+    @abc.abstractmethod
+    def reader(self) -> contextlib.AbstractContextManager[HistoryReader]:
+        """Open a reader that sees every record appended so far."""
+
+    def exists(self) -> bool:
+        """Return True if the storage has been created."""
+        return True
+
+    def end_turn(self) -> None:
+        """Mark the end of an agent's or supervisor's turn (see the durability policies)."""
+
+    def flush(self, sync: bool = False) -> None:
+        """Write buffered records; with `sync`, make them survive a crash."""
+
+    def close(self) -> None:
+        """Write buffered records and release open files."""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Delete every record of the workflow."""
+
+
+class _JsonlReader(HistoryReader):
+    """Reader over a history file, decoding only the records a query selects."""
+
+    def __init__(self, view: HistoryView):
+        self._view = view
+        self._index = view.index
+
+    def messages(self) -> list[dict[str, Any]]:
+        return self._view.records(self._index.entries)
+
+    def message(self, message_id: str) -> dict[str, Any] | None:
+        entry = self._index.by_id.get(message_id)
+        return self._view.record(entry) if entry is not None else None
+
+    def by_sender(self, sender_name: str) -> list[dict[str, Any]]:
+        return self._view.records(self._index.by_sender.get(sender_name, []))
+
+    def system_messages(self, sender_name: str) -> Iterator[dict[str, Any]]:
+        return (self._view.record(e) for e in self._index.by_sender.get(sender_name, []) if e.role == "system")
+
+    def children(self, parent_id: str) -> list[dict[str, Any]]:
+        return self._view.records(self._index.by_parent.get(parent_id, []))
+
+    def user_messages(self, delegate: str, message_ids: set[str]) -> list[dict[str, Any]]:
+        candidates = {e.offset: e for e in self._index.by_delegate.get(delegate, [])}
+        for message_id in message_ids:
+            entry = self._index.by_id.get(message_id)
+            if entry is not None and entry.role == "user":
+                candidates[entry.offset] = entry
+        return self._view.records(candidates[offset] for offset in sorted(candidates))
+
+
+class JsonlStorage(HistoryStorage):
+    """
+    The JSONL history file of a workflow, shared through its `HistoryWriter`.
+
+    Attributes:
+        history_file (Path): The history file.
+    """
+
+    backend = "jsonl"
+
+    def __init__(self, history_file: Path, durability: str | None = None, flush_interval: float | None = None):
+        """
+        Initialize the storage.
+
+        Args:
+            history_file (Path): The history file.
+            durability (Optional[str]): The durability policy (see `history_writer`).
+            flush_interval (Optional[float]): Seconds between writes under the ``"interval"`` policy.
+        """
+        self.history_file = history_file
+        self._writer = get_history_writer(history_file, durability, flush_interval)
+        self._index = HistoryIndex(history_file, self._writer.lock)
+
+    def append(self, record: dict[str, Any]) -> None:
+        self._writer.append(record)
+
+    @contextlib.contextmanager
+    def reader(self) -> Iterator[HistoryReader]:
+        self._writer.flush()
+        with self._index.view() as view:
+            yield _JsonlReader(view)
+
+    def exists(self) -> bool:
+        return self.history_file.exists()
+
+    def end_turn(self) -> None:
+        self._writer.end_turn()
+
+    def flush(self, sync: bool = False) -> None:
+        self._writer.flush(sync=sync)
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def clear(self) -> None:
+        if self.history_file.exists():
+            self._writer.clear()
+
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS records ("
+    "seq INTEGER PRIMARY KEY AUTOINCREMENT, workflow_id TEXT NOT NULL, message_id TEXT, "
+    "sender_name TEXT, parent_id TEXT, tool_call_id TEXT, role TEXT, delegate TEXT, data TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS records_workflow ON records(workflow_id)",
+    "CREATE INDEX IF NOT EXISTS records_message ON records(workflow_id, message_id)",
+    "CREATE INDEX IF NOT EXISTS records_sender ON records(workflow_id, sender_name)",
+    "CREATE INDEX IF NOT EXISTS records_parent ON records(workflow_id, parent_id)",
+    "CREATE INDEX IF NOT EXISTS records_tool_call ON records(workflow_id, tool_call_id)",
+    "CREATE INDEX IF NOT EXISTS records_delegate ON records(workflow_id, delegate)",
+)
+
+# Open databases: path -> (connection, lock).
+_databases: dict[str, tuple[sqlite3.Connection, threading.RLock]] = {}
+_databases_lock = threading.Lock()
+
+
+def _database(path: Path) -> tuple[sqlite3.Connection, threading.RLock]:
+    """Return the shared connection to a history database, creating the database if needed."""
+    key = str(path.resolve())
+    with _databases_lock:
+        if key not in _databases:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(key, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                db.execute(statement)
+            db.commit()
+            _databases[key] = (db, threading.RLock())
+        return _databases[key]
+
+
+class _SqliteReader(HistoryReader):
+    """Reader running indexed queries on the history database."""
+
+    def __init__(self, db: sqlite3.Connection, workflow_id: str):
+        self._db = db
+        self._workflow_id = workflow_id
+
+    def _select(self, where: str = "", params: Iterable[Any] = ()) -> list[dict[str, Any]]:
+        rows = self._db.execute(f"SELECT data FROM records WHERE workflow_id = ?{where} ORDER BY seq",
+                                (self._workflow_id, *params))
+        return [json.loads(data) for data, in rows]
+
+    def messages(self) -> list[dict[str, Any]]:
+        return self._select()
+
+    def message(self, message_id: str) -> dict[str, Any] | None:
+        found = self._select(" AND message_id = ?", (message_id,))
+        return found[0] if found else None
+
+    def by_sender(self, sender_name: str) -> list[dict[str, Any]]:
+        return self._select(" AND sender_name = ?", (sender_name,))
+
+    def system_messages(self, sender_name: str) -> Iterator[dict[str, Any]]:
+        rows = self._db.execute("SELECT data FROM records WHERE workflow_id = ? AND sender_name = ? AND role = 'system' "
+                                "ORDER BY seq", (self._workflow_id, sender_name))
+        return (json.loads(data) for data, in rows)
+
+    def children(self, parent_id: str) -> list[dict[str, Any]]:
+        return self._select(" AND parent_id = ?", (parent_id,))
+
+    def user_messages(self, delegate: str, message_ids: set[str]) -> list[dict[str, Any]]:
+        query = "SELECT seq, data FROM records WHERE workflow_id = ? AND role = 'user' AND "
+        rows = dict(self._db.execute(query + "delegate = ?", (self._workflow_id, delegate)))
+        ids = list(message_ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows.update(self._db.execute(query + f"message_id IN ({', '.join('?' * len(chunk))})",
+                                         (self._workflow_id, *chunk)))
+        return [json.loads(rows[seq]) for seq in sorted(rows)]
+
+
+class SqliteStorage(HistoryStorage):
+    """
+    The records of a workflow in an indexed SQLite database.
+
+    Under the ``"message"`` policy every append is committed; under
+    ``"interval"`` appends are committed at most every ``flush_interval``
+    seconds, and under ``"turn"`` at the end of each turn, followed by a
+    checkpoint that syncs the database file. Readers on the same connection see
+    uncommitted records.
+
+    Attributes:
+        path (Path): The database file.
+        workflow_id (str): The workflow whose records are stored.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self,
+                 path: Path,
+                 workflow_id: str,
+                 durability: str | None = None,
+                 flush_interval: float | None = None):
+        """
+        Initialize the storage, creating the database if needed.
+
+        Args:
+            path (Path): The database file.
+            workflow_id (str): The workflow whose records are stored.
+            durability (Optional[str]): The durability policy (``"message"`` by default).
+            flush_interval (Optional[float]): Seconds between commits under the ``"interval"`` policy.
+
+        Raises:
+            ValueError: If the durability settings are invalid.
+        """
+        self.durability = "message" if durability is None else durability
+        self.flush_interval = DEFAULT_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        validate_durability(self.durability, self.flush_interval)
+        self.path = path
+        self.workflow_id = workflow_id
+        self._db, self._lock = _database(path)
+        self._committed = time.monotonic()
+
+    def append(self, record: dict[str, Any]) -> None:
+        chain = record.get("supervisor_chain")
+        delegate = chain[-1] if record.get("role") == "user" and chain else None
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO records (workflow_id, message_id, sender_name, parent_id, tool_call_id, role, "
+                "delegate, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.workflow_id, record.get("message_id"), record.get("sender_name"), record.get("parent_id"),
+                 record.get("tool_call_id"), record.get("role"), delegate, json.dumps(record)))
+            if self.durability == "message" or (
+                    self.durability == "interval" and time.monotonic() - self._committed >= self.flush_interval):
+                self._commit()
+
+    def _commit(self, sync: bool = False) -> None:
+        """Commit the open transaction; called with the lock held."""
+        self._db.commit()
+        if sync:
+            self._db.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        self._committed = time.monotonic()
+
+    @contextlib.contextmanager
+    def reader(self) -> Iterator[HistoryReader]:
+        with self._lock:
+            yield _SqliteReader(self._db, self.workflow_id)
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def end_turn(self) -> None:
+        if self.durability == "turn":
+            self.flush(sync=True)
+
+    def flush(self, sync: bool = False) -> None:
+        with self._lock:
+            self._commit(sync)
+
+    def close(self) -> None:
+        self.flush(sync=self.durability == "turn")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM records WHERE workflow_id = ?", (self.workflow_id,))
+            self._commit()
+
+
+class _MemoryReader(HistoryReader):
+    """Reader over the records of a `MemoryStorage`, decoding each record it returns."""
+
+    def __init__(self, storage: "MemoryStorage"):
+        self._storage = storage
+
+    def _records(self, positions: Iterable[int]) -> list[dict[str, Any]]:
+        lines = self._storage._lines
+        return [json.loads(lines[position]) for position in positions]
+
+    def messages(self) -> list[dict[str, Any]]:
+        return self._records(range(len(self._storage._lines)))
+
+    def message(self, message_id: str) -> dict[str, Any] | None:
+        position = self._storage._by_id.get(message_id)
+        return self._records([position])[0] if position is not None else None
+
+    def by_sender(self, sender_name: str) -> list[dict[str, Any]]:
+        return self._records(self._storage._by_sender.get(sender_name, []))
+
+    def system_messages(self, sender_name: str) -> Iterator[dict[str, Any]]:
+        lines, roles = self._storage._lines, self._storage._roles
+        return (json.loads(lines[p]) for p in self._storage._by_sender.get(sender_name, []) if roles[p] == "system")
+
+    def children(self, parent_id: str) -> list[dict[str, Any]]:
+        return self._records(self._storage._by_parent.get(parent_id, []))
+
+    def user_messages(self, delegate: str, message_ids: set[str]) -> list[dict[str, Any]]:
+        positions = set(self._storage._by_delegate.get(delegate, []))
+        for message_id in message_ids:
+            position = self._storage._by_id.get(message_id)
+            if position is not None and self._storage._roles[position] == "user":
+                positions.add(position)
+        return self._records(sorted(positions))
+
+
+class MemoryStorage(HistoryStorage):
+    """
+    The records of a workflow, kept in the process only.
+
+    Records are stored serialized, so later changes to the appended dicts do
+    not leak into the history, and readers get fresh copies.
+    """
+
+    backend = "memory"
+
+    def __init__(self):
+        """Initialize an empty storage."""
+        self._lock = threading.RLock()
+        self.clear()
+
+    def append(self, record: dict[str, Any]) -> None:
+        chain = record.get("supervisor_chain")
+        line = json.dumps(record)
+        with self._lock:
+            position = len(self._lines)
+            self._lines.append(line)
+            self._roles.append(record.get("role"))
+            self._by_id.setdefault(record.get("message_id"), position)
+            self._by_sender[record.get("sender_name")].append(position)
+            if record.get("parent_id") is not None:
+                self._by_parent[record["parent_id"]].append(position)
+            if record.get("role") == "user" and chain:
+                self._by_delegate[chain[-1]].append(position)
+
+    @contextlib.contextmanager
+    def reader(self) -> Iterator[HistoryReader]:
+        with self._lock:
+            yield _MemoryReader(self)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lines: list[str] = []
+            self._roles: list[str | None] = []
+            self._by_id: dict[str, int] = {}
+            self._by_sender: dict[str, list[int]] = collections.defaultdict(list)
+            self._by_parent: dict[str, list[int]] = collections.defaultdict(list)
+            self._by_delegate: dict[str, list[int]] = collections.defaultdict(list)
+
+
+_memory_storages: dict[str, MemoryStorage] = {}
+_memory_storages_lock = threading.Lock()
+
+
+def open_storage(backend: str,
+                 root: Path,
+                 workflow_id: str,
+                 durability: str | None = None,
+                 flush_interval: float | None = None) -> HistoryStorage:
+    """
+    Open the storage of a workflow.
+
+    Args:
+        backend (str): ``"jsonl"``, ``"sqlite"`` or ``"memory"``.
+        root (Path): The directory holding the workflows' histories.
+        workflow_id (str): The workflow.
+        durability (Optional[str]): The durability policy (ignored by the memory backend).
+        flush_interval (Optional[float]): Seconds between writes under the ``"interval"`` policy.
+
+    Returns:
+        HistoryStorage: The storage; in-memory storages are shared per workflow.
+
+    Raises:
+        ValueError: If the backend is unknown or the durability settings are invalid.
+    """
+    if backend == "jsonl":
+        return JsonlStorage(root / workflow_id / "history.jsonl", durability, flush_interval)
+    if backend == "sqlite":
+        return SqliteStorage(root / "history.sqlite3", workflow_id, durability, flush_interval)
+    if backend == "memory":
+        with _memory_storages_lock:
+            if workflow_id not in _memory_storages:
+                _memory_storages[workflow_id] = MemoryStorage()
+            return _memory_storages[workflow_id]
+    raise ValueError(f"history backend must be one of {', '.join(BACKENDS)}")
+
+
+@atexit.register
+def _commit_databases() -> None:
+    """Commit the pending records of every history database when the process exits."""
+    with _databases_lock:
+        databases = list(_databases.values())
+    for db, lock in databases:
+        try:
+            with lock:
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not commit history database: {e}")
+
+
+def release_storage(storage: HistoryStorage, workflow_id: str) -> None:
+    """
+    Close the storage of a finished workflow and drop it from the shared registries.
+
+    JSONL histories close their shared writer; in-memory storages discard their
+    records. Histories on disk are kept, and opening the workflow again starts
+    from them.
+
+    Args:
+        storage (HistoryStorage): The storage, as returned by `open_storage`.
+        workflow_id (str): The workflow.
+    """
+    storage.close()
+    if isinstance(storage, JsonlStorage):
+        release_history_writer(storage.history_file)
+    elif isinstance(storage, MemoryStorage):
+        with _memory_storages_lock:
+            if _memory_storages.get(workflow_id) is storage:
+                del _memory_storages[workflow_id]
+        storage.clear()
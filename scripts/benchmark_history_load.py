@@ -0,0 +1,90 @@
+"""
+Benchmark HistoryManager.load_chat_history on synthetic workflows of growing size.
+
+Writes workflows of 1k to 64k records (a supervisor delegating to three agents
+that make tool calls) into a temporary directory and times restoring the
+history of every entity. The time per record should stay roughly constant as
+the file grows.
+
+Usage:
+    python scripts/benchmark_history_load.py [--sizes 1000 4000 16000 64000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from primisai.nexus.history import HistoryManager  # noqa: E402
+
+ENTITIES = ["Main", "Research", "Coder", "Writer"]
+
+
+def write_workflow(path: Path, records: int, seed: int = 0) -> None:
+    """Write a synthetic workflow history with about `records` lines."""
+    rng = random.Random(seed)
+    count = 0
+
+    with open(path, "w") as f:
+        def record(role, sender, parent=None, chain=None, **fields):
+            nonlocal count
+            entry = {"message_id": f"m{count}", "timestamp": f"2026-01-01T{count:012d}",
+                     "workflow_id": "bench", "sender_type": "agent", "sender_name": sender,
+                     "parent_id": parent, "tool_call_id": fields.pop("tool_call_id", None),
+                     "supervisor_chain": chain or [], "role": role, **fields}
+            f.write(json.dumps(entry) + "\n")
+            count += 1
+            return entry["message_id"]
+
+        for name in ENTITIES:
+            record("system", name, content=f"You are {name}.")
+        turn = 0
+        while count < records:
+            entity = rng.choice(ENTITIES)
+            if entity == "Main":
+                user = record("user", "user", content=f"task {turn}")
+            else:
+                user = record("user", "Main", chain=["Main", entity], content=f"delegated {turn}")
+            parent = user
+            for step in range(rng.randint(0, 3)):
+                call_id = f"call_{turn}_{step}"
+                assistant = record("assistant", entity, parent=parent, content="",
+                                   tool_calls=[{"id": call_id, "type": "function",
+                                                "function": {"name": "lookup", "arguments": "{}"}}])
+                parent = record("tool", "lookup", parent=assistant, tool_call_id=call_id,
+                                content=f"result {turn} {step}")
+            record("assistant", entity, parent=parent, content=f"answer {turn}")
+            turn += 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 16000, 64000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        print(f"{'records':>8}  {'seconds':>8}  {'us/record':>9}")
+        for size in args.sizes:
+            workflow_id = f"bench_{size}"
+            (Path("nexus_workflows") / workflow_id).mkdir(parents=True)
+            manager = HistoryManager(workflow_id)
+            write_workflow(manager.history_file, size)
+            best = float("inf")
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                for entity in ENTITIES:
+                    manager.load_chat_history(entity)
+                best = min(best, time.perf_counter() - started)
+            print(f"{size:>8}  {best:>8.3f}  {best / size * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
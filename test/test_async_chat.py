@@ -0,0 +1,275 @@
+"""Tests for the asyncio and streaming chat paths (AsyncAI, achat, stream=True).
+
+LLM calls are replaced with scripted ChatCompletion objects so the tests run
+without network access.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk  # noqa: E402
+
+from primisai.nexus.core import AI, AsyncAI, Agent, Supervisor  # noqa: E402
+
+
+@pytest.fixture
+def llm_config():
+    return {
+        "model": "gpt-4o-mini",
+        "api_key": "sk-dummy-test-key-12345",
+        "base_url": "http://localhost:9/v1",
+    }
+
+
+def _completion(content=None, tool_calls=None):
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = [
+            {
+                "id": call_id,
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            }
+            for call_id, name, arguments in tool_calls
+        ]
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "tool_calls" if tool_calls else "stop",
+            "message": message,
+        }],
+    })
+
+
+def _chunk(content=None, tool_call=None, finish_reason=None):
+    delta = {}
+    if content is not None:
+        delta["content"] = content
+    if tool_call is not None:
+        delta["tool_calls"] = [tool_call]
+    return ChatCompletionChunk.model_validate({
+        "id": "chatcmpl-stream",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    })
+
+
+def _tool_call_chunks(call_id, name, arguments):
+    """Split a tool call over several chunks the way providers stream them."""
+    args = json.dumps(arguments)
+    half = len(args) // 2
+    return [
+        _chunk(tool_call={"index": 0, "id": call_id, "type": "function",
+                          "function": {"name": name, "arguments": ""}}),
+        _chunk(tool_call={"index": 0, "function": {"arguments": args[:half]}}),
+        _chunk(tool_call={"index": 0, "function": {"arguments": args[half:]}}),
+        _chunk(finish_reason="tool_calls"),
+    ]
+
+
+def _text_chunks(*parts):
+    return [_chunk(content=part) for part in parts] + [_chunk(finish_reason="stop")]
+
+
+def _scripted(responses):
+    """Return an async fake for agenerate_response yielding `responses` in order."""
+    calls = []
+
+    async def fake(messages, tools=None, use_tools=False):
+        calls.append([dict(m) for m in messages])
+        return responses.pop(0)
+
+    fake.calls = calls
+    return fake
+
+
+def _add_tool():
+    return {
+        "tool": lambda a, b: a + b,
+        "metadata": {
+            "type": "function",
+            "function": {
+                "name": "add",
+                "description": "Add two numbers",
+                "parameters": {
+                    "type": "object",
+                    "properties": {"a": {"type": "integer"}, "b": {"type": "integer"}},
+                    "required": ["a", "b"],
+                },
+            },
+        },
+    }
+
+
+class TestAsyncAI:
+    def test_generate_response_is_awaitable(self, llm_config):
+        ai = AsyncAI(llm_config)
+        assert isinstance(ai, AI)
+        assert asyncio.iscoroutinefunction(ai.generate_response)
+
+    def test_async_client_is_bound_per_event_loop(self, llm_config):
+        ai = AI(llm_config)
+
+        async def get_client():
+            return ai.async_client, ai.async_client
+
+        first, same = asyncio.run(get_client())
+        second, _ = asyncio.run(get_client())
+        assert first is same
+        assert first is not second
+
+
+class TestAgentAchat:
+    def test_achat_runs_tools_and_returns_answer(self, llm_config):
+        agent = Agent("Adder", llm_config, system_message="You add.",
+                      tools=[_add_tool()], use_tools=True)
+        agent.agenerate_response = _scripted([
+            _completion(tool_calls=[("call_1", "add", {"a": 2, "b": 3})]),
+            _completion(content="The sum is 5"),
+        ])
+
+        answer = asyncio.run(agent.achat("What is 2 + 3?"))
+
+        assert answer == "The sum is 5"
+        roles = [m["role"] for m in agent.chat_history]
+        assert roles == ["system", "user", "assistant", "tool", "assistant"]
+        assert agent.chat_history[3] == {"role": "tool", "content": "5", "tool_call_id": "call_1"}
+
+    def test_achat_awaits_async_tool_variant(self, llm_config):
+        awaited = []
+
+        async def async_add(a, b):
+            awaited.append((a, b))
+            return a + b
+
+        tool = _add_tool()
+        tool["tool"] = lambda a, b: pytest.fail("sync variant must not run on the async path")
+        tool["async_tool"] = async_add
+        agent = Agent("Adder", llm_config, system_message="You add.", tools=[tool], use_tools=True)
+        agent.agenerate_response = _scripted([
+            _completion(tool_calls=[("call_1", "add", {"a": 1, "b": 1})]),
+            _completion(content="2"),
+        ])
+
+        assert asyncio.run(agent.achat("1 + 1?")) == "2"
+        assert awaited == [(1, 1)]
+
+    def test_concurrent_achat_sessions(self, llm_config):
+        agents = []
+        for i in range(5):
+            agent = Agent(f"Concurrent{i}", llm_config, system_message="s")
+            agent.agenerate_response = _scripted([_completion(content=f"answer {i}")])
+            agents.append(agent)
+
+        async def run_all():
+            return await asyncio.gather(*(a.achat("hi") for a in agents))
+
+        assert asyncio.run(run_all()) == [f"answer {i}" for i in range(5)]
+
+
+class TestSupervisorAchat:
+    def test_achat_delegates_through_agent_achat(self, llm_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        worker = Agent("Worker", llm_config, system_message="You work.")
+        worker.agenerate_response = _scripted([_completion(content="work done")])
+        worker.generate_response = lambda *a, **k: pytest.fail("sync path must not be used")
+
+        supervisor = Supervisor("Boss", llm_config, system_message="You delegate.")
+        supervisor.register_agent(worker)
+        supervisor.agenerate_response = _scripted([
+            _completion(tool_calls=[("call_1", "delegate_to_Worker",
+                                     {"reasoning": "r", "query": "do it", "context": "c"})]),
+            _completion(content="all done"),
+        ])
+
+        assert asyncio.run(supervisor.achat("please work")) == "all done"
+        assert supervisor.chat_history[-2] == {
+            "role": "tool", "content": "work done", "tool_call_id": "call_1"
+        }
+        assert worker.chat_history[-1] == {"role": "assistant", "content": "work done"}
+
+
+class TestStreaming:
+    def test_agent_stream_yields_deltas_and_runs_tools(self, llm_config):
+        agent = Agent("StreamAdder", llm_config, system_message="You add.",
+                      tools=[_add_tool()], use_tools=True)
+        streams = [
+            _tool_call_chunks("call_1", "add", {"a": 20, "b": 22}),
+            _text_chunks("The sum ", "is ", "42"),
+        ]
+        agent.stream_response = lambda *a, **k: iter(streams.pop(0))
+
+        deltas = list(agent.chat("20 + 22?", stream=True))
+
+        assert deltas == ["The sum ", "is ", "42"]
+        assert agent.chat_history[-2] == {"role": "tool", "content": "42", "tool_call_id": "call_1"}
+        assert agent.chat_history[-1] == {"role": "assistant", "content": "The sum is 42"}
+
+    def test_agent_async_stream(self, llm_config):
+        agent = Agent("AsyncStreamer", llm_config, system_message="s")
+
+        async def fake_stream(*args, **kwargs):
+            for chunk in _text_chunks("Hel", "lo"):
+                yield chunk
+
+        agent.astream_response = fake_stream
+
+        async def consume():
+            return [delta async for delta in agent.achat("hi", stream=True)]
+
+        assert asyncio.run(consume()) == ["Hel", "lo"]
+        assert agent.chat_history[-1] == {"role": "assistant", "content": "Hello"}
+
+    def test_strict_schema_streams_the_reformatted_answer(self, llm_config):
+        schema = {"type": "object", "properties": {"answer": {"type": "string"}}}
+        agent = Agent("StrictStreamer", llm_config, system_message="s", output_schema=schema, strict=True)
+        agent.stream_response = lambda *a, **k: iter(_text_chunks("The answer ", "is 42"))
+        agent.generate_response = lambda *a, **k: _completion(content='{"answer": "42"}')
+
+        async def fake_stream(*args, **kwargs):
+            for chunk in _text_chunks("The answer ", "is 42"):
+                yield chunk
+
+        async def fake_generate(*args, **kwargs):
+            return _completion(content='{"answer": "42"}')
+
+        agent.astream_response = fake_stream
+        agent.agenerate_response = fake_generate
+
+        async def consume():
+            return [delta async for delta in agent.achat("hi", stream=True)]
+
+        for deltas in (list(agent.chat("hi", stream=True)), asyncio.run(consume())):
+            assert deltas == ['{"answer": "42"}']
+            assert agent.chat_history[-1] == {"role": "assistant", "content": deltas[0]}
+
+    def test_supervisor_stream_persists_final_answer(self, llm_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        worker = Agent("Worker", llm_config, system_message="You work.")
+        worker.generate_response = lambda *a, **k: _completion(content="work done")
+
+        supervisor = Supervisor("Boss", llm_config, system_message="You delegate.")
+        supervisor.register_agent(worker)
+        streams = [
+            _tool_call_chunks("call_1", "delegate_to_Worker",
+                              {"reasoning": "r", "query": "do it", "context": "c"}),
+            _text_chunks("all ", "done"),
+        ]
+        supervisor.stream_response = lambda *a, **k: iter(streams.pop(0))
+
+        assert "".join(supervisor.chat("please work", stream=True)) == "all done"
+        persisted = supervisor.history_manager.get_messages_by_entity("Boss")
+        assert persisted[-1]["role"] == "assistant"
+        assert persisted[-1]["content"] == "all done"
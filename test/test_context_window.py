@@ -0,0 +1,270 @@
+"""Tests for keeping chat history small: token-budget pruning (ContextWindow) and compaction."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from openai.types.chat import ChatCompletion  # noqa: E402
+
+from primisai.nexus.config.config_validator import ConfigValidationError, ConfigValidator  # noqa: E402
+from primisai.nexus.core import Agent, Compactor, ContextWindow  # noqa: E402
+from primisai.nexus.core.compaction import SUMMARY_PREFIX  # noqa: E402
+from primisai.nexus.core.context import build_context_window  # noqa: E402
+from primisai.nexus.history import EntityType, HistoryManager  # noqa: E402
+
+
+@pytest.fixture
+def llm_config():
+    return {
+        "model": "gpt-4o-mini",
+        "api_key": "sk-dummy-test-key-12345",
+        "base_url": "http://localhost:9/v1",
+    }
+
+
+def _one_token(message):
+    return 1
+
+
+def _system():
+    return {"role": "system", "content": "sys"}
+
+
+def _turn(i):
+    return [{"role": "user", "content": f"q{i}"}, {"role": "assistant", "content": f"a{i}"}]
+
+
+def _tool_exchange(call_id):
+    return [
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": "t", "arguments": "{}"}}]},
+        {"role": "tool", "content": "result", "tool_call_id": call_id},
+    ]
+
+
+def _assert_no_orphans(messages):
+    open_calls = set()
+    for message in messages:
+        if message.get("tool_calls"):
+            open_calls = {call["id"] for call in message["tool_calls"]}
+        elif message["role"] == "tool":
+            assert message["tool_call_id"] in open_calls
+
+
+class TestContextWindow:
+    def test_history_within_budget_is_untouched(self):
+        window = ContextWindow(max_tokens=100, token_counter=_one_token)
+        history = [_system()] + _turn(1)
+        assert window.fit(history) is history
+
+    def test_sliding_window_drops_oldest_and_keeps_system(self):
+        window = ContextWindow(max_tokens=5, token_counter=_one_token)
+        history = [_system()] + _turn(1) + _turn(2) + _turn(3)
+        pruned = window.fit(history)
+        assert pruned[0]["role"] == "system"
+        assert [m["content"] for m in pruned[1:]] == ["q2", "a2", "q3", "a3"]
+        assert window.pruned_messages == 2
+
+    def test_tool_calls_are_never_split_from_responses(self):
+        window = ContextWindow(max_tokens=5, token_counter=_one_token)
+        history = ([_system(), {"role": "user", "content": "q1"}] + _tool_exchange("c1")
+                   + [{"role": "assistant", "content": "a1"}] + _turn(2))
+        for budget in range(1, 8):
+            window.max_tokens = budget
+            _assert_no_orphans(window.fit(list(history)))
+
+    def test_current_turn_is_always_kept(self):
+        window = ContextWindow(max_tokens=2, token_counter=_one_token)
+        history = [_system()] + _turn(1) + [{"role": "user", "content": "q2"}] + _tool_exchange("c1")
+        pruned = window.fit(history)
+        assert [m["role"] for m in pruned] == ["system", "user", "assistant", "tool"]
+        assert pruned[1]["content"] == "q2"
+
+    def test_last_n_turns(self):
+        window = ContextWindow(max_tokens=1000, strategy="last_n_turns", last_n_turns=2,
+                               token_counter=_one_token)
+        history = [_system()] + _turn(1) + _turn(2) + [{"role": "user", "content": "q3"}]
+        pruned = window.fit(history)
+        assert [m["content"] for m in pruned[1:]] == ["q2", "a2", "q3"]
+
+    def test_tool_pairs_drops_tool_exchanges_before_dialogue(self):
+        window = ContextWindow(max_tokens=6, strategy="tool_pairs", token_counter=_one_token)
+        history = ([_system(), {"role": "user", "content": "q1"}] + _tool_exchange("c1")
+                   + [{"role": "assistant", "content": "a1"}] + _turn(2))
+        pruned = window.fit(history)
+        assert [m["content"] for m in pruned[1:]] == ["q1", "a1", "q2", "a2"]
+
+    def test_each_message_is_counted_once(self):
+        counted = []
+
+        def counter(message):
+            counted.append(message["content"])
+            return 1
+
+        window = ContextWindow(max_tokens=100, token_counter=counter)
+        history = [_system()] + _turn(1)
+        for i in range(5):
+            history.extend(_turn(i + 2))
+            window.fit(history)
+        assert len(counted) == len(history)
+
+    def test_invalid_settings_are_rejected(self):
+        with pytest.raises(ValueError):
+            ContextWindow(max_tokens=10, strategy="unknown")
+        with pytest.raises(ValueError):
+            ContextWindow(max_tokens=10, strategy="last_n_turns")
+        with pytest.raises(ValueError):
+            build_context_window({"strategy": "sliding_window"})
+        assert build_context_window(None) is None
+        assert build_context_window(500).max_tokens == 500
+
+
+def _completion(content):
+    return ChatCompletion.model_validate({
+        "id": "c", "object": "chat.completion", "created": 0, "model": "m",
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+    })
+
+
+class TestAgentContextWindow:
+    def test_requests_are_pruned_to_the_budget(self, llm_config):
+        agent = Agent("Windowed", llm_config, system_message="You answer.",
+                      context_window={"max_tokens": 30})
+        sent = []
+
+        def fake_generate(messages, tools=None, use_tools=False):
+            sent.append(list(messages))
+            return _completion("x" * 40)
+
+        agent.generate_response = fake_generate
+        for i in range(5):
+            agent.chat(f"question {i}")
+
+        assert sent[-1][0]["role"] == "system"
+        assert sent[-1][-1] == {"role": "user", "content": "question 4"}
+        assert len(sent[-1]) < 2 * 5 + 1
+        assert len(agent.chat_history) < 11   # pruned in memory as well
+
+    def test_yaml_validation(self):
+        agent = {"name": "A", "type": "agent", "system_message": "s", "context_window": True,
+                 "llm_config": {"model": "m", "api_key": "k", "base_url": "u"}}
+        with pytest.raises(ConfigValidationError):
+            ConfigValidator._validate_agent(agent)
+        agent["context_window"] = {"max_tokens": 4000, "strategy": "tool_pairs"}
+        ConfigValidator._validate_agent(agent)
+
+
+class TestCompaction:
+    def _summarizer(self, requests):
+        def summarize(messages):
+            requests.append(messages)
+            return f"summary {len(requests)}"
+        return summarize
+
+    def test_old_turns_are_folded_into_a_summary(self):
+        compactor = Compactor(trigger_tokens=5, keep_last_turns=1, deferred=False, token_counter=_one_token)
+        requests, persisted = [], []
+        history = [_system()] + _turn(1) + _turn(2) + [{"role": "user", "content": "q3"}]
+
+        compacted = compactor.compact(history, self._summarizer(requests),
+                                      lambda msg, tail: persisted.append((msg, tail)))
+
+        assert compacted[0] == _system()
+        assert compacted[1] == {"role": "system", "content": SUMMARY_PREFIX + "summary 1"}
+        assert compacted[2:] == [{"role": "user", "content": "q3"}]
+        assert "q1" in requests[0][1]["content"] and "a2" in requests[0][1]["content"]
+        assert persisted == [(compacted[1], 1)]
+
+    def test_summaries_roll_forward(self):
+        compactor = Compactor(trigger_tokens=4, keep_last_turns=1, deferred=False, token_counter=_one_token)
+        requests = []
+        history = [_system()] + _turn(1) + _turn(2)
+        history = compactor.compact(history, self._summarizer(requests))
+        history = compactor.compact(history + _turn(3) + _turn(4), self._summarizer(requests))
+
+        assert SUMMARY_PREFIX + "summary 1" in requests[1][1]["content"]
+        assert [m["content"] for m in history] == ["sys", SUMMARY_PREFIX + "summary 2", "q4", "a4"]
+        assert compactor.compactions == 2
+
+    def test_deferred_summary_is_applied_on_a_later_request(self):
+        compactor = Compactor(trigger_tokens=4, keep_last_turns=1, token_counter=_one_token)
+        history = [_system()] + _turn(1) + _turn(2)
+        assert compactor.compact(history, self._summarizer([])) is history
+        compactor.wait()
+
+        history = history + [{"role": "user", "content": "q3"}]
+        compacted = compactor.compact(history, self._summarizer([]))
+        assert [m["content"] for m in compacted] == ["sys", SUMMARY_PREFIX + "summary 1", "q2", "a2", "q3"]
+
+    def test_stale_summary_is_discarded(self):
+        compactor = Compactor(trigger_tokens=4, keep_last_turns=1, token_counter=_one_token)
+        history = [_system()] + _turn(1) + _turn(2)
+        compactor.compact(history, self._summarizer([]))
+        compactor.wait()
+        reset = [_system(), {"role": "user", "content": "fresh"}]
+        assert compactor.compact(reset, self._summarizer([])) is reset
+
+    def test_agent_compacts_through_its_llm(self, llm_config):
+        agent = Agent("Compacting", llm_config, system_message="You answer.",
+                      compaction={"trigger_tokens": 40, "keep_last_turns": 1, "deferred": False})
+
+        def fake_generate(messages, tools=None, use_tools=False):
+            if messages[0]["content"].startswith("You maintain the running summary"):
+                return _completion("the user asked questions 0-2")
+            return _completion("answer " + "x" * 40)
+
+        agent.generate_response = fake_generate
+        for i in range(4):
+            agent.chat(f"question {i}")
+
+        assert agent.chat_history[1]["content"].startswith(SUMMARY_PREFIX)
+        assert agent.compactor.compactions >= 1
+
+    def test_async_chat_awaits_the_summarizer(self, llm_config):
+        import asyncio
+
+        agent = Agent("AsyncCompacting", llm_config, system_message="You answer.",
+                      compaction={"trigger_tokens": 40, "keep_last_turns": 1, "deferred": False})
+
+        def blocking_generate(messages, tools=None, use_tools=False):
+            raise AssertionError("the event loop was blocked by a sync LLM call")
+
+        async def fake_agenerate(messages, tools=None, use_tools=False):
+            if messages[0]["content"].startswith("You maintain the running summary"):
+                return _completion("the user asked questions 0-2")
+            return _completion("answer " + "x" * 40)
+
+        agent.generate_response = blocking_generate
+        agent.agenerate_response = fake_agenerate
+
+        async def run():
+            for i in range(4):
+                await agent.achat(f"question {i}")
+
+        asyncio.run(run())
+        assert agent.chat_history[1]["content"].startswith(SUMMARY_PREFIX)
+        assert agent.compactor.compactions >= 1
+
+    def test_load_chat_history_resumes_from_latest_summary(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "nexus_workflows" / "wf").mkdir(parents=True)
+        manager = HistoryManager("wf")
+
+        def turn(i):
+            user_id = manager.append_message({"role": "user", "content": f"q{i}"}, EntityType.USER, "user")
+            manager.append_message({"role": "assistant", "content": f"a{i}"}, EntityType.AGENT, "Bot",
+                                   parent_id=user_id)
+
+        manager.append_message({"role": "system", "content": "sys"}, EntityType.AGENT, "Bot")
+        for i in range(3):
+            turn(i)
+        manager.append_message({"role": "system", "content": SUMMARY_PREFIX + "turns 0-1"},
+                               EntityType.AGENT, "Bot", metadata={"summary": True, "tail_turns": 1})
+        turn(3)
+
+        history = manager.load_chat_history("Bot")
+        assert [m["content"] for m in history] == ["sys", SUMMARY_PREFIX + "turns 0-1", "q2", "a2", "q3", "a3"]
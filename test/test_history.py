@@ -0,0 +1,400 @@
+"""Tests for the persistent workflow history (HistoryManager)."""
+
+import collections
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from primisai.nexus.history import EntityType, HistoryManager  # noqa: E402
+from primisai.nexus.history.history_writer import HistoryWriter  # noqa: E402
+
+ENTITIES = ["Main", "Research", "Coder", "Writer"]
+
+
+def _legacy_load_chat_history(manager, entity_name):
+    """The previous quadratic load_chat_history, kept as the reference for equivalence tests."""
+    with open(manager.history_file) as f:
+        all_msgs = [json.loads(line) for line in f]
+    is_summary = manager._is_summary_record
+    fmt = manager._format_for_chat_history
+    system = next((m for m in all_msgs if m["role"] == "system" and m["sender_name"] == entity_name
+                   and not is_summary(m)), None)
+    summary = next((m for m in reversed(all_msgs) if m["sender_name"] == entity_name and is_summary(m)), None)
+    history = []
+    if system:
+        history.append(fmt(system))
+    if summary:
+        history.append(fmt(summary))
+    delegated = []
+    for m in all_msgs:
+        if m["role"] == "user":
+            if m.get("supervisor_chain") and m["supervisor_chain"][-1] == entity_name:
+                delegated.append(m)
+            elif any(n["role"] == "assistant" and n["sender_name"] == entity_name
+                     and n.get("parent_id") == m["message_id"] for n in all_msgs):
+                delegated.append(m)
+    delegated.sort(key=lambda x: x["timestamp"])
+    if summary:
+        before = [m for m in delegated if m["timestamp"] <= summary["timestamp"]]
+        after = [m for m in delegated if m["timestamp"] > summary["timestamp"]]
+        tail_turns = summary["metadata"].get("tail_turns", 0)
+        delegated = (before[-tail_turns:] if tail_turns else []) + after
+    for user_msg in delegated:
+        history.append(fmt(user_msg))
+        children = [m for m in all_msgs if m.get("parent_id") == user_msg["message_id"]]
+        children = [m for m in children if m["sender_name"] == entity_name or m["role"] == "tool"]
+        children.sort(key=lambda x: x["timestamp"])
+        queue = collections.deque(children)
+        while queue:
+            msg = queue.popleft()
+            if fmt(msg) not in history:
+                history.append(fmt(msg))
+            if msg["role"] == "assistant" and msg.get("tool_calls"):
+                for tool_call in msg["tool_calls"]:
+                    tool_msgs = sorted((t for t in all_msgs if t["role"] == "tool"
+                                        and t.get("tool_call_id") == tool_call["id"]
+                                        and t.get("parent_id") == msg["message_id"]),
+                                       key=lambda x: x["timestamp"])
+                    for tmsg in tool_msgs:
+                        if fmt(tmsg) not in history:
+                            history.append(fmt(tmsg))
+                        queue.extend(sorted((mm for mm in all_msgs if mm.get("parent_id") == tmsg["message_id"]
+                                             and mm["sender_name"] == entity_name),
+                                            key=lambda x: x["timestamp"]))
+    return history
+
+
+def _write_workflow(path, turns, seed=0):
+    """
+    Write a synthetic multi-agent workflow: delegations, parallel tool calls,
+    wrap-up replies, repeated contents, coarse (colliding) timestamps and
+    compaction summaries.
+    """
+    rng = random.Random(seed)
+    records = []
+    clock = [0]
+
+    def record(role, sender, parent=None, chain=None, **fields):
+        if rng.random() < 0.7:
+            clock[0] += 1
+        entry = {"message_id": f"m{len(records)}", "timestamp": f"2026-01-01T00:{clock[0]:08d}",
+                 "workflow_id": "wf", "sender_type": "agent", "sender_name": sender, "parent_id": parent,
+                 "tool_call_id": fields.pop("tool_call_id", None), "supervisor_chain": chain or [],
+                 "role": role, **fields}
+        records.append(entry)
+        return entry["message_id"]
+
+    for name in ENTITIES:
+        record("system", name, content=f"You are {name}.")
+    for turn in range(turns):
+        entity = rng.choice(ENTITIES)
+        if entity == "Main":
+            user = record("user", "user", content=rng.choice(["hi", "again", f"task {turn}"]))
+        else:
+            user = record("user", "Main", chain=["Main", entity], content=f"delegated {turn % 7}")
+        parent = user
+        for step in range(rng.randint(0, 3)):
+            calls = [{"id": f"call_{turn}_{step}_{k}", "type": "function",
+                      "function": {"name": "lookup", "arguments": "{}"}} for k in range(rng.randint(1, 3))]
+            assistant = record("assistant", entity, parent=parent, content="", tool_calls=calls)
+            for call in calls:
+                parent = record("tool", "lookup", parent=assistant, tool_call_id=call["id"],
+                                content=rng.choice(["42", "ok", f"r{turn}"]))
+        record("assistant", entity, parent=parent, content=rng.choice(["done", "ok", f"answer {turn}"]))
+        if rng.random() < 0.03:
+            record("system", entity, content=f"summary {turn}",
+                   metadata={"summary": True, "tail_turns": rng.randint(0, 2)})
+    with open(path, "w") as f:
+        for entry in records:
+            f.write(json.dumps(entry) + "\n")
+    return len(records)
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "nexus_workflows" / "wf").mkdir(parents=True)
+    return HistoryManager("wf")
+
+
+class TestLoadChatHistory:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_previous_implementation(self, manager, seed):
+        _write_workflow(manager.history_file, turns=150, seed=seed)
+        for entity in ENTITIES + ["Nobody"]:
+            assert manager.load_chat_history(entity) == _legacy_load_chat_history(manager, entity)
+
+
+
+class TestHistoryIndex:
+    def test_queries_decode_only_the_records_they_need(self, manager, monkeypatch):
+        from primisai.nexus.history.history_index import HistoryView, sidecar_path
+
+        count = _write_workflow(manager.history_file, turns=300)
+        expected = _legacy_load_chat_history(manager, "Writer")
+        decoded = []
+        record = HistoryView.record
+        monkeypatch.setattr(HistoryView, "record", lambda view, entry: decoded.append(entry) or record(view, entry))
+
+        assert manager.load_chat_history("Writer") == expected
+        assert sidecar_path(manager.history_file).exists()
+        assert len(decoded) < count / 2
+        decoded.clear()
+        assert manager.get_message("m10")["message_id"] == "m10"
+        assert manager.get_message("missing") is None
+        assert len(decoded) == 1
+
+    def test_appends_from_other_managers_are_picked_up(self, manager):
+        other = HistoryManager("wf")
+        assert not manager.has_system_message("Bot")
+        system_id = other.append_message({"role": "system", "content": "s"}, EntityType.AGENT, "Bot")
+        assert manager.has_system_message("Bot")
+        user_id = manager.append_message({"role": "user", "content": "q"}, EntityType.USER, "user")
+        other.append_message({"role": "assistant", "content": "a"}, EntityType.AGENT, "Bot", parent_id=user_id)
+        assert [m["content"] for m in manager.load_chat_history("Bot")] == ["s", "q", "a"]
+        assert manager.get_message(system_id)["content"] == "s"
+
+    def test_index_is_rebuilt_when_missing_or_stale(self, manager):
+        from primisai.nexus.history.history_index import sidecar_path
+
+        _write_workflow(manager.history_file, turns=50)
+        expected = {entity: _legacy_load_chat_history(manager, entity) for entity in ENTITIES}
+        sidecar = sidecar_path(manager.history_file)
+        assert manager.load_chat_history("Main") == expected["Main"]
+
+        sidecar.unlink()
+        assert HistoryManager("wf").load_chat_history("Coder") == expected["Coder"]
+        sidecar.write_bytes(sidecar.read_bytes()[:-5])   # partial last line
+        assert HistoryManager("wf").load_chat_history("Research") == expected["Research"]
+        lines = sidecar.read_text().splitlines()
+        sidecar.write_text("\n".join(lines[1:]) + "\n")   # offsets do not match
+        assert HistoryManager("wf").load_chat_history("Writer") == expected["Writer"]
+
+        # Records appended without an index entry, e.g. by an older version.
+        with open(manager.history_file, "a") as f:
+            f.write(json.dumps({"message_id": "late", "timestamp": "9", "sender_name": "Writer",
+                                "parent_id": None, "role": "assistant", "content": "x"}) + "\n")
+        assert manager.get_message("late")["content"] == "x"
+
+        manager.clear_history()
+        assert manager.get_messages_by_entity("Writer") == []
+        manager.append_message({"role": "system", "content": "fresh"}, EntityType.AGENT, "Writer")
+        assert [m["content"] for m in manager.get_messages_by_entity("Writer")] == ["fresh"]
+
+
+class TestHistoryWriter:
+    def test_concurrent_appends_never_interleave(self, manager):
+        managers = [HistoryManager("wf") for _ in range(8)]
+        assert all(m._storage._writer is manager._storage._writer for m in managers)
+
+        def work(i):
+            return [managers[i].append_message({"role": "assistant", "content": "x" * (i * 5000 + j)},
+                                               EntityType.AGENT, f"Agent{i}") for j in range(25)]
+
+        with ThreadPoolExecutor(8) as pool:
+            ids = [message_id for batch in pool.map(work, range(8)) for message_id in batch]
+        with open(manager.history_file) as f:
+            records = [json.loads(line) for line in f]
+        assert sorted(r["message_id"] for r in records) == sorted(ids)
+        assert all(manager.get_message(message_id)["message_id"] == message_id for message_id in ids)
+
+    def test_turn_policy_writes_and_syncs_at_turn_end(self, manager, monkeypatch):
+        synced = []
+        monkeypatch.setattr(os, "fsync", synced.append)
+        turn = HistoryManager("wf", durability="turn")
+        assert turn._storage._writer is manager._storage._writer and manager._storage._writer.durability == "turn"
+
+        user_id = turn.append_message({"role": "user", "content": "q"}, EntityType.USER, "user")
+        turn.append_message({"role": "assistant", "content": "a"}, EntityType.AGENT, "Bot", parent_id=user_id)
+        assert not manager.history_file.exists()
+        turn.end_turn()
+        assert len(manager.history_file.read_text().splitlines()) == 2
+        assert len(synced) == 2   # history and index
+
+        # Queries see buffered messages.
+        turn.append_message({"role": "assistant", "content": "b"}, EntityType.AGENT, "Bot", parent_id=user_id)
+        assert [m["content"] for m in manager.load_chat_history("Bot")] == ["q", "a", "b"]
+
+    def test_interval_policy_writes_in_the_background(self, manager):
+        interval = HistoryManager("wf", durability="interval", flush_interval=0.05)
+        interval.append_message({"role": "system", "content": "s"}, EntityType.AGENT, "Bot")
+        assert not manager.history_file.exists()
+        deadline = time.monotonic() + 5
+        while not manager.history_file.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert manager.history_file.read_text().count("\n") == 1
+
+    def test_settings_are_shared_per_workflow(self, manager, caplog):
+        assert manager._storage._writer.durability == "message"
+        HistoryManager("wf", durability="interval")
+        assert manager._storage._writer.durability == "interval"
+        HistoryManager("wf", durability="turn")
+        assert manager._storage._writer.durability == "interval"
+        assert "ignoring the new settings" in caplog.text
+        with pytest.raises(ValueError):
+            HistoryWriter(manager.history_file, durability="never")
+
+
+class TestHistoryManagerRegistry:
+    def test_workflow_entities_share_one_manager(self, manager, monkeypatch):
+        from primisai.nexus.core import Agent
+        from primisai.nexus.history import get_history_manager
+        from primisai.nexus.history.history_index import HistoryIndex, HistoryView
+
+        _write_workflow(manager.history_file, turns=500)
+        shared = get_history_manager("wf")
+        assert get_history_manager("wf") is shared
+
+        scans, decoded = [], []
+        scan, record = HistoryIndex._scan_history, HistoryView.record
+        monkeypatch.setattr(HistoryIndex, "_scan_history", lambda index: scans.append(1) or scan(index))
+        monkeypatch.setattr(HistoryView, "record", lambda view, entry: decoded.append(1) or record(view, entry))
+        llm_config = {"model": "gpt-4o-mini", "api_key": "sk-dummy-test-key-12345", "base_url": "http://localhost:9/v1"}
+        agents = [Agent(f"New{i}", llm_config, system_message=f"s{i}") for i in range(20)]
+        for agent in agents:
+            agent.set_workflow_id("wf")
+        assert all(agent.history_manager is shared for agent in agents)
+        assert len(scans) == 1   # the history is indexed once
+        assert decoded == []     # new entities have no records to check
+
+        assert all(shared.has_system_message(agent.name) for agent in agents)
+        assert shared.has_system_message("Coder") and shared.has_system_message("Coder")
+        assert len(decoded) == 1   # the second check is answered from memory
+        assert len(scans) == 1
+
+    @pytest.mark.parametrize("backend", ["jsonl", "memory"])
+    def test_released_workflows_free_their_storage(self, manager, backend):
+        from primisai.nexus.history import get_history_manager, release_history_manager
+        from primisai.nexus.history import history_writer, storage
+
+        shared = get_history_manager("wf", backend=backend)
+        shared.append_message({"role": "system", "content": "s"}, EntityType.AGENT, "Helper")
+        release_history_manager("wf")
+        release_history_manager("wf")   # releasing twice is harmless
+
+        assert "wf" not in storage._memory_storages
+        if backend == "jsonl":
+            writer = shared._storage._writer
+            assert str(shared.history_file.resolve()) not in history_writer._writers
+            assert writer._file is None   # the history file is closed, not deleted
+            assert get_history_manager("wf").has_system_message("Helper")
+        else:
+            assert not get_history_manager("wf", backend="memory").has_system_message("Helper")
+        assert get_history_manager("wf") is not shared
+
+
+def _copy_records(source, target):
+    """Append the records of a JSONL history to another manager's storage, unchanged."""
+    with open(source.history_file) as f:
+        for line in f:
+            target._storage.append(json.loads(line))
+
+
+class TestHistoryBackends:
+    @pytest.mark.parametrize("backend", ["sqlite", "memory"])
+    def test_backends_answer_like_jsonl(self, manager, backend, tmp_path):
+        _write_workflow(manager.history_file, turns=150, seed=3)
+        other = HistoryManager(f"wf-{backend}-{tmp_path.name}", backend=backend)
+        _copy_records(manager, other)
+        for entity in ENTITIES + ["Nobody"]:
+            assert other.load_chat_history(entity) == manager.load_chat_history(entity)
+            assert other.get_messages_by_entity(entity) == manager.get_messages_by_entity(entity)
+        assert other.get_all_messages() == manager.get_all_messages()
+        assert other.get_frontend_history() == manager.get_frontend_history()
+        assert other.get_message("m7") == manager.get_message("m7")
+        other.append_message({"role": "system", "content": "s"}, EntityType.AGENT, "Fresh")
+        assert HistoryManager(other.workflow_id, backend=backend).has_system_message("Fresh")
+        other.clear_history()
+        assert other.get_all_messages() == [] and not other.has_system_message("Main")
+
+    def test_incomplete_backends_fail_when_constructed(self):
+        from primisai.nexus.history.storage import HistoryReader, HistoryStorage
+
+        class NoClear(HistoryStorage):
+            def append(self, record):
+                pass
+
+            def reader(self):
+                pass
+
+        class NoChildren(HistoryReader):
+            messages = message = by_sender = system_messages = user_messages = lambda self, *args: []
+
+        for incomplete in (NoClear, NoChildren):
+            with pytest.raises(TypeError, match="abstract"):
+                incomplete()
+
+    def test_sqlite_database_is_shared_and_indexed(self, tmp_path):
+        import sqlite3
+
+        root = tmp_path / "histories"
+        first = HistoryManager("a", backend="sqlite", root=root)
+        second = HistoryManager("b", backend="sqlite", root=str(root))
+        first.append_message({"role": "system", "content": "s"}, EntityType.AGENT, "Bot")
+        second.append_message({"role": "user", "content": "q"}, EntityType.USER, "user")
+        assert [m["workflow_id"] for m in first.get_all_messages()] == ["a"]
+        second.clear_history()
+        assert len(first.get_all_messages()) == 1 and second.get_all_messages() == []
+
+        db = sqlite3.connect(root / "history.sqlite3")
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexed = {row[0] for row in db.execute("SELECT info.name FROM pragma_index_list('records') AS list, "
+                                                "pragma_index_info(list.name) AS info")}
+        assert {"workflow_id", "sender_name", "parent_id", "tool_call_id"} <= indexed
+        assert not (root / "a").exists()
+
+    def test_sqlite_turn_policy_commits_at_turn_end(self, tmp_path):
+        import sqlite3
+
+        manager = HistoryManager("t", durability="turn", backend="sqlite", root=tmp_path)
+        manager.append_message({"role": "user", "content": "q"}, EntityType.USER, "user")
+        assert len(manager.get_all_messages()) == 1   # visible to its own queries
+        db = sqlite3.connect(tmp_path / "history.sqlite3")
+        count = "SELECT COUNT(*) FROM records WHERE workflow_id = 't'"
+        assert db.execute(count).fetchone()[0] == 0
+        manager.end_turn()
+        assert db.execute(count).fetchone()[0] == 1
+
+    def test_memory_backend_writes_nothing(self, tmp_path, monkeypatch):
+        from primisai.nexus.core import Agent, Supervisor
+        from primisai.nexus.history import get_history_manager
+
+        monkeypatch.chdir(tmp_path)
+        llm_config = {"model": "gpt-4o-mini", "api_key": "sk-dummy-test-key-12345", "base_url": "http://localhost:9/v1"}
+        supervisor = Supervisor("Main", llm_config, workflow_id=f"mem-{tmp_path.name}", history_backend="memory")
+        agent = Agent("Helper", llm_config, system_message="s")
+        supervisor.register_agent(agent)
+        assert agent.history_manager is supervisor.history_manager is get_history_manager(supervisor.workflow_id)
+        assert supervisor.history_manager.backend == "memory"
+        assert {m["sender_name"] for m in supervisor.history_manager.get_all_messages()} == {"Main", "Helper"}
+        assert not list(tmp_path.rglob("history*"))   # only the debug logs are on disk
+
+    def test_backend_and_root_from_yaml(self, tmp_path, monkeypatch):
+        from primisai.nexus.config.agent_factory import AgentFactory
+        from primisai.nexus.config.config_validator import ConfigValidationError, ConfigValidator
+
+        monkeypatch.chdir(tmp_path)
+        llm_config = {"api_key": "k", "model": "m", "base_url": "http://localhost:9/v1"}
+        config = {"supervisor": {
+            "name": "Main", "type": "supervisor", "system_message": "root", "llm_config": llm_config,
+            "history_backend": "sqlite", "history_root": "runs",
+            "children": [{"name": "A1", "type": "agent", "llm_config": llm_config, "system_message": "s"}],
+        }}
+        ConfigValidator.validate(config)
+        supervisor = AgentFactory.create_from_config(config)
+        assert supervisor.history_manager.backend == "sqlite"
+        assert (tmp_path / "runs" / "history.sqlite3").exists()
+        assert not list(tmp_path.rglob("history.jsonl"))
+
+        config["supervisor"]["history_backend"] = "csv"
+        with pytest.raises(ConfigValidationError):
+            ConfigValidator.validate(config)
+        with pytest.raises(ValueError):
+            HistoryManager("wf", backend="csv")
@@ -0,0 +1,699 @@
+"""Tests for the request pipeline of the AI layer (client pooling and friends).
+
+No test here talks to a real provider: clients point at an unroutable local
+port and completions are served by in-process fakes.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from openai.types.chat import ChatCompletion  # noqa: E402
+
+from primisai.nexus.core import (  # noqa: E402
+    AI, Agent, ClientPool, RateLimiter, ResponseCache, SingleFlight, client_pool
+)
+from primisai.nexus.core.prompt_cache import PromptCachePolicy, PromptCacheStats  # noqa: E402
+from primisai.nexus.core.rate_limiter import get_rate_limiter, retry_after_seconds  # noqa: E402
+from primisai.nexus.core.retry import HedgePolicy, LatencyTracker, RetryPolicy  # noqa: E402
+
+
+@pytest.fixture
+def llm_config():
+    return {
+        "model": "gpt-4o-mini",
+        "api_key": "sk-dummy-test-key-12345",
+        "base_url": "http://127.0.0.1:9/v1",
+    }
+
+
+def _completion(content):
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+    })
+
+
+class _FakeCompletions:
+    """Stand-in for `client.chat.completions` that counts upstream calls."""
+
+    def __init__(self, content="ok"):
+        self.content = content
+        self.calls = []
+
+    def create(self, **params):
+        self.calls.append(params)
+        return _completion(f"{self.content} #{len(self.calls)}")
+
+
+def _fake_client(completions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+class TestClientPool:
+    def test_instances_share_one_client(self, llm_config):
+        ai = AI(dict(llm_config))
+        agent = Agent("PooledAgent", dict(llm_config), system_message="s")
+        assert ai.client is agent.client
+
+    def test_pool_is_keyed_by_credentials_and_transport(self, llm_config):
+        pool = ClientPool()
+        base = pool.get_client(llm_config)
+        assert pool.get_client(dict(llm_config)) is base
+        assert pool.get_client({**llm_config, "api_key": "other"}) is not base
+        assert pool.get_client({**llm_config, "client": {"timeout": 5}}) is not base
+        assert pool.stats()["clients"] == 3
+        pool.clear()
+        assert pool.stats()["clients"] == 0
+
+    def test_configured_limits_are_applied(self, llm_config):
+        pool = ClientPool()
+        pool.configure(max_connections=7)
+        pool.get_client({**llm_config, "client": {"max_keepalive_connections": 3}})
+        (http_client,) = pool._http_clients.values()
+        pool_limits = http_client._transport._pool
+        assert pool_limits._max_connections == 7
+        assert pool_limits._max_keepalive_connections == 3
+        pool.clear()
+
+    def test_async_clients_are_scoped_per_loop(self, llm_config):
+        pool = ClientPool()
+
+        async def get():
+            return pool.get_async_client(llm_config), pool.get_async_client(dict(llm_config))
+
+        first, same = asyncio.run(get())
+        second, _ = asyncio.run(get())
+        assert first is same
+        assert first is not second
+
+    def test_http2_falls_back_without_h2(self, llm_config, monkeypatch, caplog):
+        import importlib.util
+        find_spec = importlib.util.find_spec
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name, *a: None if name == "h2" else find_spec(name, *a))
+        pool = ClientPool()
+        config = {**llm_config, "client": {"http2": True}}
+        assert pool.get_client(config) is pool.get_client(dict(config))
+        (key,) = pool._clients
+        assert ("http2", False) in key[2]
+        assert caplog.text.count("falling back to HTTP/1.1") == 1
+        pool.clear()
+
+    def test_prewarm_ignores_unreachable_endpoints(self, llm_config):
+        pool = ClientPool()
+        pool.prewarm([llm_config], connections=2)
+        assert pool.stats()["clients"] == 1
+        pool.clear()
+
+    def test_client_section_is_not_sent_to_the_api(self, llm_config):
+        ai = AI({**llm_config, "client": {"timeout": 5}})
+        params = ai._build_request_params([{"role": "user", "content": "hi"}])
+        assert "client" not in params
+        assert "api_key" not in params and "base_url" not in params
+        assert client_pool.get_client(ai.llm_config) is ai.client
+
+
+class TestResponseCache:
+    def test_memory_tier_is_lru_bounded(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        assert cache.get("a") == "1"      # "a" becomes most recently used
+        cache.set("c", "3")               # evicts "b"
+        assert cache.get("b") is None
+        assert cache.get("a") == "1" and cache.get("c") == "3"
+        assert cache.stats()["evictions"] == 1
+
+    def test_memory_tier_respects_byte_budget(self):
+        cache = ResponseCache(max_bytes=10)
+        cache.set("a", "x" * 6)
+        cache.set("b", "y" * 6)
+        assert cache.get("a") is None
+        assert cache.get("b") == "y" * 6
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(ttl=0.05)
+        cache.set("k", "v")
+        assert cache.get("k") == "v"
+        time.sleep(0.1)
+        assert cache.get("k") is None
+
+    def test_disk_tier_survives_new_instances(self, tmp_path):
+        path = tmp_path / "cache.sqlite3"
+        first = ResponseCache(disk=True, path=path)
+        first.set("k", "payload")
+        first.close()
+
+        second = ResponseCache(disk=True, path=path)
+        assert second.get("k") == "payload"
+        assert second.stats()["disk_hits"] == 1
+        assert second.get("k") == "payload"
+        assert second.stats()["memory_hits"] == 1
+        second.close()
+
+    def test_disk_tier_evicts_least_recently_used(self, tmp_path):
+        cache = ResponseCache(max_entries=1, disk=True, path=tmp_path / "c.sqlite3", disk_max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        cache.close()
+
+    def test_identical_requests_hit_the_cache(self, llm_config, tmp_path):
+        completions = _FakeCompletions()
+        ai = AI({**llm_config, "temperature": 0,
+                 "cache": {"max_entries": 8, "disk": True, "path": str(tmp_path / "llm.sqlite3")}})
+        ai.client = _fake_client(completions)
+        messages = [{"role": "user", "content": "hi"}]
+
+        first = ai.generate_response(messages)
+        second = ai.generate_response([{"content": "hi", "role": "user"}])
+        third = ai.generate_response([{"role": "user", "content": "different"}])
+
+        assert len(completions.calls) == 2
+        assert "cache" not in completions.calls[0]
+        assert second.choices[0].message.content == first.choices[0].message.content
+        assert third.choices[0].message.content != first.choices[0].message.content
+        assert ai.response_cache.stats()["hits"] == 1
+
+    def test_cache_is_opt_in(self, llm_config):
+        completions = _FakeCompletions()
+        ai = AI(dict(llm_config))
+        ai.client = _fake_client(completions)
+        ai.generate_response([{"role": "user", "content": "hi"}])
+        ai.generate_response([{"role": "user", "content": "hi"}])
+        assert ai.response_cache is None
+        assert len(completions.calls) == 2
+
+
+def _rate_limit_error(retry_after="0.05"):
+    request = httpx.Request("POST", "http://127.0.0.1:9/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+class _ThrottledCompletions(_FakeCompletions):
+    """Fake completions that answer 429 for the first `failures` calls."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def create(self, **params):
+        if self.failures:
+            self.failures -= 1
+            self.calls.append(params)
+            raise _rate_limit_error()
+        return super().create(**params)
+
+
+class TestRateLimiter:
+    def test_instances_share_a_limiter_per_model(self, llm_config):
+        first = AI(dict(llm_config))
+        second = Agent("LimitedAgent", dict(llm_config), system_message="s")
+        other_model = AI({**llm_config, "model": "gpt-4o"})
+        assert first.rate_limiter is second.rate_limiter
+        assert first.rate_limiter is not other_model.rate_limiter
+
+    def test_request_bucket_spaces_out_requests(self):
+        limiter = RateLimiter(requests_per_minute=600)   # one request per 0.1s
+        limiter.request_bucket.tokens = 0
+        start = time.monotonic()
+        limiter.acquire()
+        limiter.release()
+        assert time.monotonic() - start >= 0.09
+
+    def test_throttling_halves_concurrency_and_pauses(self):
+        limiter = RateLimiter(max_concurrency=8)
+        limiter.acquire()
+        limiter.release("throttled", retry_after=0.1)
+        assert limiter.stats()["limit"] == 4
+        start = time.monotonic()
+        limiter.acquire()
+        assert time.monotonic() - start >= 0.09
+        limiter.release()
+        assert limiter.stats()["limit"] > 4
+
+    def test_concurrency_limit_blocks_extra_callers(self):
+        limiter = RateLimiter(max_concurrency=1)
+
+        async def hold_and_release():
+            await limiter.aacquire()
+            await asyncio.sleep(0.05)
+            limiter.release()
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(hold_and_release(), hold_and_release())
+            return time.monotonic() - start
+
+        assert asyncio.run(run()) >= 0.1
+
+    def test_waiters_are_served_in_arrival_order(self):
+        limiter = RateLimiter(max_concurrency=1)
+        limiter.acquire()
+        order, woken = [], []
+
+        async def async_waiter():
+            await limiter.aacquire()
+            woken.append(time.monotonic())
+            order.append("async")
+            limiter.release()
+
+        def sync_waiter():
+            limiter.acquire()
+            order.append("sync")
+            limiter.release()
+
+        threads = [threading.Thread(target=asyncio.run, args=(async_waiter(),), daemon=True),
+                   threading.Thread(target=sync_waiter, daemon=True)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.15)   # queued before the next one arrives
+        released = time.monotonic()
+        limiter.release()
+        for thread in threads:
+            thread.join(timeout=5)
+        assert order == ["async", "sync"]
+        assert woken[0] - released < 0.05   # handed the slot, not polling for it
+
+    def test_paused_waiters_resume_when_the_pause_ends(self):
+        limiter = RateLimiter(max_concurrency=2)
+        limiter.acquire()
+
+        async def wait_for_slot():
+            start = time.monotonic()
+            await limiter.aacquire()
+            limiter.release()
+            return time.monotonic() - start
+
+        limiter.release("throttled", retry_after=0.1)
+        assert 0.09 <= asyncio.run(wait_for_slot()) < 0.5
+        assert limiter.stats()["in_flight"] == 0
+
+    def test_token_budget_is_corrected_from_usage(self):
+        limiter = RateLimiter(tokens_per_minute=1000)
+        limiter.acquire(estimated_tokens=400)
+        limiter.release(estimated_tokens=400, actual_tokens=100)
+        assert limiter.token_bucket.tokens >= 899
+
+    def test_reapplying_settings_keeps_bucket_balance(self):
+        limiter = get_rate_limiter("http://limits.test/v1", "m", {"requests_per_minute": 60})
+        limiter.acquire()
+        limiter.release()
+        again = get_rate_limiter("http://limits.test/v1", "m", {"requests_per_minute": 60})
+        assert again is limiter
+        assert limiter.request_bucket.tokens < 60
+
+    def test_unknown_settings_are_rejected(self):
+        with pytest.raises(ValueError):
+            RateLimiter(requests_per_hour=5)
+
+    def test_retry_after_header_is_parsed(self):
+        assert retry_after_seconds(_rate_limit_error("2")) == 2.0
+        assert retry_after_seconds(ValueError()) is None
+
+    def test_throttled_requests_are_retried(self, llm_config):
+        completions = _ThrottledCompletions(failures=1)
+        ai = AI({**llm_config, "model": "throttled-model"})
+        ai.client = _fake_client(completions)
+        response = ai.generate_response([{"role": "user", "content": "hi"}])
+        assert response.choices[0].message.content == "ok #2"
+        assert ai.rate_limiter.stats()["throttled"] == 1
+        assert ai.rate_limiter.stats()["in_flight"] == 0
+
+    def test_retries_are_bounded(self, llm_config):
+        completions = _ThrottledCompletions(failures=10)
+        ai = AI({**llm_config, "model": "banned-model", "retry": {"max_retries": 1}})
+        ai.client = _fake_client(completions)
+        with pytest.raises(openai.OpenAIError, match="Chat completion failed"):
+            ai.generate_response([{"role": "user", "content": "hi"}])
+        assert len(completions.calls) == 2
+        assert ai.rate_limiter.stats()["in_flight"] == 0
+
+
+class _SlowFirstCompletions(_FakeCompletions):
+    """Fake completions whose first call is much slower than the following ones."""
+
+    def __init__(self, first_delay=0.5):
+        super().__init__()
+        self.first_delay = first_delay
+        self._lock = threading.Lock()
+
+    def create(self, **params):
+        with self._lock:
+            self.calls.append(params)
+            number = len(self.calls)
+        time.sleep(self.first_delay if number == 1 else 0.01)
+        return _completion(f"answer #{number}")
+
+
+class _AsyncSlowFirstCompletions(_SlowFirstCompletions):
+    def __init__(self, first_delay=0.5):
+        super().__init__(first_delay)
+        self.cancelled = 0
+
+    async def create(self, **params):
+        self.calls.append(params)
+        number = len(self.calls)
+        try:
+            await asyncio.sleep(self.first_delay if number == 1 else 0.01)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return _completion(f"answer #{number}")
+
+
+def _warm_tracker(ai, latency=0.02, samples=5):
+    for _ in range(samples):
+        ai.latency_tracker.record(latency)
+
+
+class TestRetryAndHedging:
+    def test_backoff_grows_exponentially_with_bounded_jitter(self):
+        policy = RetryPolicy({"initial_backoff": 1, "max_backoff": 4, "jitter": 0})
+        assert [policy.delay(n) for n in (1, 2, 3, 4)] == [1, 2, 4, 4]
+        jittered = RetryPolicy({"initial_backoff": 1, "jitter": 0.5})
+        assert all(0.5 <= jittered.delay(1) <= 1 for _ in range(50))
+
+    def test_unknown_settings_are_rejected(self):
+        with pytest.raises(ValueError):
+            RetryPolicy({"retries": 3})
+        with pytest.raises(ValueError):
+            HedgePolicy({"p": 0.9})
+
+    def test_hedging_waits_for_enough_samples(self):
+        tracker = LatencyTracker()
+        policy = HedgePolicy({"min_samples": 3, "min_delay": 0})
+        tracker.record(0.2)
+        assert policy.delay(tracker) is None
+        tracker.record(0.1)
+        tracker.record(0.3)
+        assert policy.delay(tracker) == 0.3
+        assert HedgePolicy(None).delay(tracker) is None
+
+    def test_transient_connection_errors_are_retried(self, llm_config):
+        calls = []
+
+        def create(**params):
+            calls.append(params)
+            if len(calls) == 1:
+                raise openai.APIConnectionError(request=httpx.Request("POST", "http://127.0.0.1:9"))
+            return _completion("recovered")
+
+        ai = AI({**llm_config, "model": "flaky-model", "retry": {"initial_backoff": 0.01}})
+        ai.client = _fake_client(SimpleNamespace(create=create))
+        assert ai.generate_response([{"role": "user", "content": "hi"}]).choices[0].message.content == "recovered"
+        assert ai.latency_tracker.stats()["retries"] == 1
+
+    def test_client_errors_are_not_retried(self, llm_config):
+        calls = []
+
+        def create(**params):
+            calls.append(params)
+            response = httpx.Response(400, request=httpx.Request("POST", "http://127.0.0.1:9"))
+            raise openai.BadRequestError("bad", response=response, body=None)
+
+        ai = AI({**llm_config, "model": "strict-model"})
+        ai.client = _fake_client(SimpleNamespace(create=create))
+        with pytest.raises(openai.OpenAIError):
+            ai.generate_response([{"role": "user", "content": "hi"}])
+        assert len(calls) == 1
+
+    def test_slow_request_is_hedged(self, llm_config):
+        completions = _SlowFirstCompletions()
+        ai = AI({**llm_config, "model": "hedged-model", "hedge": {"min_samples": 5, "min_delay": 0}})
+        ai.client = _fake_client(completions)
+        _warm_tracker(ai)
+
+        start = time.monotonic()
+        response = ai.generate_response([{"role": "user", "content": "hi"}])
+
+        assert time.monotonic() - start < 0.4
+        assert response.choices[0].message.content == "answer #2"
+        stats = ai.latency_tracker.stats()
+        assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+        time.sleep(0.6)   # the abandoned request finishes and frees its slot
+        assert ai.rate_limiter.stats()["in_flight"] == 0
+
+    def test_async_hedge_cancels_the_loser(self, llm_config):
+        completions = _AsyncSlowFirstCompletions()
+        ai = AI({**llm_config, "model": "async-hedged-model", "hedge": {"min_samples": 5, "min_delay": 0}})
+        _warm_tracker(ai)
+
+        response, _ = asyncio.run(ai._acreate(completions.create, {"messages": []}))
+        ai.rate_limiter.release()   # the winner's slot is released by the caller
+
+        assert response.choices[0].message.content == "answer #2"
+        assert completions.cancelled == 1
+        assert ai.rate_limiter.stats()["in_flight"] == 0
+
+    def test_hedge_finishing_with_the_winner_frees_its_slot(self, llm_config, monkeypatch):
+        import concurrent.futures
+        from primisai.nexus.core import ai as ai_module
+
+        def wait_for_both(fs, timeout=None, return_when=concurrent.futures.ALL_COMPLETED):
+            # Both attempts land in the same `done` set.
+            return concurrent.futures.wait(fs, timeout=timeout)
+
+        monkeypatch.setattr(ai_module, "wait", wait_for_both)
+        completions = _SlowCompletions(delay=0.1)
+        ai = AI({**llm_config, "model": "hedged-together-model", "hedge": {"min_samples": 5, "min_delay": 0}})
+        _warm_tracker(ai)
+
+        ai._create(completions.create, {"messages": []})
+        ai.rate_limiter.release()   # the winner's slot is released by the caller
+
+        assert len(completions.calls) == 2
+        assert ai.rate_limiter.stats()["in_flight"] == 0
+
+    def test_async_hedge_finishing_with_the_winner_frees_its_slot(self, llm_config, monkeypatch):
+        real_wait = asyncio.wait
+
+        async def wait_for_both(fs, timeout=None, return_when=asyncio.ALL_COMPLETED):
+            return await real_wait(fs, timeout=timeout)
+
+        async def create(**params):
+            await asyncio.sleep(0.1)
+            return _completion("answer")
+
+        monkeypatch.setattr(asyncio, "wait", wait_for_both)
+        ai = AI({**llm_config, "model": "async-hedged-together-model", "hedge": {"min_samples": 5, "min_delay": 0}})
+        _warm_tracker(ai)
+
+        asyncio.run(ai._acreate(create, {"messages": []}))
+        ai.rate_limiter.release()
+
+        assert ai.latency_tracker.stats()["hedged"] == 1
+        assert ai.rate_limiter.stats()["in_flight"] == 0
+
+
+class _SlowCompletions(_FakeCompletions):
+    """Fake completions that take a while, so concurrent callers overlap."""
+
+    def __init__(self, delay=0.2):
+        super().__init__()
+        self.delay = delay
+
+    def create(self, **params):
+        self.calls.append(params)
+        time.sleep(self.delay)
+        return _completion(f"answer #{len(self.calls)}")
+
+
+class TestCoalescing:
+    def test_concurrent_identical_requests_share_one_call(self, llm_config):
+        completions = _SlowCompletions()
+        ai = AI({**llm_config, "model": "coalesced-model", "coalesce": True})
+        ai.client = _fake_client(completions)
+        messages = [{"role": "user", "content": "same prompt"}]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(pool.map(lambda _: ai.generate_response(messages), range(4)))
+
+        assert len(completions.calls) == 1
+        assert {r.choices[0].message.content for r in responses} == {"answer #1"}
+        assert len({id(r) for r in responses}) == 4   # followers get their own copy
+
+    def test_different_requests_are_not_coalesced(self, llm_config):
+        completions = _SlowCompletions(delay=0.05)
+        ai = AI({**llm_config, "model": "coalesced-model", "coalesce": True})
+        ai.client = _fake_client(completions)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda i: ai.generate_response([{"role": "user", "content": str(i)}]), range(3)))
+        assert len(completions.calls) == 3
+
+    def test_coalescing_is_opt_in(self, llm_config):
+        completions = _SlowCompletions(delay=0.05)
+        ai = AI({**llm_config, "model": "uncoalesced-model"})
+        ai.client = _fake_client(completions)
+        messages = [{"role": "user", "content": "same prompt"}]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda _: ai.generate_response(messages), range(3)))
+        assert len(completions.calls) == 3
+
+    def test_async_tasks_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def run():
+            return await asyncio.gather(*(flight.ado("key", upstream) for _ in range(5)))
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert [r for r, _ in results] == ["result"] * 5
+        assert sum(shared for _, shared in results) == 4
+        assert flight.stats() == {"leaders": 1, "coalesced": 4, "in_flight": 0}
+
+    def test_leader_errors_reach_followers(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("upstream failed")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(flight.do, "key", failing)
+            started.wait()
+            follower = pool.submit(flight.do, "key", failing)
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError, match="upstream failed"):
+                    future.result()
+
+    def test_followers_retry_when_the_leader_is_cancelled(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def run():
+            leader = asyncio.ensure_future(flight.ado("key", upstream))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.ado("key", upstream))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(run()) == ("result", False)
+        assert len(calls) == 2
+
+
+def _tool(name, **extra):
+    return {"type": "function", "function": {"name": name, "parameters": {"type": "object", **extra}}}
+
+
+class _UsageCompletions(_FakeCompletions):
+    """Reports usage with a growing share of cached prompt tokens."""
+
+    def create(self, **params):
+        response = super().create(**params)
+        cached = 0 if len(self.calls) == 1 else 80
+        response.usage = openai.types.CompletionUsage.model_validate({
+            "prompt_tokens": 100, "completion_tokens": 5, "total_tokens": 105,
+            "prompt_tokens_details": {"cached_tokens": cached}})
+        return response
+
+
+class TestPromptCache:
+    def test_tools_are_sorted_canonical_and_frozen(self, llm_config):
+        completions = _FakeCompletions()
+        ai = AI({**llm_config, "prompt_cache": True, "coalesce": False})
+        ai.client = _fake_client(completions)
+        tools = [_tool("zeta", required=[]), _tool("alpha")]
+        messages = [{"role": "user", "content": "hi"}]
+
+        ai.generate_response(messages, tools=tools, use_tools=True)
+        ai.generate_response(messages, tools=list(tools), use_tools=True)
+
+        first, second = (call["tools"] for call in completions.calls)
+        assert [tool["function"]["name"] for tool in first] == ["alpha", "zeta"]
+        assert list(first[1]["function"]["parameters"]) == ["required", "type"]
+        assert first is second
+        assert "extra_body" not in completions.calls[0]   # not the OpenAI API
+
+    def test_tools_are_untouched_by_default(self, llm_config):
+        completions = _FakeCompletions()
+        ai = AI(dict(llm_config))
+        ai.client = _fake_client(completions)
+        tools = [_tool("zeta"), _tool("alpha")]
+        ai.generate_response([{"role": "user", "content": "hi"}], tools=tools, use_tools=True)
+        assert completions.calls[0]["tools"] is tools
+
+    def test_cache_key_is_stable_per_prefix(self):
+        policy = PromptCachePolicy(True)
+        assert policy.send_key
+        system = {"role": "system", "content": "You answer."}
+        first = policy.cache_key("m", [system, {"role": "user", "content": "a"}], None)
+        second = policy.cache_key("m", [dict(system), {"role": "user", "content": "b"}], None)
+        other = policy.cache_key("m", [{"role": "system", "content": "Other."}], None)
+        assert first == second != other
+        assert PromptCachePolicy({"key": "agent-1"}, "http://local/v1").cache_key("m", [], None) == "agent-1"
+        assert not PromptCachePolicy(True, "http://local/v1").send_key
+        with pytest.raises(ValueError):
+            PromptCachePolicy({"ttl": 5})
+
+    def test_replaced_system_message_gets_a_new_key(self, monkeypatch):
+        from primisai.nexus.core import prompt_cache
+
+        # A new dict may reuse the id of the freed one; make every id collide.
+        monkeypatch.setattr(prompt_cache, "id", lambda obj: 1, raising=False)
+        policy = PromptCachePolicy(True)
+        before = policy.cache_key("m", [{"role": "system", "content": "Agents: A"}], None)
+        after = policy.cache_key("m", [{"role": "system", "content": "Agents: A, B"}], None)
+        assert before != after
+        assert policy.cache_key("other-model", [{"role": "system", "content": "Agents: A, B"}], None) != after
+
+    def test_explicit_key_is_sent(self, llm_config):
+        completions = _FakeCompletions()
+        ai = AI({**llm_config, "prompt_cache": {"key": "research"}, "extra_body": {"top_k": 5}})
+        ai.client = _fake_client(completions)
+        ai.generate_response([{"role": "user", "content": "hi"}])
+        assert completions.calls[0]["extra_body"] == {"top_k": 5, "prompt_cache_key": "research"}
+        assert "prompt_cache_key" not in completions.calls[0]   # not a keyword of older openai releases
+        assert ai.llm_config["extra_body"] == {"top_k": 5}
+
+    def test_cached_tokens_are_reported(self, llm_config):
+        completions = _UsageCompletions()
+        ai = AI({**llm_config, "coalesce": False})
+        ai.client = _fake_client(completions)
+        for i in range(2):
+            ai.generate_response([{"role": "user", "content": str(i)}])
+        stats = ai.prompt_cache_stats.stats()
+        assert stats == {"requests": 2, "prompt_tokens": 200, "cached_tokens": 80, "hit_rate": 0.4}
+
+    def test_usage_dicts_are_accepted(self):
+        stats = PromptCacheStats()
+        stats.record({"prompt_tokens": 10})
+        stats.record(None)
+        assert stats.stats()["requests"] == 1
+
+    def test_output_schema_prompt_is_canonical(self, llm_config):
+        schema = {"type": "object", "properties": {"b": {"type": "string"}, "a": {"type": "string"}}}
+        agent = Agent("Schema", {**llm_config, "prompt_cache": True}, system_message="s", output_schema=schema)
+        assert agent.system_message.index('"a"') < agent.system_message.index('"b"')
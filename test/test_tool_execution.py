@@ -0,0 +1,860 @@
+"""Tests for executing tool calls concurrently (parallel tools and parallel delegation).
+
+LLM calls are replaced with scripted ChatCompletion objects so the tests run
+without network access.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from openai.types.chat import ChatCompletion  # noqa: E402
+
+from primisai.nexus.config.config_validator import ConfigValidationError, ConfigValidator  # noqa: E402
+from primisai.nexus.core import Agent, Supervisor  # noqa: E402
+from primisai.nexus.history import HistoryManager  # noqa: E402
+
+
+@pytest.fixture
+def llm_config():
+    return {
+        "model": "gpt-4o-mini",
+        "api_key": "sk-dummy-test-key-12345",
+        "base_url": "http://localhost:9/v1",
+    }
+
+
+def _completion(content=None, tool_calls=None):
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = [
+            {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+            for call_id, name, arguments in tool_calls
+        ]
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "finish_reason": "tool_calls" if tool_calls else "stop", "message": message}],
+    })
+
+
+def _scripted(responses):
+    def fake(messages, tools=None, use_tools=False):
+        return responses.pop(0)
+    return fake
+
+
+def _ascripted(responses):
+    async def fake(messages, tools=None, use_tools=False):
+        return responses.pop(0)
+    return fake
+
+
+class _Probe:
+    """Tracks how many tools run at the same time."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.overlapped = set()
+
+    def enter(self, name):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            if self.active > 1:
+                self.overlapped.add(name)
+
+    def leave(self, name):
+        with self.lock:
+            if self.active > 1:
+                self.overlapped.add(name)
+            self.active -= 1
+
+
+def _sleep_tool(name, probe, delay=0.2, serial=False):
+    def tool(seconds=delay):
+        probe.enter(name)
+        time.sleep(seconds)
+        probe.leave(name)
+        return f"{name} done"
+
+    entry = {
+        "tool": tool,
+        "metadata": {"type": "function", "function": {
+            "name": name, "parameters": {"type": "object", "properties": {"seconds": {"type": "number"}}}}},
+    }
+    if serial:
+        entry["serial"] = True
+    return entry
+
+
+def _calls(*names, seconds=None):
+    arguments = {} if seconds is None else {"seconds": seconds}
+    return [(f"call_{i}", name, arguments) for i, name in enumerate(names)]
+
+
+class TestParallelTools:
+    def test_tool_calls_run_concurrently_in_call_order(self, llm_config):
+        probe = _Probe()
+        tools = [_sleep_tool(name, probe) for name in ("a", "b", "c")]
+        agent = Agent("Parallel", llm_config, system_message="s", tools=tools, use_tools=True,
+                      parallel_tools=True)
+        agent.generate_response = _scripted([
+            _completion(tool_calls=[("call_0", "a", {"seconds": 0.3}), ("call_1", "b", {}), ("call_2", "c", {})]),
+            _completion(content="done"),
+        ])
+
+        started = time.monotonic()
+        assert agent.chat("go") == "done"
+
+        assert time.monotonic() - started < 0.55
+        tool_msgs = [m for m in agent.chat_history if m["role"] == "tool"]
+        assert [m["tool_call_id"] for m in tool_msgs] == ["call_0", "call_1", "call_2"]
+        assert [m["content"] for m in tool_msgs] == ["a done", "b done", "c done"]
+
+    def test_sequential_by_default(self, llm_config):
+        probe = _Probe()
+        agent = Agent("Sequential", llm_config, system_message="s", use_tools=True,
+                      tools=[_sleep_tool(name, probe, delay=0.05) for name in ("a", "b")])
+        agent.generate_response = _scripted([_completion(tool_calls=_calls("a", "b")), _completion(content="ok")])
+        agent.chat("go")
+        assert probe.peak == 1
+
+    def test_max_concurrency_is_respected(self, llm_config):
+        probe = _Probe()
+        tools = [_sleep_tool(name, probe, delay=0.1) for name in ("a", "b", "c", "d")]
+        agent = Agent("Bounded", llm_config, system_message="s", tools=tools, use_tools=True, parallel_tools=2)
+        agent.generate_response = _scripted([
+            _completion(tool_calls=_calls("a", "b", "c", "d")), _completion(content="ok")])
+        agent.chat("go")
+        assert probe.peak == 2
+
+    def test_serial_tools_never_overlap(self, llm_config):
+        probe = _Probe()
+        tools = [_sleep_tool("a", probe, delay=0.1), _sleep_tool("lock", probe, delay=0.1, serial=True),
+                 _sleep_tool("b", probe, delay=0.1)]
+        agent = Agent("Serial", llm_config, system_message="s", tools=tools, use_tools=True, parallel_tools=True)
+        agent.generate_response = _scripted([
+            _completion(tool_calls=_calls("a", "lock", "b", "a")), _completion(content="ok")])
+        agent.chat("go")
+        assert "lock" not in probe.overlapped
+        assert [m["content"] for m in agent.chat_history if m["role"] == "tool"] == [
+            "a done", "lock done", "b done", "a done"]
+
+    def test_failure_keeps_earlier_outputs(self, llm_config):
+        probe = _Probe()
+
+        def broken(**kwargs):
+            raise OSError("disk on fire")
+
+        tools = [_sleep_tool("a", probe, delay=0.01),
+                 {"tool": broken, "metadata": {"type": "function", "function": {"name": "broken"}}}]
+        agent = Agent("Failing", llm_config, system_message="s", tools=tools, use_tools=True, parallel_tools=True)
+        agent.generate_response = _scripted([_completion(tool_calls=_calls("a", "broken"))])
+
+        with pytest.raises(RuntimeError, match="disk on fire"):
+            agent.chat("go")
+        assert [m["content"] for m in agent.chat_history if m["role"] == "tool"] == ["a done"]
+
+    def test_async_tools_are_gathered(self, llm_config):
+        running = []
+        peak = []
+
+        async def slow(name):
+            running.append(name)
+            peak.append(len(running))
+            await asyncio.sleep(0.2)
+            running.remove(name)
+            return name.upper()
+
+        tools = [{
+            "tool": lambda **kwargs: pytest.fail("sync variant must not run"),
+            "async_tool": (lambda n: lambda: slow(n))(name),
+            "metadata": {"type": "function", "function": {"name": name}},
+        } for name in ("x", "y", "z")]
+        agent = Agent("Gathering", llm_config, system_message="s", tools=tools, use_tools=True,
+                      parallel_tools=True)
+        agent.agenerate_response = _ascripted([
+            _completion(tool_calls=_calls("x", "y", "z")), _completion(content="ok")])
+
+        started = time.monotonic()
+        assert asyncio.run(agent.achat("go")) == "ok"
+        assert time.monotonic() - started < 0.5
+        assert max(peak) == 3
+        assert [m["content"] for m in agent.chat_history if m["role"] == "tool"] == ["X", "Y", "Z"]
+
+    def test_invalid_settings_are_rejected(self, llm_config):
+        with pytest.raises(ValueError):
+            Agent("Invalid", llm_config, system_message="s", parallel_tools=-1)
+        agent = {"name": "A", "type": "agent", "system_message": "s", "parallel_tools": "yes",
+                 "llm_config": {"model": "m", "api_key": "k", "base_url": "u"}}
+        with pytest.raises(ConfigValidationError):
+            ConfigValidator._validate_agent(agent)
+        agent["parallel_tools"] = 4
+        ConfigValidator._validate_agent(agent)
+
+
+def _delegation(call_id, agent_name, query):
+    return (call_id, f"delegate_to_{agent_name}", {"reasoning": "r", "query": query, "context": "c"})
+
+
+def _worker(name, llm_config, probe, delay=0.2):
+    worker = Agent(name, llm_config, system_message=f"You are {name}.")
+
+    def generate(messages, tools=None, use_tools=False):
+        probe.enter(name)
+        time.sleep(delay)
+        probe.leave(name)
+        return _completion(content=f"{name}: {messages[-1]['content'].split()[-1]}")
+
+    async def agenerate(messages, tools=None, use_tools=False):
+        probe.enter(name)
+        await asyncio.sleep(delay)
+        probe.leave(name)
+        return _completion(content=f"{name}: {messages[-1]['content'].split()[-1]}")
+
+    worker.generate_response = generate
+    worker.agenerate_response = agenerate
+    return worker
+
+
+class TestParallelDelegation:
+    def _supervisor(self, llm_config, probe, fan_out, parallel_delegation=True):
+        supervisor = Supervisor("Boss", llm_config, system_message="You delegate.",
+                                parallel_delegation=parallel_delegation)
+        for name in ("Researcher", "Coder", "Reviewer"):
+            supervisor.register_agent(_worker(name, llm_config, probe))
+        responses = [_completion(tool_calls=fan_out), _completion(content="all done")]
+        supervisor.generate_response = _scripted(list(responses))
+        supervisor.agenerate_response = _ascripted(list(responses))
+        return supervisor
+
+    def test_sub_agents_run_concurrently(self, llm_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        probe = _Probe()
+        fan_out = [_delegation("call_0", "Researcher", "research"), _delegation("call_1", "Coder", "code"),
+                   _delegation("call_2", "Reviewer", "review")]
+        supervisor = self._supervisor(llm_config, probe, fan_out)
+
+        started = time.monotonic()
+        assert supervisor.chat("build it") == "all done"
+
+        assert time.monotonic() - started < 0.5
+        assert probe.peak == 3
+        tool_msgs = [m for m in supervisor.chat_history if m["role"] == "tool"]
+        assert [m["content"] for m in tool_msgs] == ["Researcher: research", "Coder: code", "Reviewer: review"]
+        loaded = HistoryManager(supervisor.workflow_id).load_chat_history("Boss")
+        assert [(m["role"], m.get("content")) for m in loaded[1:]] == [
+            (m["role"], m.get("content")) for m in supervisor.chat_history]
+
+    def test_calls_to_the_same_agent_keep_their_order(self, llm_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        probe = _Probe()
+        fan_out = [_delegation("call_0", "Coder", "first"), _delegation("call_1", "Reviewer", "review"),
+                   _delegation("call_2", "Coder", "second")]
+        supervisor = self._supervisor(llm_config, probe, fan_out)
+        supervisor.chat("build it")
+
+        coder = supervisor.get_agent_by_name("Coder")
+        assert [m["content"] for m in coder.chat_history if m["role"] == "assistant"] == [
+            "Coder: first", "Coder: second"]
+        assert [m["content"] for m in supervisor.chat_history if m["role"] == "tool"] == [
+            "Coder: first", "Reviewer: review", "Coder: second"]
+
+    def test_concurrency_cap_and_chain(self, llm_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        probe = _Probe()
+        fan_out = [_delegation(f"call_{i}", name, "go") for i, name in enumerate(("Researcher", "Coder", "Reviewer"))]
+        supervisor = self._supervisor(llm_config, probe, fan_out, parallel_delegation=2)
+        supervisor.chat("build it")
+
+        assert probe.peak == 2
+        with open(supervisor.history_manager.history_file) as f:
+            records = [json.loads(line) for line in f]
+        assert all(r["supervisor_chain"] == ["Boss"] for r in records
+                   if r["sender_name"] == "Boss" and r["role"] in ("assistant", "tool"))
+
+    def test_async_delegations_are_gathered(self, llm_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        probe = _Probe()
+        fan_out = [_delegation("call_0", "Researcher", "research"), _delegation("call_1", "Coder", "code")]
+        supervisor = self._supervisor(llm_config, probe, fan_out)
+
+        started = time.monotonic()
+        assert asyncio.run(supervisor.achat("build it")) == "all done"
+        assert time.monotonic() - started < 0.35
+        assert [m["content"] for m in supervisor.chat_history if m["role"] == "tool"] == [
+            "Researcher: research", "Coder: code"]
+
+
+class TestDispatchIndexes:
+    def test_tool_metadata_is_reused_until_tools_change(self, llm_config):
+        probe = _Probe()
+        agent = Agent("Indexed", llm_config, system_message="s", use_tools=True,
+                      tools=[_sleep_tool("a", probe), _sleep_tool("b", probe)])
+        first = agent._tool_request_kwargs()["tools"]
+        assert agent._tool_request_kwargs()["tools"] is first
+        assert agent._tool_indexes()[0]["b"] is agent.tools[1]
+
+        agent.tools.append(_sleep_tool("c", probe))
+        assert [t["function"]["name"] for t in agent._tool_request_kwargs()["tools"]] == ["a", "b", "c"]
+
+    def test_mcp_removal_invalidates_the_index(self, llm_config):
+        probe = _Probe()
+        mcp_tool = {**_sleep_tool("remote", probe), "_mcp_tool": True}
+        agent = Agent("Mcp", llm_config, system_message="s", use_tools=True, tools=[_sleep_tool("local", probe), mcp_tool])
+        agent._remove_all_mcp_tools()
+        assert "remote" not in agent._tool_indexes()[0]
+        assert agent.tools_metadata == [agent.tools[0]["metadata"]]
+
+    def test_agents_are_resolved_by_normalized_name(self, llm_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        supervisor = Supervisor("Boss", llm_config, system_message="s")
+        worker = Agent("Data Analyst", llm_config, system_message="You analyse.")
+        supervisor.register_agent(worker)
+        call = _completion(tool_calls=[_delegation("c", "Data_Analyst", "q")]).choices[0].message.tool_calls[0]
+
+        assert supervisor._resolve_delegation(call)[0] is worker
+        supervisor.remove_agent("Data Analyst")
+        with pytest.raises(ValueError):
+            supervisor._resolve_delegation(call)
+
+
+class TestAsyncTools:
+    def _lookup_tool(self, log):
+        async def lookup(key):
+            log.append(threading.current_thread().name)
+            await asyncio.sleep(0.2)
+            return f"value of {key}"
+
+        return {"tool": lookup, "metadata": {"type": "function", "function": {
+            "name": "lookup", "parameters": {"type": "object", "properties": {"key": {"type": "string"}}}}}}
+
+    def test_async_def_tools_are_detected_at_registration(self, llm_config):
+        tool = self._lookup_tool([])
+        Agent("Detecting", llm_config, system_message="s", tools=[tool], use_tools=True)
+        assert tool["_native_async"] and tool["async_tool"] is tool["tool"]
+
+    def test_sync_chat_awaits_on_the_background_loop(self, llm_config):
+        threads = []
+        agent = Agent("SyncCaller", llm_config, system_message="s", tools=[self._lookup_tool(threads)],
+                      use_tools=True)
+        agent.generate_response = _scripted([
+            _completion(tool_calls=[("call_0", "lookup", {"key": "k"})]), _completion(content="ok")])
+
+        assert agent.chat("go") == "ok"
+        assert agent.chat_history[-2]["content"] == "value of k"
+        assert threads and threads[0] != threading.current_thread().name
+
+    def test_async_tools_overlap_in_parallel_sync_chat(self, llm_config):
+        agent = Agent("Overlapping", llm_config, system_message="s", tools=[self._lookup_tool([])],
+                      use_tools=True, parallel_tools=True)
+        agent.generate_response = _scripted([
+            _completion(tool_calls=[(f"call_{i}", "lookup", {"key": str(i)}) for i in range(5)]),
+            _completion(content="ok")])
+
+        started = time.monotonic()
+        agent.chat("go")
+        assert time.monotonic() - started < 0.6
+        assert [m["content"] for m in agent.chat_history if m["role"] == "tool"] == [
+            f"value of {i}" for i in range(5)]
+
+    def test_achat_awaits_natively(self, llm_config):
+        threads = []
+        agent = Agent("AsyncCaller", llm_config, system_message="s", tools=[self._lookup_tool(threads)],
+                      use_tools=True)
+        agent.agenerate_response = _ascripted([
+            _completion(tool_calls=[("call_0", "lookup", {"key": "k"})]), _completion(content="ok")])
+
+        assert asyncio.run(agent.achat("go")) == "ok"
+        assert threads == [threading.current_thread().name]
+
+
+class TestToolResultCache:
+    def _counting_tool(self, calls, cache=True, is_async=False):
+        def lookup(key):
+            calls.append(key)
+            return f"value of {key}"
+
+        async def alookup(key):
+            return lookup(key)
+
+        return {"tool": alookup if is_async else lookup, "cache": cache, "metadata": {
+            "type": "function", "function": {
+                "name": "lookup", "parameters": {"type": "object", "properties": {"key": {"type": "string"}}}}}}
+
+    def _agent(self, llm_config, tool, turns):
+        agent = Agent("Caching", llm_config, system_message="s", tools=[tool], use_tools=True)
+        responses = []
+        for i, key in enumerate(turns):
+            responses += [_completion(tool_calls=[(f"call_{i}", "lookup", {"key": key})]), _completion(content="ok")]
+        agent.generate_response = _scripted(list(responses))
+        agent.agenerate_response = _ascripted(list(responses))
+        return agent
+
+    def test_hits_skip_the_tool_and_are_recorded(self, llm_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        calls = []
+        agent = self._agent(llm_config, self._counting_tool(calls, cache={"ttl": 60, "max_entries": 8}),
+                            ["a", "a", "b"])
+        agent.set_workflow_id("cached")
+        for _ in range(3):
+            agent.chat("go")
+
+        assert calls == ["a", "b"]
+        assert [m["content"] for m in agent.chat_history if m["role"] == "tool"] == [
+            "value of a", "value of a", "value of b"]
+        with open(agent.history_manager.history_file) as f:
+            records = [json.loads(line) for line in f]
+        hits = [r.get("metadata", {}).get("cache_hit", False) for r in records if r["role"] == "tool"]
+        assert hits == [False, True, False]
+
+    def test_entries_expire(self, llm_config):
+        calls = []
+        agent = self._agent(llm_config, self._counting_tool(calls, cache={"ttl": 0.05, "max_entries": 9}),
+                            ["a", "a"])
+        agent.chat("go")
+        time.sleep(0.1)
+        agent.chat("go")
+        assert calls == ["a", "a"]
+
+    def test_async_tools_are_cached(self, llm_config):
+        calls = []
+        agent = self._agent(llm_config, self._counting_tool(calls, cache={"max_entries": 10}, is_async=True),
+                            ["a", "a"])
+        asyncio.run(agent.achat("go"))
+        asyncio.run(agent.achat("go"))
+        assert calls == ["a"]
+
+    def test_tools_sharing_a_name_do_not_share_results(self):
+        from primisai.nexus.core.tool_execution import prepare_tool, run_tool
+
+        meta = {"type": "function", "function": {
+            "name": "search", "parameters": {"type": "object", "properties": {"q": {"type": "string"}}}}}
+        docs = prepare_tool({"tool": lambda q: f"docs:{q}", "cache": True, "metadata": meta})
+        web = prepare_tool({"tool": lambda q: f"web:{q}", "cache": True, "metadata": meta})
+        assert [run_tool(tool, {"q": "x"}, asyncio.run) for tool in (docs, web, docs, web)] == [
+            "docs:x", "web:x", "docs:x", "web:x"]
+        assert docs["_namespace"] != web["_namespace"]
+
+    def test_mcp_server_cache_settings(self):
+        proxy = lambda **kwargs: None  # noqa: E731
+        proxy.async_proxy = None
+        meta = {"function": {"name": "search"}}
+        server = {"type": "sse", "url": "u", "cache": {"ttl": 30, "tools": ["search"]}}
+        tool = Agent._mcp_tool_dict(server, "sse:u::", proxy, meta)
+        assert tool["cache"] == {"ttl": 30} and tool["_namespace"] == "sse:u::"
+        assert "cache" not in Agent._mcp_tool_dict({"cache": {"tools": ["other"]}}, "k", proxy, meta)
+        assert "cache" not in Agent._mcp_tool_dict({}, "k", proxy, meta)
+
+    def test_yaml_validation(self):
+        tool = {"name": "t", "type": "function", "python_path": "m.f", "cache": "yes"}
+        with pytest.raises(ConfigValidationError):
+            ConfigValidator._validate_tools([tool])
+        tool["cache"] = {"ttl": 60}
+        ConfigValidator._validate_tools([tool])
+
+
+class TestToolTimeouts:
+    def _tool(self, name, function, **settings):
+        return {"tool": function, **settings, "metadata": {"type": "function", "function": {
+            "name": name, "parameters": {"type": "object", "properties": {"seconds": {"type": "number"}}}}}}
+
+    def _agent(self, llm_config, tools, calls, **kwargs):
+        agent = Agent("Bounded", llm_config, system_message="s", tools=tools, use_tools=True, **kwargs)
+        responses = [_completion(tool_calls=calls), _completion(content="recovered")]
+        agent.generate_response = _scripted(list(responses))
+        agent.agenerate_response = _ascripted(list(responses))
+        return agent
+
+    def test_hung_sync_tool_returns_a_timeout_error(self, llm_config):
+        def hang(seconds=5):
+            time.sleep(seconds)
+
+        agent = self._agent(llm_config, [self._tool("hang", hang, timeout=0.1)], [("call_0", "hang", {"seconds": 1})])
+        started = time.monotonic()
+        assert agent.chat("go") == "recovered"
+        assert time.monotonic() - started < 0.5
+        error = json.loads(agent.chat_history[-2]["content"])
+        assert error["error"] == "timeout" and error["tool"] == "hang"
+
+    def test_agent_default_timeout_cancels_async_tools(self, llm_config):
+        cancelled = []
+
+        async def hang(seconds=5):
+            try:
+                await asyncio.sleep(seconds)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        agent = self._agent(llm_config, [self._tool("hang", hang)], [("call_0", "hang", {})], tool_timeout=0.1)
+        assert asyncio.run(agent.achat("go")) == "recovered"
+        assert cancelled == [True]
+        assert json.loads(agent.chat_history[-2]["content"])["timeout_seconds"] == 0.1
+
+    def test_timeouts_do_not_fail_parallel_calls(self, llm_config, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        probe = _Probe()
+        tools = [_sleep_tool("fast", probe, delay=0.05), {**_sleep_tool("slow", probe), "timeout": 0.1}]
+        agent = self._agent(llm_config, tools, [("call_0", "slow", {"seconds": 1}), ("call_1", "fast", {})],
+                            parallel_tools=True)
+        agent.set_workflow_id("bounded")
+        assert agent.chat("go") == "recovered"
+        assert [m["content"] for m in agent.chat_history if m["role"] == "tool"][1] == "fast done"
+        with open(agent.history_manager.history_file) as f:
+            records = [json.loads(line) for line in f]
+        assert [r.get("metadata") for r in records if r["role"] == "tool"] == [{"timeout": True}, None]
+
+    def test_max_concurrency_is_shared_across_agents(self, llm_config):
+        probe = _Probe()
+        agents = []
+        for i in range(2):
+            tool = {**_sleep_tool("render", probe, delay=0.1), "max_concurrency": 1}
+            agents.append(self._agent(llm_config, [tool], _calls("render", "render"), parallel_tools=True))
+        threads = [threading.Thread(target=agent.chat, args=("go",)) for agent in agents]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert probe.peak == 1
+
+    def test_tools_sharing_a_name_get_their_own_limiters(self, caplog):
+        from primisai.nexus.core.tool_execution import prepare_tool
+
+        meta = {"type": "function", "function": {"name": "render", "parameters": {"type": "object", "properties": {}}}}
+        fast = prepare_tool({"tool": lambda: "fast", "max_concurrency": 4, "metadata": meta})
+        slow = prepare_tool({"tool": lambda: "slow", "max_concurrency": 1, "metadata": meta})
+        assert (fast["_limiter"].limit, slow["_limiter"].limit) == (4, 1)
+        assert "already limited" not in caplog.text
+
+    def test_invalid_settings_are_rejected(self, llm_config):
+        with pytest.raises(ValueError):
+            Agent("Bad", llm_config, system_message="s", tool_timeout=0)
+        with pytest.raises(ValueError):
+            Agent("Bad", llm_config, system_message="s", tools=[self._tool("t", print, max_concurrency=0)])
+        with pytest.raises(ConfigValidationError):
+            ConfigValidator._validate_tools([{"name": "t", "type": "function", "python_path": "m.f", "timeout": -1}])
+
+
+class TestArgumentBinding:
+    _schema = {"type": "object", "properties": {
+        "city": {"type": "string"},
+        "days": {"type": "integer", "minimum": 1},
+        "units": {"type": "string", "enum": ["metric", "imperial"]},
+    }, "required": ["city"]}
+
+    def _tool(self, function, schema=None):
+        return {"tool": function, "metadata": {"type": "function", "function": {
+            "name": "forecast", "parameters": self._schema if schema is None else schema}}}
+
+    def _run(self, llm_config, tool, arguments):
+        agent = Agent("Binding", llm_config, system_message="s", tools=[tool], use_tools=True)
+        agent.generate_response = _scripted([
+            _completion(tool_calls=[("call_0", "forecast", arguments)]), _completion(content="ok")])
+        agent.chat("go")
+        return agent.chat_history[-2]["content"]
+
+    def test_call_mode_is_chosen_at_registration(self, llm_config):
+        keyword = self._tool(lambda city, days=1, units="metric": f"{city}/{days}/{units}")
+        single = self._tool(lambda args: f"{args['city']}")
+        Agent("Modes", llm_config, system_message="s", tools=[keyword, single], use_tools=True)
+        assert (keyword["_call_mode"], single["_call_mode"]) == ("kwargs", "dict")
+        assert self._run(llm_config, keyword, {"city": "Oslo", "days": 3}) == "Oslo/3/metric"
+        assert self._run(llm_config, single, {"city": "Oslo"}) == "Oslo"
+
+    def test_type_error_inside_a_tool_does_not_rerun_it(self, llm_config):
+        runs = []
+
+        def forecast(city):
+            runs.append(city)
+            raise TypeError("bug inside the tool")
+
+        with pytest.raises(RuntimeError, match="bug inside the tool"):
+            self._run(llm_config, self._tool(forecast), {"city": "Oslo"})
+        assert runs == ["Oslo"]
+
+    def test_invalid_arguments_are_returned_to_the_model(self, llm_config):
+        runs = []
+        tool = self._tool(lambda city, days=1, units="metric": runs.append(city))
+
+        error = json.loads(self._run(llm_config, tool, {"days": 0, "units": "kelvin", "extra": True}))
+
+        assert runs == []
+        assert error["error"] == "invalid_arguments"
+        assert sorted(error["problems"]) == sorted([
+            "missing required argument 'city'",
+            "'days' must be >= 1, got 0",
+            "'units' must be one of ['metric', 'imperial'], got 'kelvin'",
+            "unexpected argument 'extra'",
+        ])
+
+    def test_nested_schemas(self):
+        from primisai.nexus.core.tool_binding import compile_validator
+        validate = compile_validator(None, {"type": "object", "properties": {
+            "points": {"type": "array", "items": {"type": "object", "properties": {"x": {"type": "number"}},
+                                                  "required": ["x"], "additionalProperties": False}},
+            "label": {"anyOf": [{"type": "string"}, {"type": "null"}]},
+        }}, "kwargs")
+        assert validate({"points": [{"x": 1.5}], "label": None}) == []
+        assert validate({"points": [{"x": "1"}, {"y": 2}], "label": 3}) == [
+            "'points[0].x' must be of type number, got str",
+            "missing required argument 'points[1].x'",
+            "unexpected argument 'points[1].y'",
+            "'label' does not match any of the allowed schemas",
+        ]
+        assert validate(["not", "an", "object"]) == ["arguments must be a JSON object, got list"]
+
+
+class TestMcpDiscovery:
+    servers = [{"type": "sse", "url": f"http://mcp-{i}.test/sse"} for i in range(3)]
+
+    @pytest.fixture
+    def slow_servers(self, monkeypatch):
+        async def discover(agent, server, refresh=False, delay=0.3):
+            await asyncio.sleep(delay)
+            label = f"sse:{server['url']}"
+            agent._mcp_server_stats[label] = {"seconds": delay, "tools": 1, "error": None}
+            name = server["url"].split("//")[1].split(".")[0].replace("-", "_")
+            return [{"tool": lambda **kwargs: f"{name} ran", "_mcp_tool": True, "metadata": {
+                "type": "function", "function": {"name": name, "parameters": {"type": "object", "properties": {}}}}}]
+
+        monkeypatch.setattr(Agent, "_discover_mcp_server", discover)
+
+    def test_servers_are_contacted_concurrently(self, llm_config, slow_servers):
+        agent = Agent("Eager", llm_config, system_message="s", mcp_servers=self.servers, use_tools=True)
+        stats = agent.mcp_discovery_stats()
+        assert stats["construction_seconds"] < 0.6
+        assert sorted(agent._mcp_tool_names) == ["mcp_0", "mcp_1", "mcp_2"]
+        assert not stats["pending"] and set(stats["servers"]) == {f"sse:{s['url']}" for s in self.servers}
+
+    def test_lazy_discovery_is_awaited_on_first_chat(self, llm_config, slow_servers):
+        agent = Agent("Lazy", llm_config, system_message="s", mcp_servers=self.servers, use_tools=True,
+                      mcp_discovery="lazy")
+        assert agent.construction_seconds < 0.2 and agent.mcp_discovery_stats()["pending"]
+        agent.generate_response = _scripted([
+            _completion(tool_calls=[("call_0", "mcp_1", {})]), _completion(content="ok")])
+        assert agent.chat("go") == "ok"
+        assert agent.chat_history[-2]["content"] == "mcp_1 ran"
+        assert agent.mcp_discovery_stats()["discovery_seconds"] >= 0.3
+
+    def test_lazy_discovery_is_awaited_by_achat(self, llm_config, slow_servers):
+        agent = Agent("LazyAsync", llm_config, system_message="s", mcp_servers=self.servers, use_tools=True,
+                      mcp_discovery="lazy")
+        agent.agenerate_response = _ascripted([
+            _completion(tool_calls=[("call_0", "mcp_2", {})]), _completion(content="ok")])
+        assert asyncio.run(agent.achat("go")) == "ok"
+        assert agent.chat_history[-2]["content"] == "mcp_2 ran"
+
+    def test_invalid_mode_is_rejected(self, llm_config):
+        with pytest.raises(ValueError):
+            Agent("Bad", llm_config, system_message="s", mcp_discovery="later")
+
+
+_STDIO_SERVER = '''
+import asyncio
+import os
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("Counter")
+
+
+@mcp.tool()
+async def slow_pid(seconds: float) -> str:
+    """Wait, then report the server process id."""
+    await asyncio.sleep(seconds)
+    return str(os.getpid())
+
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")
+'''
+
+
+class TestSharedMcpSessions:
+    def test_agents_share_one_session_per_server(self, llm_config, tmp_path):
+        from primisai.nexus.core.mcp_sessions import get_mcp_manager
+
+        script = tmp_path / "pid_server.py"
+        script.write_text(_STDIO_SERVER)
+        servers = [{"type": "stdio", "script_path": str(script)}]
+        agents = [Agent(f"Shared{i}", llm_config, system_message="s", mcp_servers=servers, use_tools=True,
+                        parallel_tools=True) for i in range(3)]
+        key = next(iter(agents[0]._mcp_sessions))
+        manager = get_mcp_manager()
+        assert manager.stats()[key] == 3
+        assert all(agent._mcp_sessions[key] is agents[0]._mcp_sessions[key] for agent in agents)
+
+        agents[0].generate_response = _scripted([
+            _completion(tool_calls=[(f"call_{i}", "slow_pid", {"seconds": 0.3}) for i in range(4)]),
+            _completion(content="ok")])
+        started = time.monotonic()
+        agents[0].chat("go")
+        assert time.monotonic() - started < 1.0   # four calls in flight on one session
+        pids = {m["content"] for m in agents[0].chat_history if m["role"] == "tool"}
+        assert len(pids) == 1
+
+        for agent in agents:
+            agent.close()
+        deadline = time.monotonic() + 5
+        while key in manager.stats() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert key not in manager.stats()
+
+    def test_failed_mcp_calls_are_not_cached(self, llm_config, tmp_path):
+        script = tmp_path / "flaky_server.py"
+        script.write_text(_STDIO_SERVER.replace('if __name__', _FLAKY_TOOL + 'if __name__'))
+        servers = [{"type": "stdio", "script_path": str(script), "cache": {"ttl": 60, "tools": ["flaky"]}}]
+        agent = Agent("FlakyMcp", llm_config, system_message="s", mcp_servers=servers, use_tools=True)
+        responses = []
+        for i in range(3):
+            responses += [_completion(tool_calls=[(f"call_{i}", "flaky", {"key": "a"})]), _completion(content="ok")]
+        agent.generate_response = _scripted(responses)
+        for _ in range(3):
+            agent.chat("go")
+        agent.close()
+
+        outputs = [m["content"] for m in agent.chat_history if m["role"] == "tool"]
+        assert "transient failure" in outputs[0]
+        assert outputs[1:] == ["value of a #2", "value of a #2"]   # the retry ran, then was served from cache
+
+    def test_mcp_transport_errors_are_not_cached(self, llm_config):
+        from types import SimpleNamespace
+
+        from primisai.nexus.core.tool_execution import ToolError, prepare_tool, run_tool
+
+        attempts = []
+
+        class Session:
+            async def call_tool(self, name, arguments):
+                attempts.append(arguments)
+                if len(attempts) == 1:
+                    raise ConnectionError("connection reset")
+                return SimpleNamespace(content=[SimpleNamespace(text="fresh")], isError=False)
+
+        agent = Agent("FlakyTransport", llm_config, system_message="s")
+        agent._mcp_sessions["k"] = SimpleNamespace(session=Session())
+        proxy = agent._build_mcp_tool_proxy("sse", {"_session_key": "k"}, "search")
+        meta = {"type": "function", "function": {"name": "search", "parameters": {"type": "object", "properties": {}}}}
+        tool = prepare_tool(Agent._mcp_tool_dict({"cache": {"ttl": 60}}, "k", proxy, meta))
+
+        first = run_tool(tool, {}, agent._run_in_mcp_loop)
+        assert isinstance(first, ToolError) and "connection reset" in first
+        assert [run_tool(tool, {}, agent._run_in_mcp_loop) for _ in range(2)] == ["fresh", "fresh"]
+        assert len(attempts) == 2
+        agent.close()
+
+
+    def test_cancelled_calls_notify_the_server_with_their_request_id(self, llm_config, tmp_path, monkeypatch):
+        from mcp.types import JSONRPCRequest
+
+        from primisai.nexus.core import mcp_sessions
+
+        sent, notified = [], []
+        send = mcp_sessions._RequestIdRecorder.send
+
+        async def spy_send(self, message):
+            if isinstance(message.message.root, JSONRPCRequest):
+                sent.append((message.message.root.method, message.message.root.id))
+            await send(self, message)
+
+        notify = Agent._notify_mcp_cancelled
+
+        async def spy_notify(session, request_id, tool_name):
+            notified.append(request_id)
+            await notify(session, request_id, tool_name)
+
+        monkeypatch.setattr(mcp_sessions._RequestIdRecorder, "send", spy_send)
+        monkeypatch.setattr(Agent, "_notify_mcp_cancelled", staticmethod(spy_notify))
+        script = tmp_path / "pid_server.py"
+        script.write_text(_STDIO_SERVER)
+        agent = Agent("CancelMcp", llm_config, system_message="s", use_tools=True,
+                      mcp_servers=[{"type": "stdio", "script_path": str(script)}])
+        tool = next(t for t in agent.tools if t["metadata"]["function"]["name"] == "slow_pid")
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(tool["async_tool"](seconds=5), 0.3))
+        deadline = time.monotonic() + 5
+        while not notified and time.monotonic() < deadline:
+            time.sleep(0.05)
+        calls = [request_id for method, request_id in sent if method == "tools/call"]
+        assert notified == calls and isinstance(calls[0], int)
+        assert tool["tool"](seconds=0).isdigit()   # the session is still usable
+        agent.close()
+
+
+_FLAKY_TOOL = '''
+calls = 0
+
+
+@mcp.tool()
+def flaky(key: str) -> str:
+    """Fail on the first call, then answer."""
+    global calls
+    calls += 1
+    if calls == 1:
+        raise RuntimeError("transient failure")
+    return f"value of {key} #{calls}"
+
+
+'''
+
+
+class TestMcpCatalogCache:
+    def test_catalog_round_trip_and_hash_check(self, tmp_path):
+        from primisai.nexus.core.mcp_catalog import McpCatalogCache
+
+        path = tmp_path / "catalog.json"
+        tools = [{"type": "function", "function": {"name": "echo", "parameters": {"type": "object"}}}]
+        McpCatalogCache(path).put("sse:http://x::secret", "sse:http://x", tools)
+        assert "secret" not in path.read_text()
+        assert McpCatalogCache(path).get("sse:http://x::secret") == tools
+        assert McpCatalogCache(path).get("sse:http://x::other") is None
+
+        data = json.loads(path.read_text())
+        next(iter(data["servers"].values()))["tools"][0]["function"]["name"] = "tampered"
+        path.write_text(json.dumps(data))
+        assert McpCatalogCache(path).get("sse:http://x::secret") is None
+
+    def test_agent_starts_from_cache_and_picks_up_changes(self, llm_config, tmp_path):
+        script = tmp_path / "pid_server.py"
+        script.write_text(_STDIO_SERVER)
+        catalog = str(tmp_path / "catalog.json")
+        servers = [{"type": "stdio", "script_path": str(script)}]
+
+        first = Agent("Cold", llm_config, system_message="s", mcp_servers=servers, use_tools=True,
+                      mcp_catalog_cache=catalog)
+        assert next(iter(first.mcp_discovery_stats()["servers"].values()))["source"] == "server"
+        first.close()
+
+        warm = Agent("Warm", llm_config, system_message="s", mcp_servers=servers, use_tools=True,
+                     mcp_catalog_cache=catalog)
+        assert next(iter(warm.mcp_discovery_stats()["servers"].values()))["source"] == "cache"
+        assert "slow_pid" in warm._mcp_tool_names
+        warm.generate_response = _scripted([
+            _completion(tool_calls=[("call_1", "slow_pid", {"seconds": 0})]),
+            _completion(content="ok")])
+        assert warm.chat("go") == "ok"
+        assert [m["content"] for m in warm.chat_history if m["role"] == "tool"][0].isdigit()
+        warm.close()
+
+        script.write_text(_STDIO_SERVER.replace(
+            'if __name__', '@mcp.tool()\ndef ping() -> str:\n    """Reply."""\n    return "pong"\n\n\nif __name__'))
+        changed = Agent("Changed", llm_config, system_message="s", mcp_servers=servers, use_tools=True,
+                        mcp_catalog_cache=catalog)
+        assert "ping" not in changed._mcp_tool_names
+        deadline = time.monotonic() + 10
+        while "ping" not in changed._mcp_tool_names and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert changed._mcp_tool_names == {"slow_pid", "ping"}
+        assert "ping" in (tmp_path / "catalog.json").read_text()
+        changed.close()